@@ -1,12 +1,22 @@
 import streamlit as st
-import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 import numpy as np
 import time
 import os
 import base64
-from catboost import CatBoostRegressor
+import logging
+from data_store import OUTLIER_METHODS, load_dashboard_frame, remove_outliers
+from filter_index import FilterIndex, filter_key
+from market_cube import MarketCube
+from predictor import PricePredictor
+from prediction_cache import CachedPredictor, DISTANCE_STEP
+from price_surface import load_or_build as load_or_build_surface
+from map_tiles import SpatialIndex
+from map_figure import build_map_figure, fit_to_budget
+
+# Map payload sizes and other diagnostics go to the server log
+logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(levelname)s: %(message)s")
 
 # ==================== 1. PAGE CONFIGURATION ====================
 st.set_page_config(
@@ -15,6 +25,21 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+# Outlier trimming for realSum: "iqr", "city_iqr", "percentile" or "none"
+OUTLIER_METHOD = os.environ.get("AIRBNB_OUTLIER_METHOD", "iqr")
+
+# Upper bound on markers sent to the map (points or tile clusters)
+MAP_MAX_MARKERS = int(os.environ.get("AIRBNB_MAP_MAX_MARKERS", "2000"))
+
+# Upper bound on the serialized map figure; markers are reduced until it fits
+MAP_PAYLOAD_BUDGET_KB = int(os.environ.get("AIRBNB_MAP_PAYLOAD_BUDGET_KB", "300"))
+
+# Fixed inputs for the map's predicted prices (the map frame carries city, room type and distance only)
+MAP_PREDICTION_INPUTS = {"person_capacity": 2, "cleanliness_rating": 9, "is_weekend": 0}
+
+# Set to 1 to precompute every predictor form combination for all cities at startup
+PREWARM_PREDICTIONS = os.environ.get("AIRBNB_PREWARM_PREDICTIONS", "0") == "1"
+
 # ==================== 2. THEME & COLORS ====================
 AIRBNB_COLOR = "#FF385C"
 AIRBNB_GRADIENT = f"linear-gradient(135deg, {AIRBNB_COLOR}, #BD1E59)"
@@ -185,32 +210,62 @@ if not st.session_state.intro_done:
     show_intro()
 
 # ==================== 5. LOAD DATA & MODEL ====================
-@st.cache_data
+@st.cache_resource
 def load_data():
-    data_path = os.path.join(os.path.dirname(__file__), "data", "airbnb_listings_clean.csv")
-    return pd.read_csv(data_path)
+    # Typed columnar store (built from the CSV on first run), dashboard columns only.
+    # Cached as a shared resource: the frame is read-only, so reruns skip the per-call copy
+    return load_dashboard_frame()
+
+@st.cache_resource
+def load_clean_data(outlier_method=OUTLIER_METHOD):
+    # Outlier trimming depends only on the dataset, so it runs once per method, not per rerun
+    return remove_outliers(load_data(), method=outlier_method)
 
 @st.cache_resource
-def load_model():
+def load_predictor():
+    # Model loaded once per process; predictions are batched through PricePredictor
     try:
-        model = CatBoostRegressor()
-        model_path = os.path.join(os.path.dirname(__file__), "airbnb_model.cbm")
-        model.load_model(model_path)
-        return model
+        return PricePredictor()
     except:
         return None
 
-df = load_data()
+@st.cache_resource
+def load_cached_predictor():
+    # Memoized predictions shared by all sessions, keyed on the quantized form inputs
+    predictor = load_predictor()
+    if predictor is None:
+        return None
+    cached = CachedPredictor(predictor)
+    if PREWARM_PREDICTIONS:
+        clean_df = load_clean_data()
+        cached.prewarm(sorted(clean_df['city'].unique()), sorted(clean_df['room_type'].unique()))
+    return cached
+
+@st.cache_resource
+def load_price_surface():
+    # Whole what-if grid predicted once and kept as a float32 array (data/price_surface.npz)
+    predictor = load_predictor()
+    if predictor is None:
+        return None
+    raw_df = load_data()
+    return load_or_build_surface(predictor, sorted(raw_df['city'].unique()), sorted(raw_df['room_type'].unique()))
 
-# Remove outliers using IQR method (calculated dynamically from data)
-Q1 = df['realSum'].quantile(0.25)
-Q3 = df['realSum'].quantile(0.75)
-IQR = Q3 - Q1
-lower_bound = Q1 - (1.5 * IQR)
-upper_bound = Q3 + (1.5 * IQR)
+@st.cache_resource
+def load_filter_index(_df, outlier_method=OUTLIER_METHOD):
+    # Built once per process over the outlier-trimmed dataset and shared by all sessions
+    return FilterIndex(_df)
+
+@st.cache_resource
+def load_spatial_index(_df, outlier_method=OUTLIER_METHOD):
+    # Per-zoom-level tile ids for every listing, built once at load time
+    return SpatialIndex(_df)
 
-# Filter out outliers from realSum column
-df = df[(df['realSum'] >= lower_bound) & (df['realSum'] <= upper_bound)].copy()
+@st.cache_resource
+def load_market_cube(_df, outlier_method=OUTLIER_METHOD):
+    # Pre-aggregated cells behind the KPI cards and Market Breakdown charts
+    return MarketCube(_df)
+
+df = load_clean_data()
 
 # ==================== SIDEBAR FILTERS ====================
 with st.sidebar:
@@ -299,281 +354,286 @@ with st.sidebar:
     if st.button("Reset Filters", use_container_width=True):
         st.rerun()
 
-# Apply Filters
-filtered_df = df.copy()
-
-if selected_cities:
-    filtered_df = filtered_df[filtered_df['city'].isin(selected_cities)]
-
-if selected_room_types:
-    filtered_df = filtered_df[filtered_df['room_type'].isin(selected_room_types)]
-
-filtered_df = filtered_df[
-    (filtered_df['realSum'] >= price_range[0]) & 
-    (filtered_df['realSum'] <= price_range[1])
-]
-
-filtered_df = filtered_df[
-    (filtered_df['person_capacity'] >= capacity_range[0]) & 
-    (filtered_df['person_capacity'] <= capacity_range[1])
-]
-
-filtered_df = filtered_df[filtered_df['guest_satisfaction_overall'] >= min_rating]
-
-if superhost_filter == "Superhost Only":
-    filtered_df = filtered_df[filtered_df['host_is_superhost'] == 1]
-elif superhost_filter == "Regular Only":
-    filtered_df = filtered_df[filtered_df['host_is_superhost'] == 0]
-
-if day_filter == "Weekend Only":
-    filtered_df = filtered_df[filtered_df['is_weekend'] == 1]
-elif day_filter == "Weekday Only":
-    filtered_df = filtered_df[filtered_df['is_weekend'] == 0]
-
-# Use filtered_df for all displays
+# Apply Filters (one row-id selection from the precomputed index; the filtered
+# frame and its aggregates are cached per normalized filter state)
+filter_state = filter_key(
+    selected_cities,
+    selected_room_types,
+    price_range,
+    capacity_range,
+    min_rating,
+    superhost_filter,
+    day_filter,
+)
+filter_index = load_filter_index(df)
+
+# KPIs and charts roll up cube cells; a minimum rating filter is not a cube
+# dimension, so that case falls back to aggregating the filtered rows
+aggregates = load_market_cube(df).rollup(filter_state)
+if aggregates is None:
+    filtered_view = filter_index.view(df, filter_state)
+    aggregates = filtered_view["aggregates"]
+    filtered_df = filtered_view["frame"]
+else:
+    filtered_df = filter_index.frame(df, filter_state)
+
+# Use the filtered frame for all displays
+clean_df = df
 df = filtered_df
 
 # ==================== 6. HEADER & KPIs ====================
 st.markdown(f"""
 <div class="header-container">
     <h1>Airbnb Analytics Dashboard</h1>
-    <p style="font-size: 16px; margin-top: 10px; opacity: 0.9;">Showing {len(df):,} of {len(load_data()):,} listings (outliers removed using IQR method)</p>
+    <p style="font-size: 16px; margin-top: 10px; opacity: 0.9;">Showing {aggregates["listings"]:,} of {len(load_data()):,} listings (outliers removed using {OUTLIER_METHODS[OUTLIER_METHOD]})</p>
 </div>
 """, unsafe_allow_html=True)
 
 c1, c2, c3 = st.columns(3)
 with c1:
-    st.markdown(f'<div class="kpi-card"><div class="kpi-value">{len(df):,}</div><div class="kpi-label">Listings</div></div>', unsafe_allow_html=True)
+    st.markdown(f'<div class="kpi-card"><div class="kpi-value">{aggregates["listings"]:,}</div><div class="kpi-label">Listings</div></div>', unsafe_allow_html=True)
 with c2:
-    st.markdown(f'<div class="kpi-card"><div class="kpi-value">${df["realSum"].mean():.0f}</div><div class="kpi-label">Avg Price</div></div>', unsafe_allow_html=True)
+    st.markdown(f'<div class="kpi-card"><div class="kpi-value">${aggregates["avg_price"]:.0f}</div><div class="kpi-label">Avg Price</div></div>', unsafe_allow_html=True)
 with c3:
-    st.markdown(f'<div class="kpi-card"><div class="kpi-value">{df["guest_satisfaction_overall"].mean():.1f}</div><div class="kpi-label">Rating</div></div>', unsafe_allow_html=True)
+    st.markdown(f'<div class="kpi-card"><div class="kpi-value">{aggregates["avg_rating"]:.1f}</div><div class="kpi-label">Rating</div></div>', unsafe_allow_html=True)
 
 # ==================== 7. MAP SECTION ====================
-st.markdown("---")
-st.markdown("### Geographic Intelligence")
-
-with st.container():
-    map_df = df.sample(1500, random_state=42)
-
-    fig_map = px.scatter_mapbox(
-        map_df,
-        lat="latitude",
-        lon="longitude",
-        color="realSum",
-        color_continuous_scale=["#FF69B4", "#FF1493", "#C71585"],
-        size_max=25,
-        zoom=4,
-        height=600,
-        hover_name="city",
-    )
-
-    fig_map.update_layout(
-        mapbox_style="carto-positron",
-        margin=dict(l=0, r=0, t=0, b=0),
-        paper_bgcolor="rgba(0,0,0,0)",
-        coloraxis_showscale=False
-    )
-    fig_map.update_traces(marker=dict(size=20, opacity=1.0))
-
-    st.plotly_chart(fig_map, use_container_width=True, on_select="rerun")
-
-    # Prediction
-    selected = st.session_state.get("plotly_selected")
-    if selected and len(selected["points"]) > 0:
-        idx = selected["points"][0]["pointIndex"]
-        row = map_df.iloc[idx]
-        
-        model = load_model()
-        if model:
-            with st.spinner("Analyzing..."):
-                time.sleep(0.3)
-                test_row = df.drop(columns=["realSum"]).iloc[0:1].copy()
-                test_row["city"] = row["city"]
-                test_row["room_type"] = row["room_type"]
-                test_row["person_capacity"] = 2
-                test_row["cleanliness_rating"] = 9
-                test_row["dist"] = row["dist"]
-                test_row["is_weekend"] = 0
-                pred_price = np.expm1(model.predict(test_row)[0])
-
-            st.markdown(f"""
-            <div class="prediction-result" style="margin: 20px auto; max-width: 600px;">
-                <h3>{row['city'].capitalize()} • {row['room_type']}</h3>
-                <h1 style="font-size: 50px; margin: 10px 0;">${pred_price:.0f}</h1>
-                <p>Predicted Nightly Rate</p>
-            </div>
-            """, unsafe_allow_html=True)
-
-st.markdown("---")
-
-st.markdown("### Market Breakdown")
-
-col1, col2, col3 = st.columns(3)
-
-with col1:
-    st.markdown("#### Satisfaction Score")
-    avg_satisfaction = df['guest_satisfaction_overall'].mean()
-    fig_gauge = go.Figure(go.Indicator(
-        mode = "gauge+number",
-        value = avg_satisfaction,
-        domain = {'x': [0, 1], 'y': [0, 1]},
-        number = {'font': {'size': 35, 'color': AIRBNB_COLOR}},
-        gauge = {
-            'axis': {'range': [None, 100], 'tickwidth': 1, 'tickcolor': '#000000', 'tickfont': {'color': '#000000'}},
-            'bar': {'color': AIRBNB_COLOR},
-            'bgcolor': "rgba(0,0,0,0)",
-            'borderwidth': 1,
-            'bordercolor': border_color,
-            'steps': [
-                {'range': [0, 50], 'color': "#FFCDD2"},
-                {'range': [50, 80], 'color': "#EF9A9A"},
-                {'range': [80, 100], 'color': "rgba(255, 56, 92, 0.2)"}
-            ],
-        }
-    ))
-    fig_gauge.update_layout(
-        template=plotly_template, 
-        height=300, 
-        margin=dict(l=10,r=10,t=30,b=10), 
-        paper_bgcolor=chart_bg, 
-        plot_bgcolor=chart_bg,
-        font=dict(color='#000000')
-    )
-    st.plotly_chart(fig_gauge, use_container_width=True)
-
-with col2:
-    st.markdown("#### Room Types")
-    room_counts = df['room_type'].value_counts().reset_index()
-    room_counts.columns = ['room_type', 'count']
-    fig_pie = px.pie(room_counts, values='count', names='room_type', hole=0.45, color_discrete_sequence=[AIRBNB_COLOR, "#FF8A80", "#FFCDD2"])
-    fig_pie.update_traces(textinfo='percent', textfont=dict(size=14, color='white'), marker=dict(line=dict(color=card_bg, width=3)))
-    fig_pie.update_layout(
-        template=plotly_template, 
-        height=300, 
-        margin=dict(l=10,r=10,t=30,b=10), 
-        paper_bgcolor=chart_bg,
-        plot_bgcolor=chart_bg,
-        font=dict(color='#000000'), 
-        legend=dict(orientation="h", y=-0.2, x=0.5, xanchor="center", font=dict(color='#000000'))
-    )
-    st.plotly_chart(fig_pie, use_container_width=True)
-
-with col3:
-    st.markdown("#### Price Range")
-    fig_box = px.box(df, x="room_type", y="realSum", color="room_type", color_discrete_sequence=[AIRBNB_COLOR, "#FF5A5F", "#FF8A80"])
-    fig_box.update_layout(
-        template=plotly_template, 
-        height=300, 
-        margin=dict(l=10,r=10,t=30,b=10), 
-        paper_bgcolor=chart_bg,
-        plot_bgcolor=chart_bg,
-        font=dict(color='#000000'), 
-        showlegend=False, 
-        yaxis=dict(title="Price ($)", range=[0, 500], gridcolor=chart_grid_color, title_font=dict(color='#000000'), tickfont=dict(color='#000000')), 
-        xaxis=dict(title=None, showticklabels=True, tickfont=dict(color='#000000'))
-    )
-    st.plotly_chart(fig_box, use_container_width=True)
-
-col4, col5, col6 = st.columns(3)
-
-with col4:
-    st.markdown("#### Weekend vs Weekday")
-    weekend_data = df.groupby('is_weekend')['realSum'].mean().reset_index()
-    weekend_data['Day Type'] = weekend_data['is_weekend'].map({0: 'Weekday', 1: 'Weekend'})
-    fig_bar_week = px.bar(weekend_data, x='Day Type', y='realSum', color='Day Type', color_discrete_map={'Weekday': "#FF8A80", 'Weekend': AIRBNB_COLOR})
-    fig_bar_week.update_traces(text=None)
-    fig_bar_week.update_layout(
-        template=plotly_template, 
-        height=300, 
-        margin=dict(l=10,r=10,t=30,b=10), 
-        paper_bgcolor=chart_bg,
-        plot_bgcolor=chart_bg,
-        font=dict(color='#000000'), 
-        showlegend=False, 
-        yaxis=dict(title="Avg Price ($)", showgrid=True, gridcolor=chart_grid_color, title_font=dict(color='#000000'), tickfont=dict(color='#000000')), 
-        xaxis=dict(title=None, tickfont=dict(color='#000000'))
-    )
-    st.plotly_chart(fig_bar_week, use_container_width=True)
-
-with col5:
-    st.markdown("#### Superhost Status")
-    sh_counts = df['host_is_superhost'].value_counts().reset_index()
-    sh_counts.columns = ['Status', 'Count']
-    sh_counts['Label'] = sh_counts['Status'].map({0: 'Regular', 1: 'Superhost'})
-    fig_sh = px.pie(sh_counts, values='Count', names='Label', hole=0.6, color='Label', color_discrete_map={'Superhost': AIRBNB_COLOR, 'Regular': "#FFCDD2"})
-    fig_sh.update_traces(textinfo='percent', textfont=dict(size=14, color='white'), marker=dict(line=dict(color=card_bg, width=3)))
-    fig_sh.update_layout(
-        template=plotly_template, 
-        height=300, 
-        margin=dict(l=10,r=10,t=30,b=10), 
-        paper_bgcolor=chart_bg,
-        plot_bgcolor=chart_bg,
-        font=dict(color='#000000'), 
-        legend=dict(orientation="h", y=-0.1, x=0.5, xanchor="center", font=dict(color='#000000'))
-    )
-    st.plotly_chart(fig_sh, use_container_width=True)
-
-with col6:
-    st.markdown("#### Price by Capacity")
-    cap_data = df.groupby('person_capacity')['realSum'].mean().reset_index()
-    fig_cap = px.bar(cap_data, x='person_capacity', y='realSum')
-    fig_cap.update_traces(marker_color=AIRBNB_COLOR)
-    fig_cap.update_traces(text=None)
-    fig_cap.update_layout(
-        template=plotly_template, 
-        height=300, 
-        margin=dict(l=10,r=10,t=30,b=10), 
-        paper_bgcolor=chart_bg,
-        plot_bgcolor=chart_bg,
-        font=dict(color='#000000'), 
-        yaxis=dict(title="Avg Price ($)", showgrid=True, gridcolor=chart_grid_color, title_font=dict(color='#000000'), tickfont=dict(color='#000000')), 
-        xaxis=dict(title="Guests", title_font=dict(color='#000000'), tickfont=dict(color='#000000'))
-    )
-    st.plotly_chart(fig_cap, use_container_width=True)
-
-st.markdown("---")
-
-st.markdown("### AI Smart Predictor")
-st.markdown("Customize your listing details below to get an instant price estimation.")
+# Map, Market Breakdown and the predictor are fragments: their own widgets rerun
+# only their section, while sidebar filter changes still rerun the whole page.
+@st.fragment
+def render_map(df, clean_df, filter_index, filter_state):
+    """Map section; map focus changes and point clicks rerun only this fragment"""
+    with st.container():
+        # Focusing a city zooms in far enough to show individual listings instead of tile clusters
+        map_focus = st.selectbox("Map focus", ["All cities"] + sorted(df['city'].unique()), label_visibility="collapsed")
+        map_rows = filter_index.select(filter_state)
+        if map_focus != "All cities":
+            map_rows = map_rows[filter_index.bitmaps["city"][map_focus][map_rows]]
+        spatial_index = load_spatial_index(clean_df)
+        predictor = load_predictor()
+
+        def make_map(max_markers):
+            view = spatial_index.view(map_rows, max_markers, cache_key=(filter_state, map_focus))
+            if view["mode"] == "clusters":
+                marker_size = np.clip(6 + 4 * np.log2(view["frame"]["count"].to_numpy()), 6, 30)
+            else:
+                marker_size = np.full(len(view["frame"]), 12)
+            zoom = 4 if map_focus == "All cities" else 11
+            # Every marker predicted in one batched model call, shown on hover and on click
+            predicted = predictor.predict_listings(view["frame"], MAP_PREDICTION_INPUTS) if predictor else None
+            return dict(view, predicted=predicted,
+                        figure=build_map_figure(view["frame"], marker_size, zoom, predicted=predicted))
+
+        map_result = fit_to_budget(make_map, MAP_MAX_MARKERS, MAP_PAYLOAD_BUDGET_KB * 1024)
+        map_df = map_result["frame"]
+        fig_map = map_result["figure"]
+
+        if map_result["mode"] == "clusters":
+            st.caption(f"{int(map_df['count'].sum()):,} listings grouped into {len(map_df):,} map tiles (hover for counts and mean price)")
+
+        map_event = st.plotly_chart(fig_map, use_container_width=True, on_select="rerun", key="map_chart")
+
+        # Prediction (a click reruns only this fragment)
+        selected_points = map_event.selection.get("points", []) if map_event else []
+        if selected_points:
+            point = selected_points[0]
+            idx = point.get("point_index", point.get("pointIndex", 0))
+            row = map_df.iloc[idx]
+
+            if map_result["predicted"] is not None:
+                pred_price = map_result["predicted"][idx]
+
+                st.markdown(f"""
+                <div class="prediction-result" style="margin: 20px auto; max-width: 600px;">
+                    <h3>{row['city'].capitalize()} • {row['room_type']}</h3>
+                    <h1 style="font-size: 50px; margin: 10px 0;">${pred_price:.0f}</h1>
+                    <p>Predicted Nightly Rate</p>
+                </div>
+                """, unsafe_allow_html=True)
+
+@st.fragment
+def render_market_breakdown(aggregates):
+    """Chart grid; the second row renders only when expanded, without a full rerun"""
+    col1, col2, col3 = st.columns(3)
+
+    with col1:
+        st.markdown("#### Satisfaction Score")
+        avg_satisfaction = aggregates["avg_rating"]
+        fig_gauge = go.Figure(go.Indicator(
+            mode = "gauge+number",
+            value = avg_satisfaction,
+            domain = {'x': [0, 1], 'y': [0, 1]},
+            number = {'font': {'size': 35, 'color': AIRBNB_COLOR}},
+            gauge = {
+                'axis': {'range': [None, 100], 'tickwidth': 1, 'tickcolor': '#000000', 'tickfont': {'color': '#000000'}},
+                'bar': {'color': AIRBNB_COLOR},
+                'bgcolor': "rgba(0,0,0,0)",
+                'borderwidth': 1,
+                'bordercolor': border_color,
+                'steps': [
+                    {'range': [0, 50], 'color': "#FFCDD2"},
+                    {'range': [50, 80], 'color': "#EF9A9A"},
+                    {'range': [80, 100], 'color': "rgba(255, 56, 92, 0.2)"}
+                ],
+            }
+        ))
+        fig_gauge.update_layout(
+            template=plotly_template, 
+            height=300, 
+            margin=dict(l=10,r=10,t=30,b=10), 
+            paper_bgcolor=chart_bg, 
+            plot_bgcolor=chart_bg,
+            font=dict(color='#000000')
+        )
+        st.plotly_chart(fig_gauge, use_container_width=True)
+
+    with col2:
+        st.markdown("#### Room Types")
+        room_counts = aggregates["room_counts"].reset_index()
+        room_counts.columns = ['room_type', 'count']
+        fig_pie = px.pie(room_counts, values='count', names='room_type', hole=0.45, color_discrete_sequence=[AIRBNB_COLOR, "#FF8A80", "#FFCDD2"])
+        fig_pie.update_traces(textinfo='percent', textfont=dict(size=14, color='white'), marker=dict(line=dict(color=card_bg, width=3)))
+        fig_pie.update_layout(
+            template=plotly_template, 
+            height=300, 
+            margin=dict(l=10,r=10,t=30,b=10), 
+            paper_bgcolor=chart_bg,
+            plot_bgcolor=chart_bg,
+            font=dict(color='#000000'), 
+            legend=dict(orientation="h", y=-0.2, x=0.5, xanchor="center", font=dict(color='#000000'))
+        )
+        st.plotly_chart(fig_pie, use_container_width=True)
+
+    with col3:
+        st.markdown("#### Price Range")
+        # Quartiles come precomputed (sketch-based from the cube), not as raw points
+        box_colors = [AIRBNB_COLOR, "#FF5A5F", "#FF8A80"]
+        fig_box = go.Figure()
+        for i, (room_type, stats) in enumerate(aggregates["price_box"].iterrows()):
+            fig_box.add_trace(go.Box(
+                name=room_type,
+                x=[room_type],
+                q1=[stats["q1"]],
+                median=[stats["median"]],
+                q3=[stats["q3"]],
+                lowerfence=[stats["lowerfence"]],
+                upperfence=[stats["upperfence"]],
+                marker_color=box_colors[i % len(box_colors)],
+            ))
+        fig_box.update_layout(
+            template=plotly_template, 
+            height=300, 
+            margin=dict(l=10,r=10,t=30,b=10), 
+            paper_bgcolor=chart_bg,
+            plot_bgcolor=chart_bg,
+            font=dict(color='#000000'), 
+            showlegend=False, 
+            yaxis=dict(title="Price ($)", range=[0, 500], gridcolor=chart_grid_color, title_font=dict(color='#000000'), tickfont=dict(color='#000000')), 
+            xaxis=dict(title=None, showticklabels=True, tickfont=dict(color='#000000'))
+        )
+        st.plotly_chart(fig_box, use_container_width=True)
+
+    # Below-the-fold charts are built only on demand
+    if not st.toggle("Show weekend, superhost and capacity charts", value=False):
+        return
 
-with st.container():
-    with st.form("ai_price_form"):
-        c_in1, c_in2, c_in3 = st.columns(3)
-        with c_in1:
-            input_city = st.selectbox("Choose City", df['city'].unique())
-            input_room = st.selectbox("Room Type", df['room_type'].unique())
-        with c_in2:
-            input_capacity = st.number_input("Guests Capacity", min_value=1, max_value=6, value=2)
-            input_cleanliness = st.slider("Cleanliness Rating (1-10)", 1, 10, 9)
-        with c_in3:
-            input_dist = st.slider("Distance from Center (km)", 0.0, 10.0, 2.0)
-            st.write("")
-            st.write("**Weekend Day**")
-            input_weekend = st.checkbox("Check if weekend", value=False, label_visibility="collapsed")
+    col4, col5, col6 = st.columns(3)
+
+    with col4:
+        st.markdown("#### Weekend vs Weekday")
+        weekend_data = aggregates["weekend_price"].reset_index()
+        weekend_data['Day Type'] = weekend_data['is_weekend'].map({0: 'Weekday', 1: 'Weekend'})
+        fig_bar_week = px.bar(weekend_data, x='Day Type', y='realSum', color='Day Type', color_discrete_map={'Weekday': "#FF8A80", 'Weekend': AIRBNB_COLOR})
+        fig_bar_week.update_traces(text=None)
+        fig_bar_week.update_layout(
+            template=plotly_template, 
+            height=300, 
+            margin=dict(l=10,r=10,t=30,b=10), 
+            paper_bgcolor=chart_bg,
+            plot_bgcolor=chart_bg,
+            font=dict(color='#000000'), 
+            showlegend=False, 
+            yaxis=dict(title="Avg Price ($)", showgrid=True, gridcolor=chart_grid_color, title_font=dict(color='#000000'), tickfont=dict(color='#000000')), 
+            xaxis=dict(title=None, tickfont=dict(color='#000000'))
+        )
+        st.plotly_chart(fig_bar_week, use_container_width=True)
+
+    with col5:
+        st.markdown("#### Superhost Status")
+        sh_counts = aggregates["superhost_counts"].reset_index()
+        sh_counts.columns = ['Status', 'Count']
+        sh_counts['Label'] = sh_counts['Status'].map({0: 'Regular', 1: 'Superhost'})
+        fig_sh = px.pie(sh_counts, values='Count', names='Label', hole=0.6, color='Label', color_discrete_map={'Superhost': AIRBNB_COLOR, 'Regular': "#FFCDD2"})
+        fig_sh.update_traces(textinfo='percent', textfont=dict(size=14, color='white'), marker=dict(line=dict(color=card_bg, width=3)))
+        fig_sh.update_layout(
+            template=plotly_template, 
+            height=300, 
+            margin=dict(l=10,r=10,t=30,b=10), 
+            paper_bgcolor=chart_bg,
+            plot_bgcolor=chart_bg,
+            font=dict(color='#000000'), 
+            legend=dict(orientation="h", y=-0.1, x=0.5, xanchor="center", font=dict(color='#000000'))
+        )
+        st.plotly_chart(fig_sh, use_container_width=True)
+
+    with col6:
+        st.markdown("#### Price by Capacity")
+        cap_data = aggregates["capacity_price"].reset_index()
+        fig_cap = px.bar(cap_data, x='person_capacity', y='realSum')
+        fig_cap.update_traces(marker_color=AIRBNB_COLOR)
+        fig_cap.update_traces(text=None)
+        fig_cap.update_layout(
+            template=plotly_template, 
+            height=300, 
+            margin=dict(l=10,r=10,t=30,b=10), 
+            paper_bgcolor=chart_bg,
+            plot_bgcolor=chart_bg,
+            font=dict(color='#000000'), 
+            yaxis=dict(title="Avg Price ($)", showgrid=True, gridcolor=chart_grid_color, title_font=dict(color='#000000'), tickfont=dict(color='#000000')), 
+            xaxis=dict(title="Guests", title_font=dict(color='#000000'), tickfont=dict(color='#000000'))
+        )
+        st.plotly_chart(fig_cap, use_container_width=True)
+
+@st.fragment
+def render_predictor(df):
+    """Predictor inputs and results; submitting reruns only this fragment, not the map or charts"""
+    price_surface = load_price_surface()
+    # With the precomputed surface the inputs react live; without it they stay in a submit form
+    live_mode = price_surface is not None
+
+    with st.container():
+        with (st.container() if live_mode else st.form("ai_price_form")):
+            c_in1, c_in2, c_in3 = st.columns(3)
+            with c_in1:
+                input_city = st.selectbox("Choose City", df['city'].unique())
+                input_room = st.selectbox("Room Type", df['room_type'].unique())
+            with c_in2:
+                input_capacity = st.number_input("Guests Capacity", min_value=1, max_value=6, value=2)
+                input_cleanliness = st.slider("Cleanliness Rating (1-10)", 1, 10, 9)
+            with c_in3:
+                input_dist = st.slider("Distance from Center (km)", 0.0, 10.0, 2.0, step=DISTANCE_STEP)
+                st.write("")
+                st.write("**Weekend Day**")
+                input_weekend = st.checkbox("Check if weekend", value=False, label_visibility="collapsed")
             
-        submit_btn = st.form_submit_button("Calculate Predicted Price", use_container_width=True)
-
-    if submit_btn:
-        model = load_model()
-        if model:
-            with st.spinner("Processing with AI..."):
-                time.sleep(0.5)
-                base_row = df[df['city'] == input_city].iloc[0].copy()
-                base_row["room_type"] = input_room
-                base_row["person_capacity"] = input_capacity
-                base_row["cleanliness_rating"] = input_cleanliness
-                base_row["dist"] = input_dist
-                base_row["is_weekend"] = 1 if input_weekend else 0
-                
-                if "realSum" in base_row:
-                    input_df = pd.DataFrame([base_row]).drop(columns=["realSum"])
-                else:
-                    input_df = pd.DataFrame([base_row])
-                
+            submit_btn = live_mode or st.form_submit_button("Calculate Predicted Price", use_container_width=True)
+
+        if submit_btn:
+            predicted_price = None
+            if live_mode:
+                predicted_price = price_surface.lookup(input_city, input_room, input_capacity, input_cleanliness, input_dist, input_weekend)
+            predictor = load_cached_predictor()
+            if predicted_price is not None or predictor:
                 try:
-                    predicted_log = model.predict(input_df)[0]
-                    predicted_price = np.expm1(predicted_log)
+                    if predicted_price is None:
+                        predicted_price = predictor.predict(
+                            city=input_city,
+                            room_type=input_room,
+                            person_capacity=input_capacity,
+                            cleanliness_rating=input_cleanliness,
+                            dist=input_dist,
+                            is_weekend=1 if input_weekend else 0,
+                        )
                     st.markdown(f"""
                     <div class="prediction-result" style="margin: 20px auto; max-width: 600px;">
                         <p style="font-size:18px; opacity:0.9;">Estimated Price for <b>{input_city.capitalize()}</b></p>
@@ -583,5 +643,57 @@ with st.container():
                     """, unsafe_allow_html=True)
                 except Exception as e:
                     st.error(f"Prediction Error: {e}")
-        else:
-            st.error("Model not loaded. Please check file path.")
\ No newline at end of file
+            else:
+                st.error("Model not loaded. Please check file path.")
+
+            curve = price_surface.distance_curve(input_city, input_room, input_capacity, input_cleanliness, input_weekend) if live_mode else None
+            if curve is not None:
+                st.markdown("#### Price vs Distance from Center")
+                fig_curve = go.Figure(go.Scatter(x=price_surface.distances, y=curve, mode="lines", line=dict(color=AIRBNB_COLOR, width=3)))
+                fig_curve.add_vline(x=input_dist, line_dash="dash", line_color="#BD1E59")
+                fig_curve.update_layout(
+                    template=plotly_template, 
+                    height=300, 
+                    margin=dict(l=10,r=10,t=30,b=10), 
+                    paper_bgcolor=chart_bg,
+                    plot_bgcolor=chart_bg,
+                    font=dict(color='#000000'), 
+                    showlegend=False, 
+                    yaxis=dict(title="Predicted Price ($)", showgrid=True, gridcolor=chart_grid_color, title_font=dict(color='#000000'), tickfont=dict(color='#000000')), 
+                    xaxis=dict(title="Distance (km)", title_font=dict(color='#000000'), tickfont=dict(color='#000000'))
+                )
+                st.plotly_chart(fig_curve, use_container_width=True)
+
+        with st.expander("Batch prediction from CSV"):
+            st.markdown("Upload a CSV with columns `city`, `room_type`, `person_capacity`, `cleanliness_rating`, `dist`, `is_weekend`.")
+            uploaded_csv = st.file_uploader("Listings CSV", type="csv", label_visibility="collapsed")
+            if uploaded_csv is not None:
+                predictor = load_predictor()
+                if predictor:
+                    try:
+                        batch_df = predictor.predict_csv(uploaded_csv)
+                        st.dataframe(batch_df, use_container_width=True)
+                        st.download_button(
+                            "Download predictions",
+                            batch_df.to_csv(index=False).encode("utf-8"),
+                            file_name="predicted_prices.csv",
+                            mime="text/csv",
+                            use_container_width=True,
+                        )
+                    except Exception as e:
+                        st.error(f"Prediction Error: {e}")
+                else:
+                    st.error("Model not loaded. Please check file path.")
+
+st.markdown("---")
+st.markdown("### Geographic Intelligence")
+render_map(df, clean_df, filter_index, filter_state)
+
+st.markdown("---")
+st.markdown("### Market Breakdown")
+render_market_breakdown(aggregates)
+
+st.markdown("---")
+st.markdown("### AI Smart Predictor")
+st.markdown("Customize your listing details below to get an instant price estimation.")
+render_predictor(df)
@@ -0,0 +1,191 @@
+"""Columnar data store for the Streamlit dashboard.
+
+The clean CSV is converted once into a typed, dictionary-encoded Parquet file.
+The dashboard then reads only the columns it needs from that file instead of
+parsing the full 36 MB CSV on every cold start.
+
+Build the store manually with:
+
+    python app/data_store.py
+"""
+import argparse
+import os
+import time
+from typing import List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "data")
+CSV_PATH = os.path.join(DATA_DIR, "airbnb_listings_clean.csv")
+PARQUET_PATH = os.path.join(DATA_DIR, "airbnb_listings_clean.parquet")
+
+# Low-cardinality text columns, stored dictionary-encoded and loaded as categoricals
+CATEGORICAL_COLUMNS = ["city", "room_type", "country", "day_type"]
+
+# 0/1 flags (mixed True/False/'t'/'f'/1.0 in the CSV), stored as int8
+FLAG_COLUMNS = [
+    "room_shared", "room_private", "host_is_superhost", "multi", "biz", "is_weekend",
+    "wifi", "kitchen", "air_conditioning", "parking", "tv", "heating",
+]
+
+# Small counts, stored as the narrowest integer type that fits
+COUNT_COLUMNS = ["person_capacity", "bedrooms", "beds"]
+
+# Columns read by app.py (filters, KPIs, map, charts and the model features)
+DASHBOARD_COLUMNS = [
+    "city", "room_type", "realSum", "person_capacity", "guest_satisfaction_overall",
+    "host_is_superhost", "is_weekend", "latitude", "longitude", "dist", "cleanliness_rating",
+]
+
+# Outlier trimming methods for realSum, see remove_outliers()
+OUTLIER_METHODS = {
+    "iqr": "IQR method",
+    "city_iqr": "per-city IQR method",
+    "percentile": "percentile caps",
+    "none": "no outlier removal",
+}
+
+_FLAG_MAPPING = {"t": 1, "f": 0, "true": 1, "false": 0, "1": 1, "0": 0, "1.0": 1, "0.0": 0}
+
+
+def _to_flag(series: pd.Series) -> pd.Series:
+    """Normalize a mixed-type boolean column to int8 0/1"""
+    # pandas 3 reads text columns as StringDtype, not object
+    if pd.api.types.is_object_dtype(series) or pd.api.types.is_string_dtype(series):
+        series = series.astype(str).str.strip().str.lower().map(_FLAG_MAPPING)
+    return pd.to_numeric(series, errors="coerce").fillna(0).astype(np.int8)
+
+
+def _to_count(series: pd.Series) -> pd.Series:
+    """Downcast a count column, keeping NaN-holding columns as float32"""
+    series = pd.to_numeric(series, errors="coerce")
+    if series.isna().any():
+        return series.astype(np.float32)
+    return pd.to_numeric(series, downcast="integer")
+
+
+def optimize_dtypes(df: pd.DataFrame) -> pd.DataFrame:
+    """Cast the raw CSV frame to compact, typed columns"""
+    df = df.copy()
+    for col in df.columns:
+        if col in CATEGORICAL_COLUMNS:
+            df[col] = df[col].astype("category")
+        elif col in FLAG_COLUMNS:
+            df[col] = _to_flag(df[col])
+        elif col in COUNT_COLUMNS:
+            df[col] = _to_count(df[col])
+        elif df[col].dtype == object:
+            # Mixed-type leftovers (e.g. the column 30 warning) stay as plain strings
+            df[col] = df[col].astype("string")
+        elif col in ("latitude", "longitude"):
+            df[col] = df[col].astype(np.float64)
+        elif pd.api.types.is_float_dtype(df[col]):
+            df[col] = df[col].astype(np.float32)
+    return df
+
+
+def build_store(csv_path: str = CSV_PATH, parquet_path: str = PARQUET_PATH) -> str:
+    """Convert the clean CSV into the columnar Parquet store"""
+    df = pd.read_csv(csv_path, low_memory=False)
+    df = optimize_dtypes(df)
+    df.to_parquet(
+        parquet_path,
+        engine="pyarrow",
+        compression="zstd",
+        index=False,
+        use_dictionary=True,
+    )
+    return parquet_path
+
+
+def store_is_fresh(csv_path: str = CSV_PATH, parquet_path: str = PARQUET_PATH) -> bool:
+    """True when the Parquet store exists and is newer than the CSV"""
+    if not os.path.exists(parquet_path):
+        return False
+    if not os.path.exists(csv_path):
+        return True
+    return os.path.getmtime(parquet_path) >= os.path.getmtime(csv_path)
+
+
+def load_columns(columns: Optional[List[str]] = None, parquet_path: str = PARQUET_PATH) -> pd.DataFrame:
+    """Read a column subset from the memory-mapped Parquet store"""
+    return pd.read_parquet(parquet_path, engine="pyarrow", columns=columns, memory_map=True)
+
+
+def load_dashboard_frame(columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """Load the dashboard columns, building the store on first use.
+
+    Falls back to a typed CSV read when the store cannot be built
+    (pyarrow missing or the data directory is read-only).
+    """
+    columns = columns or DASHBOARD_COLUMNS
+    if not store_is_fresh():
+        try:
+            build_store()
+        except (ImportError, OSError):
+            df = pd.read_csv(CSV_PATH, usecols=columns, low_memory=False)
+            return optimize_dtypes(df)
+    return load_columns(columns)
+
+
+def _iqr_bounds(prices: pd.Series, k: float):
+    q1 = prices.quantile(0.25)
+    q3 = prices.quantile(0.75)
+    iqr = q3 - q1
+    return q1 - k * iqr, q3 + k * iqr
+
+
+def remove_outliers(
+    df: pd.DataFrame,
+    method: str = "iqr",
+    column: str = "realSum",
+    iqr_k: float = 1.5,
+    percentiles: Tuple[float, float] = (0.01, 0.99),
+) -> pd.DataFrame:
+    """Drop price outliers.
+
+    Methods:
+        iqr: one global [Q1 - k*IQR, Q3 + k*IQR] window (the original dashboard rule)
+        city_iqr: the same window computed separately for each city
+        percentile: keep rows between the given lower/upper quantiles
+        none: keep everything
+    """
+    if method not in OUTLIER_METHODS:
+        raise ValueError(f"Unknown outlier method '{method}', expected one of {sorted(OUTLIER_METHODS)}")
+
+    prices = df[column]
+    if method == "none":
+        return df
+    if method == "iqr":
+        lower, upper = _iqr_bounds(prices, iqr_k)
+    elif method == "city_iqr":
+        grouped = prices.groupby(df["city"], observed=True)
+        q1 = grouped.transform(lambda s: s.quantile(0.25))
+        q3 = grouped.transform(lambda s: s.quantile(0.75))
+        iqr = q3 - q1
+        lower, upper = q1 - iqr_k * iqr, q3 + iqr_k * iqr
+    else:
+        lower, upper = prices.quantile(percentiles[0]), prices.quantile(percentiles[1])
+
+    keep = (prices >= lower) & (prices <= upper)
+    return df[keep.to_numpy()].reset_index(drop=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the columnar data store for the dashboard")
+    parser.add_argument("--csv", default=CSV_PATH, help="Source CSV path")
+    parser.add_argument("--out", default=PARQUET_PATH, help="Output Parquet path")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    path = build_store(args.csv, args.out)
+    elapsed = time.perf_counter() - start
+
+    csv_mb = os.path.getsize(args.csv) / 1e6
+    parquet_mb = os.path.getsize(path) / 1e6
+    print(f"[+] Built {path} in {elapsed:.1f}s ({csv_mb:.1f} MB CSV -> {parquet_mb:.1f} MB Parquet)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+"""Precomputed filter index for the sidebar filters.
+
+The index is built once per dataset. Categorical and 0/1 columns keep one
+boolean bitmap per value. Range columns keep their values sorted, along with
+the matching row positions. A filter combination resolves to a single array
+of row ids, which is cached by the normalized filter tuple, so a sidebar
+change no longer copies the frame once per filter.
+"""
+from typing import Dict, Iterable, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from lru_cache import LRUCache
+
+CATEGORICAL_FILTERS = ("city", "room_type")
+FLAG_FILTERS = ("host_is_superhost", "is_weekend")
+RANGE_FILTERS = ("realSum", "person_capacity", "guest_satisfaction_overall")
+
+SUPERHOST_OPTIONS = {"All": None, "Superhost Only": 1, "Regular Only": 0}
+DAY_OPTIONS = {"All": None, "Weekend Only": 1, "Weekday Only": 0}
+
+
+BOX_COLUMNS = ["lowerfence", "q1", "median", "q3", "upperfence"]
+
+
+def price_box(frame: pd.DataFrame) -> pd.DataFrame:
+    """Exact per-room-type box statistics (Tukey fences clipped to the data)"""
+    if frame.empty:
+        return pd.DataFrame(columns=BOX_COLUMNS, index=pd.Index([], name="room_type"), dtype=np.float64)
+    grouped = frame.groupby("room_type", observed=True)["realSum"]
+    stats = grouped.quantile([0.25, 0.5, 0.75]).unstack()
+    stats.columns = ["q1", "median", "q3"]
+    iqr = stats["q3"] - stats["q1"]
+    stats["lowerfence"] = np.maximum(grouped.min(), stats["q1"] - 1.5 * iqr)
+    stats["upperfence"] = np.minimum(grouped.max(), stats["q3"] + 1.5 * iqr)
+    return stats[BOX_COLUMNS]
+
+
+def summarize(frame: pd.DataFrame) -> Dict:
+    """Aggregates derived from a filtered frame (KPI cards and Market Breakdown charts)"""
+    room_counts = frame["room_type"].value_counts()
+    empty = frame.empty  # no listings match: zeroed KPIs instead of NaN
+    return {
+        "listings": len(frame),
+        "avg_price": 0.0 if empty else frame["realSum"].mean(),
+        "avg_rating": 0.0 if empty else frame["guest_satisfaction_overall"].mean(),
+        "room_counts": room_counts[room_counts > 0],  # categorical dtype keeps filtered-out types
+        "weekend_price": frame.groupby("is_weekend")["realSum"].mean(),
+        "superhost_counts": frame["host_is_superhost"].value_counts(),
+        "capacity_price": frame.groupby("person_capacity")["realSum"].mean(),
+        "price_box": price_box(frame),
+    }
+
+
+def filter_key(
+    cities: Iterable[str],
+    room_types: Iterable[str],
+    price_range: Tuple[float, float],
+    capacity_range: Tuple[float, float],
+    min_rating: float,
+    superhost_filter: str = "All",
+    day_filter: str = "All",
+) -> Tuple:
+    """Normalize the sidebar state into a hashable cache key"""
+    return (
+        tuple(sorted(cities)),
+        tuple(sorted(room_types)),
+        (float(price_range[0]), float(price_range[1])),
+        (float(capacity_range[0]), float(capacity_range[1])),
+        float(min_rating),
+        SUPERHOST_OPTIONS[superhost_filter],
+        DAY_OPTIONS[day_filter],
+    )
+
+
+class FilterIndex:
+    """Per-column bitmaps and sorted arrays answering filter combinations as row ids"""
+
+    def __init__(self, df: pd.DataFrame, cache_size: int = 64, view_cache_size: int = 16):
+        self.n_rows = len(df)
+        self.bitmaps: Dict[str, Dict] = {}
+        self.sorted_values: Dict[str, np.ndarray] = {}
+        self.sorted_rows: Dict[str, np.ndarray] = {}
+        self._cache = LRUCache(cache_size)
+        self._frames = LRUCache(view_cache_size)
+        self._views = LRUCache(view_cache_size)
+
+        for col in CATEGORICAL_FILTERS + FLAG_FILTERS:
+            codes, uniques = pd.factorize(df[col], sort=True)
+            self.bitmaps[col] = {value: codes == i for i, value in enumerate(uniques)}
+
+        for col in RANGE_FILTERS:
+            values = df[col].to_numpy(dtype=np.float64, na_value=np.nan)
+            valid_rows = np.flatnonzero(~np.isnan(values))
+            order = valid_rows[np.argsort(values[valid_rows], kind="stable")]
+            self.sorted_values[col] = values[order]
+            self.sorted_rows[col] = order.astype(np.int32)
+
+    def _isin_mask(self, col: str, values: Tuple) -> Optional[np.ndarray]:
+        if not values:
+            return None  # an empty multiselect means "no filter", as before
+        mask = np.zeros(self.n_rows, dtype=bool)
+        for value in values:
+            bitmap = self.bitmaps[col].get(value)
+            if bitmap is not None:
+                mask |= bitmap
+        return mask
+
+    def _range_mask(self, col: str, low: Optional[float], high: Optional[float]) -> np.ndarray:
+        values = self.sorted_values[col]
+        start = 0 if low is None else np.searchsorted(values, low, side="left")
+        stop = len(values) if high is None else np.searchsorted(values, high, side="right")
+        mask = np.zeros(self.n_rows, dtype=bool)
+        mask[self.sorted_rows[col][start:stop]] = True
+        return mask
+
+    def _flag_mask(self, col: str, value: Optional[int]) -> Optional[np.ndarray]:
+        if value is None:
+            return None
+        bitmap = self.bitmaps[col].get(value)
+        return bitmap if bitmap is not None else np.zeros(self.n_rows, dtype=bool)
+
+    def _compute(self, key: Tuple) -> np.ndarray:
+        cities, room_types, price_range, capacity_range, min_rating, superhost, weekend = key
+        masks = [
+            self._isin_mask("city", cities),
+            self._isin_mask("room_type", room_types),
+            self._range_mask("realSum", *price_range),
+            self._range_mask("person_capacity", *capacity_range),
+            self._range_mask("guest_satisfaction_overall", min_rating, None),
+            self._flag_mask("host_is_superhost", superhost),
+            self._flag_mask("is_weekend", weekend),
+        ]
+        combined = np.ones(self.n_rows, dtype=bool)
+        for mask in masks:
+            if mask is not None:
+                combined &= mask
+        row_ids = np.flatnonzero(combined).astype(np.int32)
+        row_ids.flags.writeable = False  # shared across sessions
+        return row_ids
+
+    def select(self, key: Tuple) -> np.ndarray:
+        """Row positions matching a filter key from filter_key()"""
+        return self._cache.get_or_compute(key, lambda: self._compute(key))
+
+    def filter(self, df: pd.DataFrame, key: Tuple) -> pd.DataFrame:
+        """Materialize the filtered frame with a single take()"""
+        return df.take(self.select(key))
+
+    def frame(self, df: pd.DataFrame, key: Tuple) -> pd.DataFrame:
+        """Filtered frame, cached per filter key.
+
+        The returned frame is shared between sessions and must not be mutated.
+        """
+        return self._frames.get_or_compute(key, lambda: self.filter(df, key))
+
+    def view(self, df: pd.DataFrame, key: Tuple) -> Dict:
+        """Filtered frame plus its summarize() aggregates, cached per filter key"""
+        def build():
+            frame = self.frame(df, key)
+            return {"frame": frame, "aggregates": summarize(frame)}
+        return self._views.get_or_compute(key, build)
@@ -0,0 +1,83 @@
+"""Lean Plotly figure for the Geographic Intelligence map.
+
+The figure is one WebGL-rendered Scattermap (MapLibre) trace carrying only
+what the map draws: coordinates, marker color (price), marker size and a short hover
+label (with the predicted price, when given). Numeric columns are passed as
+float32/int32 NumPy arrays, which Plotly (>= 6) serializes as base64 typed
+arrays instead of JSON float lists.
+Every figure is measured after serialization. If it exceeds the payload
+budget, the marker count is reduced until it fits.
+"""
+import logging
+from typing import Callable, Dict, Optional
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+logger = logging.getLogger(__name__)
+
+PRICE_COLORSCALE = ["#FF69B4", "#FF1493", "#C71585"]
+
+
+def build_map_figure(map_df: pd.DataFrame, marker_size: np.ndarray, zoom: float, height: int = 600,
+                     predicted: Optional[np.ndarray] = None) -> go.Figure:
+    """Single Scattermap trace with binary-encodable numeric arrays; predicted adds a hover line per marker"""
+    lat = map_df["latitude"].to_numpy(dtype=np.float32)
+    lon = map_df["longitude"].to_numpy(dtype=np.float32)
+    customdata = map_df["count"].to_numpy(dtype=np.int32)
+    hovertemplate = "<b>%{hovertext}</b><br>$%{marker.color:.0f}<br>%{customdata:,} listing(s)<extra></extra>"
+    if predicted is not None:
+        customdata = np.column_stack([customdata, predicted]).astype(np.float32)
+        hovertemplate = ("<b>%{hovertext}</b><br>$%{marker.color:.0f}<br>%{customdata[0]:,} listing(s)"
+                         "<br>Predicted $%{customdata[1]:.0f}<extra></extra>")
+    fig = go.Figure(go.Scattermap(
+        lat=lat,
+        lon=lon,
+        mode="markers",
+        marker=dict(
+            size=np.asarray(marker_size, dtype=np.float32),
+            color=map_df["realSum"].to_numpy(dtype=np.float32),
+            colorscale=PRICE_COLORSCALE,
+            showscale=False,
+            opacity=0.85,
+        ),
+        customdata=customdata,
+        hovertext=map_df["city"].astype(str).to_numpy(),
+        hovertemplate=hovertemplate,
+    ))
+    fig.update_layout(
+        height=height,
+        map=dict(
+            style="carto-positron",
+            zoom=zoom,
+            center=dict(lat=float(lat.mean()), lon=float(lon.mean())) if len(lat) else None,
+        ),
+        margin=dict(l=0, r=0, t=0, b=0),
+        paper_bgcolor="rgba(0,0,0,0)",
+    )
+    return fig
+
+
+def payload_size(fig: go.Figure) -> int:
+    """Serialized figure size in bytes (what the browser downloads)"""
+    return len(fig.to_json().encode("utf-8"))
+
+
+def fit_to_budget(make_figure: Callable[[int], Dict], max_markers: int, budget_bytes: int, min_markers: int = 100) -> Dict:
+    """Build the map, halving the marker budget until the serialized figure fits.
+
+    make_figure(max_markers) must return a dict with at least a "figure" key.
+    The returned dict gains "payload_bytes" and "max_markers".
+    """
+    while True:
+        result = make_figure(max_markers)
+        size = payload_size(result["figure"])
+        logger.info("map figure: %d markers, %.1f KB (budget %.1f KB)",
+                    len(result["figure"].data[0].lat), size / 1024, budget_bytes / 1024)
+        if size <= budget_bytes or max_markers <= min_markers:
+            if size > budget_bytes:
+                logger.warning("map figure still over budget at the %d marker floor", max_markers)
+            result.update(payload_bytes=size, max_markers=max_markers)
+            return result
+        max_markers = max(min_markers, max_markers // 2)
@@ -0,0 +1,91 @@
+"""Spatial grid index feeding the Geographic Intelligence map.
+
+Each listing gets a grid tile id at several zoom levels when the data is
+loaded. A tile at level z is 360 / 2**z degrees wide. A map request takes
+the filtered row ids and a marker budget:
+
+* If the rows fit in the budget, they are returned as individual points.
+* Otherwise the rows are grouped at the finest level that fits, and each
+  tile becomes one cluster marker. The marker sits at the tile's centroid
+  and carries the listing count and mean price.
+
+The payload stays bounded, and every filtered listing is still counted.
+"""
+from typing import Dict, Hashable, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from lru_cache import LRUCache
+
+ZOOM_LEVELS = (4, 6, 8, 10, 12, 14)
+POINT_COLUMNS = ["latitude", "longitude", "realSum", "city", "room_type", "dist"]
+
+
+def tile_size(level: int) -> float:
+    """Tile width in degrees at a zoom level"""
+    return 360.0 / (2 ** level)
+
+
+class SpatialIndex:
+    """Per-zoom-level tile ids for every listing, with budgeted map views"""
+
+    def __init__(self, df: pd.DataFrame, levels: Sequence[int] = ZOOM_LEVELS, cache_size: int = 32):
+        self.df = df
+        self.levels = tuple(sorted(levels))
+        self.lat = df["latitude"].to_numpy(dtype=np.float64)
+        self.lng = df["longitude"].to_numpy(dtype=np.float64)
+        self.price = df["realSum"].to_numpy(dtype=np.float64)
+        self.dist = df["dist"].to_numpy(dtype=np.float64)
+        self.valid = ~(np.isnan(self.lat) | np.isnan(self.lng))
+        self.tiles: Dict[int, np.ndarray] = {level: self._tile_ids(level) for level in self.levels}
+        self._cache = LRUCache(cache_size)
+
+    def _tile_ids(self, level: int) -> np.ndarray:
+        size = tile_size(level)
+        n_cols = 2 ** level
+        lat = np.where(self.valid, self.lat, 0.0)
+        lng = np.where(self.valid, self.lng, 0.0)
+        rows = np.floor((lat + 90.0) / size).astype(np.int64)
+        cols = np.floor((lng + 180.0) / size).astype(np.int64)
+        return rows * n_cols + cols
+
+    def _cluster(self, row_ids: np.ndarray, level: int) -> pd.DataFrame:
+        tiles, first, inverse, counts = np.unique(
+            self.tiles[level][row_ids], return_index=True, return_inverse=True, return_counts=True
+        )
+        n = len(tiles)
+        representative = row_ids[first]
+        return pd.DataFrame({
+            "latitude": np.bincount(inverse, weights=self.lat[row_ids], minlength=n) / counts,
+            "longitude": np.bincount(inverse, weights=self.lng[row_ids], minlength=n) / counts,
+            "realSum": np.bincount(inverse, weights=self.price[row_ids], minlength=n) / counts,
+            "count": counts,
+            # Click-to-predict uses a representative listing's city and room type and the mean distance
+            "city": self.df["city"].to_numpy()[representative],
+            "room_type": self.df["room_type"].to_numpy()[representative],
+            "dist": np.bincount(inverse, weights=np.nan_to_num(self.dist[row_ids]), minlength=n) / counts,
+        })
+
+    def view(self, row_ids: np.ndarray, max_markers: int = 2000, cache_key: Optional[Hashable] = None) -> Dict:
+        """Bounded map payload for the given rows.
+
+        Returns {"mode": "points" | "clusters", "level": zoom level or None, "frame": DataFrame}.
+        Pass a hashable cache_key (e.g. the filter key) to reuse results across reruns.
+        """
+        if cache_key is not None:
+            return self._cache.get_or_compute(
+                (cache_key, max_markers), lambda: self.view(row_ids, max_markers)
+            )
+
+        row_ids = np.asarray(row_ids)
+        row_ids = row_ids[self.valid[row_ids]]
+        if len(row_ids) <= max_markers:
+            frame = self.df.iloc[row_ids][POINT_COLUMNS].reset_index(drop=True)
+            frame["count"] = 1
+            return {"mode": "points", "level": None, "frame": frame}
+
+        for level in reversed(self.levels):
+            n_tiles = len(np.unique(self.tiles[level][row_ids]))
+            if n_tiles <= max_markers or level == self.levels[0]:
+                return {"mode": "clusters", "level": level, "frame": self._cluster(row_ids, level)}
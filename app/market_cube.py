@@ -0,0 +1,227 @@
+"""Pre-aggregated cube behind the KPI cards and the Market Breakdown charts.
+
+Listings are rolled up once into cells over
+city x room_type x superhost x is_weekend x person_capacity x price bucket.
+Each cell also has a flag for whether the row has a rating, because the
+rating filter drops listings without one. Every cell stores count, price
+sum, price sum of squares and rating sum. It also stores a small
+fixed-width price histogram, which acts as a mergeable quantile sketch.
+A sidebar state is answered by masking cells and summing them, so the
+charts never scan the listing rows.
+
+Price ranges resolve to the sketch resolution (price_bucket / sketch_bins,
+$1 by default). Partial edge buckets contribute their sums in proportion to
+the sketch counts that fall in range.
+"""
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from filter_index import BOX_COLUMNS
+
+CUBE_DIMENSIONS = ["city", "room_type", "host_is_superhost", "is_weekend", "person_capacity", "price_bucket", "rated"]
+
+
+def _histogram_quantiles(counts: np.ndarray, edges: np.ndarray, quantiles) -> np.ndarray:
+    """Linear-interpolated quantiles from a histogram with the given bin edges"""
+    total = counts.sum()
+    if total == 0:
+        return np.full(len(quantiles), np.nan)
+    cumulative = np.cumsum(counts)
+    results = []
+    for q in quantiles:
+        target = q * total
+        i = int(np.searchsorted(cumulative, target, side="left"))
+        i = min(i, len(counts) - 1)
+        before = cumulative[i - 1] if i > 0 else 0
+        within = (target - before) / counts[i] if counts[i] else 0.0
+        results.append(edges[i] + within * (edges[i + 1] - edges[i]))
+    return np.array(results)
+
+
+def box_stats(counts: np.ndarray, edges: np.ndarray) -> Dict[str, float]:
+    """Box plot statistics (Tukey fences clipped to the data) from a histogram"""
+    q1, median, q3 = _histogram_quantiles(counts, edges, (0.25, 0.5, 0.75))
+    nonzero = np.flatnonzero(counts)
+    low, high = edges[nonzero[0]], edges[nonzero[-1] + 1]
+    iqr = q3 - q1
+    return {
+        "lowerfence": max(low, q1 - 1.5 * iqr),
+        "q1": q1,
+        "median": median,
+        "q3": q3,
+        "upperfence": min(high, q3 + 1.5 * iqr),
+    }
+
+
+class MarketCube:
+    """Cell-level aggregates answering sidebar filter keys without touching rows"""
+
+    def __init__(self, df: pd.DataFrame, price_bucket: float = 10.0, sketch_bins: int = 10):
+        self.price_bucket = float(price_bucket)
+        self.sketch_bins = int(sketch_bins)
+        self.sketch_step = self.price_bucket / self.sketch_bins
+
+        prices = df["realSum"].to_numpy(dtype=np.float64)
+        ratings = df["guest_satisfaction_overall"].to_numpy(dtype=np.float64, na_value=np.nan)
+        rated = ~np.isnan(ratings)
+        self.min_rating = float(np.nanmin(ratings)) if rated.any() else 0.0
+
+        buckets = np.floor(prices / self.price_bucket).astype(np.int64)
+        subbins = np.clip(
+            np.floor((prices - buckets * self.price_bucket) / self.sketch_step).astype(np.int64),
+            0, self.sketch_bins - 1,
+        )
+
+        keys = pd.DataFrame({
+            "city": df["city"].to_numpy(),
+            "room_type": df["room_type"].to_numpy(),
+            "host_is_superhost": df["host_is_superhost"].to_numpy(),
+            "is_weekend": df["is_weekend"].to_numpy(),
+            "person_capacity": df["person_capacity"].to_numpy(dtype=np.float64, na_value=np.nan),
+            "price_bucket": buckets,
+            "rated": rated.astype(np.int8),
+        })
+        cell_ids = keys.groupby(CUBE_DIMENSIONS, dropna=False, sort=True).ngroup().to_numpy()
+        n_cells = int(cell_ids.max()) + 1 if len(cell_ids) else 0
+        first_rows = pd.Series(np.arange(len(cell_ids))).groupby(cell_ids).first().to_numpy()
+        cells = keys.iloc[first_rows].reset_index(drop=True)
+
+        self.cities = np.array(sorted(cells["city"].unique()), dtype=object)
+        self.room_types = np.array(sorted(cells["room_type"].unique()), dtype=object)
+        self.city_code = np.searchsorted(self.cities, cells["city"].to_numpy(dtype=object))
+        self.room_code = np.searchsorted(self.room_types, cells["room_type"].to_numpy(dtype=object))
+        self.superhost = cells["host_is_superhost"].to_numpy(dtype=np.int8)
+        self.weekend = cells["is_weekend"].to_numpy(dtype=np.int8)
+        self.capacity = cells["person_capacity"].to_numpy(dtype=np.float64)
+        self.bucket = cells["price_bucket"].to_numpy(dtype=np.int64)
+        self.rated = cells["rated"].to_numpy(dtype=bool)
+
+        rating_values = np.where(rated, ratings, 0.0)
+        self.count = np.bincount(cell_ids, minlength=n_cells).astype(np.float64)
+        self.price_sum = np.bincount(cell_ids, weights=prices, minlength=n_cells)
+        self.price_sumsq = np.bincount(cell_ids, weights=prices * prices, minlength=n_cells)
+        self.rating_sum = np.bincount(cell_ids, weights=rating_values, minlength=n_cells)
+        self.sketch = np.bincount(
+            cell_ids * self.sketch_bins + subbins, minlength=n_cells * self.sketch_bins
+        ).reshape(n_cells, self.sketch_bins).astype(np.float64)
+
+        self.min_bucket = int(self.bucket.min()) if n_cells else 0
+        self.n_fine_bins = (int(self.bucket.max()) - self.min_bucket + 1) * self.sketch_bins if n_cells else 0
+
+    @property
+    def n_cells(self) -> int:
+        return len(self.count)
+
+    def _cell_mask(self, key: Tuple) -> Optional[np.ndarray]:
+        cities, room_types, _, capacity_range, min_rating, superhost, weekend = key
+        if min_rating > self.min_rating:
+            return None  # rating is not a cube dimension beyond rated / unrated
+
+        mask = self.rated.copy()
+        if cities:
+            mask &= np.isin(self.city_code, np.flatnonzero(np.isin(self.cities, cities)))
+        if room_types:
+            mask &= np.isin(self.room_code, np.flatnonzero(np.isin(self.room_types, room_types)))
+        mask &= (self.capacity >= capacity_range[0]) & (self.capacity <= capacity_range[1])
+        if superhost is not None:
+            mask &= self.superhost == superhost
+        if weekend is not None:
+            mask &= self.weekend == weekend
+        return mask
+
+    def _sketch_in_range(self, cells: np.ndarray, price_range: Tuple[float, float]) -> np.ndarray:
+        """Sketch counts of the given cells restricted to the price range"""
+        starts = (self.bucket[cells, None] * self.price_bucket) + np.arange(self.sketch_bins) * self.sketch_step
+        in_range = (starts >= price_range[0] - 1e-9) & (starts <= price_range[1])
+        return self.sketch[cells] * in_range
+
+    def rollup(self, key: Tuple) -> Optional[Dict]:
+        """Aggregates for a filter_key() state, or None when the cube cannot express it.
+
+        Returns the same keys as filter_index.summarize().
+        """
+        mask = self._cell_mask(key)
+        if mask is None:
+            return None
+
+        cells = np.flatnonzero(mask)
+        sketch = self._sketch_in_range(cells, key[2])
+        counts = sketch.sum(axis=1)
+        keep = counts > 0
+        cells, sketch, counts = cells[keep], sketch[keep], counts[keep]
+        fraction = counts / self.count[cells]
+        price_sum = self.price_sum[cells] * fraction
+        rating_sum = self.rating_sum[cells] * fraction
+
+        total = counts.sum()
+        room_codes = self.room_code[cells]
+
+        def grouped_mean(codes, labels, index_name):
+            n = np.bincount(codes, weights=counts, minlength=len(labels))
+            s = np.bincount(codes, weights=price_sum, minlength=len(labels))
+            present = n > 0
+            return pd.Series(s[present] / n[present], index=pd.Index(labels[present], name=index_name), name="realSum")
+
+        room_n = np.bincount(room_codes, weights=counts, minlength=len(self.room_types))
+        room_counts = pd.Series(
+            room_n[room_n > 0].astype(np.int64),
+            index=pd.Index(self.room_types[room_n > 0], name="room_type"),
+            name="count",
+        ).sort_values(ascending=False)
+
+        superhost_n = np.bincount(self.superhost[cells], weights=counts, minlength=2)
+        superhost_counts = pd.Series(
+            superhost_n[superhost_n > 0].astype(np.int64),
+            index=pd.Index(np.flatnonzero(superhost_n > 0), name="host_is_superhost"),
+            name="count",
+        ).sort_values(ascending=False)
+
+        capacities, capacity_codes = np.unique(self.capacity[cells], return_inverse=True)
+
+        return {
+            "listings": int(total),
+            # No listings match: zeroed KPIs instead of NaN, as in summarize()
+            "avg_price": price_sum.sum() / total if total else 0.0,
+            "avg_rating": rating_sum.sum() / total if total else 0.0,
+            "room_counts": room_counts,
+            "weekend_price": grouped_mean(self.weekend[cells], np.array([0, 1]), "is_weekend"),
+            "superhost_counts": superhost_counts,
+            "capacity_price": grouped_mean(capacity_codes, capacities, "person_capacity"),
+            "price_box": self._price_box(cells, sketch, room_codes),
+        }
+
+    def price_std(self, key: Tuple) -> Optional[float]:
+        """Price standard deviation for a filter state from the cell sum of squares"""
+        mask = self._cell_mask(key)
+        if mask is None:
+            return None
+        cells = np.flatnonzero(mask)
+        counts = self._sketch_in_range(cells, key[2]).sum(axis=1)
+        fraction = np.divide(counts, self.count[cells], out=np.zeros_like(counts), where=self.count[cells] > 0)
+        n = counts.sum()
+        if n < 2:
+            return np.nan
+        s = (self.price_sum[cells] * fraction).sum()
+        ss = (self.price_sumsq[cells] * fraction).sum()
+        return float(np.sqrt(max(ss - s * s / n, 0.0) / (n - 1)))
+
+    def _price_box(self, cells: np.ndarray, sketch: np.ndarray, room_codes: np.ndarray) -> pd.DataFrame:
+        """Approximate per-room-type box statistics from the merged cell sketches"""
+        fine = (self.bucket[cells, None] - self.min_bucket) * self.sketch_bins + np.arange(self.sketch_bins)
+        flat_index = room_codes[:, None] * self.n_fine_bins + fine
+        merged = np.bincount(
+            flat_index.ravel(), weights=sketch.ravel(), minlength=len(self.room_types) * self.n_fine_bins
+        ).reshape(len(self.room_types), self.n_fine_bins)
+        edges = self.min_bucket * self.price_bucket + np.arange(self.n_fine_bins + 1) * self.sketch_step
+
+        rows = {}
+        for code, room_type in enumerate(self.room_types):
+            if merged[code].sum() > 0:
+                rows[room_type] = box_stats(merged[code], edges)
+        if not rows:
+            return pd.DataFrame(columns=BOX_COLUMNS, index=pd.Index([], name="room_type"), dtype=np.float64)
+        frame = pd.DataFrame.from_dict(rows, orient="index")[BOX_COLUMNS]
+        frame.index.name = "room_type"
+        return frame
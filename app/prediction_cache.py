@@ -0,0 +1,76 @@
+"""Memoized predictions keyed on the quantized six-feature tuple.
+
+The predictor form only produces discrete values (a city and room type from
+the dataset, capacity 1-6, cleanliness 1-10, distance in 0.1 km steps and a
+weekend flag). Repeated submissions are therefore answered from an LRU cache.
+The whole grid for the ten cities can optionally be computed at startup with
+one batched model call per city.
+"""
+from typing import Dict, Iterable, Tuple
+
+import numpy as np
+
+from lru_cache import LRUCache
+from predictor import PricePredictor
+
+CAPACITY_STEPS = range(1, 7)
+CLEANLINESS_STEPS = range(1, 11)
+DISTANCE_STEP = 0.1
+DISTANCE_STEPS = np.round(np.arange(0.0, 10.0 + DISTANCE_STEP / 2, DISTANCE_STEP), 1)
+WEEKEND_STEPS = (0, 1)
+
+
+def quantize_key(city: str, room_type: str, person_capacity, cleanliness_rating, dist, is_weekend) -> Tuple:
+    """Snap raw inputs onto the form's grid so equal submissions share a cache entry"""
+    return (
+        str(city),
+        str(room_type),
+        int(round(float(person_capacity))),
+        int(round(float(cleanliness_rating))),
+        round(round(float(dist) / DISTANCE_STEP) * DISTANCE_STEP, 1),
+        int(bool(is_weekend)),
+    )
+
+
+class CachedPredictor:
+    """LRU-memoized wrapper around PricePredictor with hit/miss counters"""
+
+    def __init__(self, predictor: PricePredictor, maxsize: int = 400_000):
+        self.predictor = predictor
+        self.cache = LRUCache(maxsize)
+
+    def predict(self, city: str, room_type: str, person_capacity, cleanliness_rating, dist, is_weekend) -> float:
+        key = quantize_key(city, room_type, person_capacity, cleanliness_rating, dist, is_weekend)
+        return self.cache.get_or_compute(key, lambda: self.predictor.predict_one(*key))
+
+    def prewarm(
+        self,
+        cities: Iterable[str],
+        room_types: Iterable[str],
+        capacities: Iterable[int] = CAPACITY_STEPS,
+        cleanliness: Iterable[int] = CLEANLINESS_STEPS,
+        distances: Iterable[float] = DISTANCE_STEPS,
+        weekend: Iterable[int] = WEEKEND_STEPS,
+    ) -> int:
+        """Fill the cache with the full grid, one batched model call per city"""
+        room_types = list(room_types)
+        capacities, cleanliness, distances, weekend = list(capacities), list(cleanliness), list(distances), list(weekend)
+        stored = 0
+        for city in cities:
+            grid = self.predictor.predict_grid(
+                city=[city],
+                room_type=room_types,
+                person_capacity=capacities,
+                cleanliness_rating=cleanliness,
+                dist=distances,
+                is_weekend=weekend,
+            )
+            for row in grid.itertuples(index=False):
+                key = quantize_key(row.city, row.room_type, row.person_capacity,
+                                   row.cleanliness_rating, row.dist, row.is_weekend)
+                self.cache.put(key, float(row.predicted_price))
+                stored += 1
+        return stored
+
+    def stats(self) -> Dict[str, int]:
+        return self.cache.stats()
@@ -0,0 +1,96 @@
+"""Batched price predictions around the CatBoost model.
+
+The model is loaded once and fed feature frames built straight from a typed
+schema, so predicting a single form submission, a grid of what-if inputs,
+every listing on the map or an uploaded CSV is one vectorized
+model.predict() call.
+"""
+import itertools
+import os
+from typing import Dict, Iterable, Optional
+
+import numpy as np
+import pandas as pd
+from catboost import CatBoostRegressor
+
+MODEL_PATH = os.path.join(os.path.dirname(__file__), "airbnb_model.cbm")
+
+# Model inputs and their dtypes (the model is trained on log1p(realSum))
+FEATURE_SCHEMA = {
+    "city": str,
+    "room_type": str,
+    "person_capacity": np.int64,
+    "cleanliness_rating": np.float64,
+    "dist": np.float64,
+    "is_weekend": np.int64,
+}
+
+
+class PricePredictor:
+    """Loads the model once and predicts nightly prices for whole batches"""
+
+    def __init__(self, model_path: str = MODEL_PATH, defaults: Optional[Dict] = None):
+        self.model_path = model_path
+        self.model = CatBoostRegressor()
+        self.model.load_model(model_path)
+        self.defaults = dict(defaults or {})
+        self.feature_names = list(self.model.feature_names_ or FEATURE_SCHEMA)
+
+        unknown = [f for f in self.feature_names if f not in FEATURE_SCHEMA and f not in self.defaults]
+        if unknown:
+            raise ValueError(f"Model expects features without a schema entry or default: {unknown}")
+
+    def build_features(self, frame: pd.DataFrame) -> pd.DataFrame:
+        """Typed feature frame in model column order from any frame holding the schema columns"""
+        missing = [f for f in FEATURE_SCHEMA if f in self.feature_names and f not in frame.columns]
+        if missing:
+            raise ValueError(f"Missing feature columns: {missing}")
+
+        features = {}
+        for name in self.feature_names:
+            if name in FEATURE_SCHEMA:
+                features[name] = frame[name].to_numpy().astype(FEATURE_SCHEMA[name])
+            else:
+                features[name] = np.full(len(frame), self.defaults[name])
+        return pd.DataFrame(features, index=frame.index)
+
+    def predict_frame(self, frame: pd.DataFrame) -> np.ndarray:
+        """Predicted nightly prices for every row of frame"""
+        if len(frame) == 0:
+            return np.empty(0)
+        return np.expm1(self.model.predict(self.build_features(frame)))
+
+    def predict_one(self, city: str, room_type: str, person_capacity: int,
+                    cleanliness_rating: float, dist: float, is_weekend: int) -> float:
+        frame = pd.DataFrame([{
+            "city": city,
+            "room_type": room_type,
+            "person_capacity": person_capacity,
+            "cleanliness_rating": cleanliness_rating,
+            "dist": dist,
+            "is_weekend": is_weekend,
+        }])
+        return float(self.predict_frame(frame)[0])
+
+    def predict_listings(self, listings: pd.DataFrame, overrides: Optional[Dict] = None) -> np.ndarray:
+        """Predict existing listings, optionally pinning some features (e.g. capacity) to fixed values"""
+        frame = listings.assign(**overrides) if overrides else listings
+        return self.predict_frame(frame)
+
+    def predict_grid(self, **axes: Iterable) -> pd.DataFrame:
+        """Predict the cartesian product of the given feature values.
+
+        Example: predict_grid(city=["paris"], room_type=["Private room"],
+        person_capacity=range(1, 7), cleanliness_rating=[9],
+        dist=np.arange(0, 10.1, 0.5), is_weekend=[0])
+        """
+        names = list(axes)
+        grid = pd.DataFrame(list(itertools.product(*(list(axes[n]) for n in names))), columns=names)
+        grid["predicted_price"] = self.predict_frame(grid)
+        return grid
+
+    def predict_csv(self, source) -> pd.DataFrame:
+        """Read a CSV (path or file-like) of schema columns and append predicted_price"""
+        frame = pd.read_csv(source)
+        frame["predicted_price"] = self.predict_frame(frame)
+        return frame
@@ -0,0 +1,148 @@
+"""Precomputed price surface over the predictor's full discrete input grid.
+
+Every combination of city x room type x capacity 1-6 x cleanliness 1-10 x
+distance 0-10 km (0.1 steps) x weekend flag is predicted once, in bulk, and
+stored as a compact float32 NumPy array. The what-if widgets then read
+prices with an array lookup while the user drags a slider, and the
+price-vs-distance curve is a slice of the same array. The array is stored
+with a hash of the model file it was predicted from, so a retrained model
+rebuilds it.
+
+Build it manually with:
+
+    python app/price_surface.py
+"""
+import argparse
+import hashlib
+import os
+import time
+from typing import Iterable, Optional
+
+import numpy as np
+
+from prediction_cache import CAPACITY_STEPS, CLEANLINESS_STEPS, DISTANCE_STEP, DISTANCE_STEPS, WEEKEND_STEPS
+
+SURFACE_PATH = os.path.join(os.path.dirname(__file__), "data", "price_surface.npz")
+
+
+def model_hash(model_path: str) -> str:
+    """SHA-1 of the model file, empty when it cannot be read"""
+    digest = hashlib.sha1()
+    try:
+        with open(model_path, "rb") as model_file:
+            for chunk in iter(lambda: model_file.read(1 << 20), b""):
+                digest.update(chunk)
+    except OSError:
+        return ""
+    return digest.hexdigest()
+
+
+class PriceSurface:
+    """Dense (city, room_type, capacity, cleanliness, dist, weekend) -> price array"""
+
+    def __init__(self, prices: np.ndarray, cities: Iterable[str], room_types: Iterable[str], model: str = ""):
+        self.prices = prices
+        self.model = model  # model_hash() of the model the prices were predicted with
+        self.cities = [str(c) for c in cities]
+        self.room_types = [str(r) for r in room_types]
+        self.capacities = np.array(CAPACITY_STEPS)
+        self.cleanliness = np.array(CLEANLINESS_STEPS)
+        self.distances = DISTANCE_STEPS
+        self._city_index = {c: i for i, c in enumerate(self.cities)}
+        self._room_index = {r: i for i, r in enumerate(self.room_types)}
+
+    @classmethod
+    def build(cls, predictor, cities: Iterable[str], room_types: Iterable[str]) -> "PriceSurface":
+        """Predict the whole grid with one batched model call per city"""
+        cities, room_types = [str(c) for c in cities], [str(r) for r in room_types]
+        shape = (len(cities), len(room_types), len(CAPACITY_STEPS), len(CLEANLINESS_STEPS),
+                 len(DISTANCE_STEPS), len(WEEKEND_STEPS))
+        prices = np.empty(shape, dtype=np.float32)
+        for i, city in enumerate(cities):
+            # predict_grid enumerates the cartesian product in C order, matching the array layout
+            grid = predictor.predict_grid(
+                city=[city],
+                room_type=room_types,
+                person_capacity=CAPACITY_STEPS,
+                cleanliness_rating=CLEANLINESS_STEPS,
+                dist=DISTANCE_STEPS,
+                is_weekend=WEEKEND_STEPS,
+            )
+            prices[i] = grid["predicted_price"].to_numpy(dtype=np.float32).reshape(shape[1:])
+        return cls(prices, cities, room_types, model_hash(predictor.model_path))
+
+    def save(self, path: str = SURFACE_PATH) -> str:
+        np.savez_compressed(
+            path,
+            prices=self.prices,
+            cities=np.array(self.cities),
+            room_types=np.array(self.room_types),
+            model=np.array(self.model),
+        )
+        return path
+
+    @classmethod
+    def load(cls, path: str = SURFACE_PATH) -> "PriceSurface":
+        with np.load(path) as archive:
+            # Surfaces saved before the model hash was stored load with an empty one
+            model = str(archive["model"]) if "model" in archive.files else ""
+            return cls(archive["prices"], archive["cities"].tolist(), archive["room_types"].tolist(), model)
+
+    def _axis_index(self, person_capacity, cleanliness_rating, dist, is_weekend):
+        capacity_i = int(np.clip(round(float(person_capacity)) - CAPACITY_STEPS.start, 0, len(self.capacities) - 1))
+        clean_i = int(np.clip(round(float(cleanliness_rating)) - CLEANLINESS_STEPS.start, 0, len(self.cleanliness) - 1))
+        dist_i = int(np.clip(round(float(dist) / DISTANCE_STEP), 0, len(self.distances) - 1))
+        return capacity_i, clean_i, dist_i, int(bool(is_weekend))
+
+    def lookup(self, city: str, room_type: str, person_capacity, cleanliness_rating, dist, is_weekend) -> Optional[float]:
+        """Predicted price for one input combination, None for an unknown city or room type"""
+        city_i, room_i = self._city_index.get(str(city)), self._room_index.get(str(room_type))
+        if city_i is None or room_i is None:
+            return None
+        capacity_i, clean_i, dist_i, weekend_i = self._axis_index(person_capacity, cleanliness_rating, dist, is_weekend)
+        return float(self.prices[city_i, room_i, capacity_i, clean_i, dist_i, weekend_i])
+
+    def distance_curve(self, city: str, room_type: str, person_capacity, cleanliness_rating, is_weekend) -> Optional[np.ndarray]:
+        """Predicted price for every distance step, all other inputs fixed"""
+        city_i, room_i = self._city_index.get(str(city)), self._room_index.get(str(room_type))
+        if city_i is None or room_i is None:
+            return None
+        capacity_i, clean_i, _, weekend_i = self._axis_index(person_capacity, cleanliness_rating, 0, is_weekend)
+        return self.prices[city_i, room_i, capacity_i, clean_i, :, weekend_i]
+
+
+def load_or_build(predictor, cities: Iterable[str], room_types: Iterable[str], path: str = SURFACE_PATH) -> PriceSurface:
+    """Load the stored surface, rebuilding it when missing, when the city / room type axes changed
+    or when the model file was retrained since it was built"""
+    cities, room_types = [str(c) for c in cities], [str(r) for r in room_types]
+    if os.path.exists(path):
+        surface = PriceSurface.load(path)
+        if (surface.cities == cities and surface.room_types == room_types
+                and surface.model == model_hash(predictor.model_path)):
+            return surface
+    surface = PriceSurface.build(predictor, cities, room_types)
+    try:
+        surface.save(path)
+    except OSError:
+        pass  # read-only deployment, keep the in-memory surface
+    return surface
+
+
+def main():
+    from data_store import load_dashboard_frame
+    from predictor import PricePredictor
+
+    parser = argparse.ArgumentParser(description="Precompute the predictor's price surface")
+    parser.add_argument("--out", default=SURFACE_PATH, help="Output .npz path")
+    args = parser.parse_args()
+
+    df = load_dashboard_frame(["city", "room_type"])
+    start = time.perf_counter()
+    surface = PriceSurface.build(PricePredictor(), sorted(df["city"].unique()), sorted(df["room_type"].unique()))
+    path = surface.save(args.out)
+    elapsed = time.perf_counter() - start
+    print(f"[+] Built {path}: {surface.prices.size:,} prices in {elapsed:.1f}s ({os.path.getsize(path) / 1e6:.1f} MB)")
+
+
+if __name__ == "__main__":
+    main()
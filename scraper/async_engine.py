@@ -0,0 +1,153 @@
+"""Asyncio scraping engine: many listing pages per browser.
+
+One event loop drives a few Chromium browsers (one shared context each) and
+keeps up to `concurrency` listing pages in flight across them. Two limits
+keep the load polite:
+
+* a global semaphore caps the number of open pages;
+* a per-host limiter spaces navigations to the same host at least
+  1 / per_host_rate seconds apart.
+
+A page only navigates, waits for the listing's readiness signals and takes a
+snapshot. Parsing is done by the shared pure parsers in listing_parser.
+An optional RequestBlocker keeps images, fonts, media and trackers off the wire.
+With capture_api, the listing API's JSON is parsed first and the DOM only
+when no API response arrived. With a FixtureStore as recorder, every page is
+also saved (snapshot plus API payloads) for offline replay.
+"""
+import asyncio
+import time
+from typing import Callable, Dict, Iterable, List, Optional
+from urllib.parse import urlparse
+
+from playwright.async_api import async_playwright
+
+from browser_pool import CONTEXT_OPTIONS, LAUNCH_ARGS, STEALTH_SCRIPT
+from fixtures import FixtureStore
+from listing_parser import parse_listing_details, snapshot_page_async
+from readiness import PageReadiness
+from request_blocking import RequestBlocker
+from response_capture import LISTING_API_PATTERN, ResponseCapture, parse_api_listing
+
+
+class HostRateLimiter:
+    """Hands out navigation slots at most `rate` per second for each host"""
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate and rate > 0 else 0.0
+        self._next_slot: Dict[str, float] = {}
+        self._lock = asyncio.Lock()
+
+    async def wait(self, url: str):
+        if not self.interval:
+            return
+        host = urlparse(url).netloc
+        async with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, now))
+            self._next_slot[host] = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+
+class AsyncScrapeEngine:
+    """Scrape listing URLs concurrently with the async Playwright API"""
+
+    def __init__(self, concurrency: int = 24, browsers: int = 1, per_host_rate: float = 3.0,
+                 parser: Callable[[str, Dict], Optional[Dict]] = parse_listing_details,
+                 navigation_timeout: int = 30000, should_stop: Optional[Callable[[], bool]] = None,
+                 blocker: Optional[RequestBlocker] = None, readiness: Optional[PageReadiness] = None,
+                 capture_api: bool = False, recorder: Optional[FixtureStore] = None):
+        self.concurrency = max(1, concurrency)
+        self.browsers = max(1, browsers)
+        self.per_host_rate = per_host_rate
+        self.parser = parser
+        self.navigation_timeout = navigation_timeout
+        self.should_stop = should_stop or (lambda: False)
+        self.blocker = blocker
+        self.readiness = readiness or PageReadiness()
+        self.capture_api = capture_api
+        self.recorder = recorder
+        self.stats = {"ok": 0, "empty": 0, "failed": 0, "api": 0, "elapsed": 0.0}
+        self.errors: Dict[str, str] = {}  # URL -> why its page failed
+
+    def run(self, urls: Iterable[str], on_result: Optional[Callable[[str, Optional[Dict]], None]] = None,
+            collect: bool = True) -> List[Dict]:
+        """Blocking entry point: scrape every URL and return the parsed listings
+
+        With collect=False results only go to on_result and an empty list is returned.
+        """
+        return asyncio.run(self.scrape(urls, on_result, collect))
+
+    async def scrape(self, urls: Iterable[str], on_result: Optional[Callable[[str, Optional[Dict]], None]] = None,
+                     collect: bool = True) -> List[Dict]:
+        urls = list(urls)
+        results = []
+        semaphore = asyncio.Semaphore(self.concurrency)
+        limiter = HostRateLimiter(self.per_host_rate)
+        start = time.perf_counter()
+
+        async with async_playwright() as p:
+            browsers = [await p.chromium.launch(headless=True, args=LAUNCH_ARGS) for _ in range(self.browsers)]
+            contexts = []
+            for browser in browsers:
+                context = await browser.new_context(**CONTEXT_OPTIONS)
+                await context.add_init_script(STEALTH_SCRIPT)
+                if self.blocker:
+                    await self.blocker.attach_async(context)
+                contexts.append(context)
+
+            async def worker(index: int, url: str):
+                async with semaphore:
+                    if self.should_stop():
+                        return
+                    await limiter.wait(url)
+                    # Spread pages round-robin over the browsers
+                    data = await self._scrape_one(contexts[index % len(contexts)], url)
+                if data and collect:
+                    results.append(data)
+                if on_result:
+                    on_result(url, data)
+
+            try:
+                await asyncio.gather(*(worker(i, url) for i, url in enumerate(urls)))
+            finally:
+                for browser in browsers:
+                    try:
+                        await browser.close()
+                    except:
+                        pass
+
+        self.stats["elapsed"] = time.perf_counter() - start
+        return results
+
+    async def _scrape_one(self, context, url: str) -> Optional[Dict]:
+        page = await context.new_page()
+        capture = ResponseCapture(patterns=(LISTING_API_PATTERN,)).attach(page) if self.capture_api else None
+        try:
+            await page.goto(url, wait_until="domcontentloaded", timeout=self.navigation_timeout)
+            data, payloads, snapshot = None, [], None
+            if capture and await self.readiness.wait_for_capture_async(page, capture):
+                payloads = await capture.payloads_async()
+                data = parse_api_listing(url, payloads)
+                if data:
+                    self.stats["api"] += 1
+            # Record mode snapshots the DOM even when the API answered, so fixtures are complete
+            if data is None or self.recorder:
+                await self.readiness.wait_for_listing_async(page)
+                snapshot = await snapshot_page_async(page)
+            if data is None:
+                data = self.parser(url, snapshot)
+            if self.recorder:
+                await asyncio.to_thread(self.recorder.save_listing, url, snapshot, payloads)
+            self.stats["ok" if data else "empty"] += 1
+            return data
+        except Exception as e:
+            self.stats["failed"] += 1
+            self.errors[url] = str(e)[:200]
+            return None
+        finally:
+            try:
+                await page.close()
+            except:
+                pass
@@ -0,0 +1,117 @@
+"""Offline extraction benchmark over recorded fixtures.
+
+Replays every listing in a FixtureStore through the parsers the scrapers use,
+with no browser and no network access:
+
+* cli: parse_listing_details (scraper_cli.scrape_listing_details)
+* gui: parse_listing (AirbnbScraperApp.extract_listing)
+* api: parse_api_listing (API capture mode; recordings with payloads only)
+
+For each parser it reports listings/sec, the mean time per field extractor,
+and the fill rate of every output field. Record fixtures first with
+scrape_all_listings(..., record_dir="fixtures") or the GUI's "Record
+fixtures" box, then run:
+
+    python benchmark.py fixtures --repeat 5
+"""
+import argparse
+import time
+from typing import Callable, Dict, List, Optional
+
+from fixtures import FIXTURE_DIR, FixtureStore
+from listing_parser import PageSnapshot, empty_listing, extraction_stats, parse_listing, parse_listing_details
+from response_capture import parse_api_listing
+
+
+def _cli(record: Dict) -> Optional[Dict]:
+    return parse_listing_details(record["url"], PageSnapshot(record["snapshot"]))
+
+
+def _gui(record: Dict) -> Optional[Dict]:
+    return parse_listing(record["url"], PageSnapshot(record["snapshot"]))
+
+
+def _api(record: Dict) -> Optional[Dict]:
+    return parse_api_listing(record["url"], record["payloads"])
+
+
+# Parser name -> (replay function, which recordings it can replay)
+PARSERS: Dict[str, tuple] = {
+    "cli": (_cli, lambda record: record.get("snapshot") is not None),
+    "gui": (_gui, lambda record: record.get("snapshot") is not None),
+    "api": (_api, lambda record: bool(record.get("payloads"))),
+}
+
+
+def fill_rates(results: List[Optional[Dict]]) -> Dict[str, float]:
+    """Share of replayed listings where each field was extracted (not None / not False)"""
+    if not results:
+        return {}
+    fields = list(empty_listing())
+    return {
+        field: sum(1 for data in results if data and data.get(field) not in (None, False)) / len(results)
+        for field in fields
+    }
+
+
+def run_benchmark(records: List[Dict], parser: str, repeat: int = 1) -> Optional[Dict]:
+    """Replay records through one parser repeat times; None when no recording fits the parser"""
+    replay, usable = PARSERS[parser]
+    records = [record for record in records if usable(record)]
+    if not records:
+        return None
+
+    extraction_stats.reset()
+    results = []
+    start = time.perf_counter()
+    for _ in range(max(1, repeat)):
+        # A fresh PageSnapshot per replay, so derived views are rebuilt as they are live
+        results = [replay(record) for record in records]
+    elapsed = time.perf_counter() - start
+
+    fields = {name: stats["mean_ms"] for name, stats in extraction_stats.stats().items() if name != "fetch"}
+    return {
+        "parser": parser,
+        "fixtures": len(records),
+        "listings": len(records) * max(1, repeat),
+        "parsed": sum(1 for data in results if data),
+        "elapsed": elapsed,
+        "per_sec": len(records) * max(1, repeat) / elapsed if elapsed else 0.0,
+        "field_ms": fields,
+        "fill": fill_rates(results),
+    }
+
+
+def report(result: Dict, out: Callable = print):
+    out(f"[{result['parser']}] {result['listings']} listings in {result['elapsed']:.2f}s "
+        f"-> {result['per_sec']:.0f} listings/s ({result['parsed']}/{result['fixtures']} fixtures parsed)")
+    if result["field_ms"]:
+        out("   Per-field mean: " + ", ".join(f"{name} {ms:.2f} ms" for name, ms in
+                                             sorted(result["field_ms"].items(), key=lambda item: -item[1])))
+    out("   Fill rate: " + ", ".join(f"{field} {rate:.0%}" for field, rate in result["fill"].items()))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark listing extraction on recorded fixtures")
+    parser.add_argument("fixtures", nargs="?", default=FIXTURE_DIR, help="FixtureStore directory")
+    parser.add_argument("--repeat", type=int, default=3, help="Replays of the whole corpus per parser")
+    parser.add_argument("--parser", choices=sorted(PARSERS), action="append",
+                        help="Parser(s) to run (default: all)")
+    args = parser.parse_args()
+
+    records = list(FixtureStore(args.fixtures).load("listing"))
+    if not records:
+        print(f"[X] No listing fixtures in {args.fixtures}")
+        return
+    print(f"[*] {len(records)} listing fixtures from {args.fixtures}")
+
+    for name in args.parser or sorted(PARSERS):
+        result = run_benchmark(records, name, args.repeat)
+        if result is None:
+            print(f"[{name}] no usable fixtures")
+        else:
+            report(result)
+
+
+if __name__ == "__main__":
+    main()
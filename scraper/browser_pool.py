@@ -0,0 +1,206 @@
+"""Pool of long-lived Chromium workers for parallel listing scrapes.
+
+Each worker thread owns one Playwright instance and one browser. Playwright's
+sync API is bound to the thread that started it, so a browser is never
+shared across threads. A task gets a fresh context and page (cheap, and
+cookies and state stay isolated between listings), while the browser
+process itself is reused. A browser is relaunched after `max_pages` tasks,
+or when it crashes. A worker whose Playwright fails to start exits; once no
+worker is left, queued and later tasks fail with that startup error instead
+of waiting forever.
+
+submit() returns concurrent.futures.Future objects, so callers can keep
+using as_completed() exactly as with a ThreadPoolExecutor.
+"""
+import queue
+import threading
+from concurrent.futures import Future
+from typing import Callable, Dict, List, Optional
+
+from playwright.sync_api import sync_playwright
+
+from request_blocking import RequestBlocker
+
+LAUNCH_ARGS = ['--no-sandbox', '--disable-blink-features=AutomationControlled', '--disable-dev-shm-usage']
+
+CONTEXT_OPTIONS = {
+    'viewport': {'width': 1920, 'height': 1080},
+    'user_agent': "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.0.0.0 Safari/537.36",
+    'locale': "en-US",
+}
+
+STEALTH_SCRIPT = """
+    Object.defineProperty(navigator, 'webdriver', {get: () => undefined});
+    Object.defineProperty(navigator, 'plugins', {get: () => [1, 2, 3, 4, 5]});
+"""
+
+_STOP = object()
+
+
+class BrowserPool:
+    """Fixed set of worker threads, each reusing one browser across many pages"""
+
+    def __init__(self, workers: int = 3, max_pages: int = 50, launch_args: Optional[List[str]] = None,
+                 context_options: Optional[Dict] = None, init_script: str = STEALTH_SCRIPT, log: Callable = None,
+                 blocker: Optional[RequestBlocker] = None):
+        self.workers = max(1, workers)
+        self.max_pages = max_pages
+        self.launch_args = launch_args or LAUNCH_ARGS
+        self.context_options = context_options or CONTEXT_OPTIONS
+        self.init_script = init_script
+        self.log = log or (lambda message: None)
+        self.blocker = blocker
+
+        self.launches = 0
+        self.crashes = 0
+        self._lock = threading.Lock()
+        self._tasks = queue.Queue()
+        self._closed = False
+        self._alive = self.workers
+        self._startup_error: Optional[BaseException] = None
+        self._threads = [
+            threading.Thread(target=self._worker, name=f"browser-{i + 1}", daemon=True)
+            for i in range(self.workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, fn: Callable, *args, **kwargs) -> Future:
+        """Queue fn(page, *args, **kwargs); the page is opened by whichever worker picks it up"""
+        if self._closed:
+            raise RuntimeError("cannot submit to a closed BrowserPool")
+        future = Future()
+        with self._lock:
+            if not self._alive:
+                raise RuntimeError("no BrowserPool worker could start") from self._startup_error
+            self._tasks.put((future, fn, args, kwargs))
+        return future
+
+    def shutdown(self, wait: bool = True, cancel_futures: bool = False):
+        """Stop the workers; each one closes its own browser on the way out"""
+        if cancel_futures:
+            while True:
+                try:
+                    task = self._tasks.get_nowait()
+                except queue.Empty:
+                    break
+                if task is not _STOP:
+                    task[0].cancel()
+        if not self._closed:
+            self._closed = True
+            for _ in self._threads:
+                self._tasks.put(_STOP)
+        if wait:
+            for thread in self._threads:
+                thread.join()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"workers": self.workers, "launches": self.launches, "crashes": self.crashes}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown(wait=True)
+
+    def _launch(self, playwright):
+        browser = playwright.chromium.launch(headless=True, args=self.launch_args)
+        with self._lock:
+            self.launches += 1
+        return browser
+
+    def _run_task(self, browser, fn, args, kwargs):
+        context = browser.new_context(**self.context_options)
+        try:
+            if self.blocker:
+                self.blocker.attach(context)
+            if self.init_script:
+                context.add_init_script(self.init_script)
+            page = context.new_page()
+            return fn(page, *args, **kwargs)
+        finally:
+            try:
+                context.close()
+            except:
+                pass
+
+    def _worker(self):
+        try:
+            self._serve()
+        except Exception as e:
+            self.log(f"{threading.current_thread().name}: worker stopped ({str(e)[:80]})")
+            self._worker_failed(e)
+
+    def _worker_failed(self, error: BaseException):
+        """A worker died at startup; the last one to go fails every queued task"""
+        with self._lock:
+            self._alive -= 1
+            self._startup_error = error
+            if self._alive:
+                return
+            while True:
+                try:
+                    task = self._tasks.get_nowait()
+                except queue.Empty:
+                    break
+                if task is not _STOP and task[0].set_running_or_notify_cancel():
+                    task[0].set_exception(error)
+
+    def _serve(self):
+        name = threading.current_thread().name
+        with sync_playwright() as p:
+            browser = None
+            pages = 0
+            try:
+                while True:
+                    task = self._tasks.get()
+                    if task is _STOP:
+                        break
+                    future, fn, args, kwargs = task
+                    if not future.set_running_or_notify_cancel():
+                        continue
+
+                    # Recycle the browser after max_pages tasks or when it has died
+                    if browser is not None and (pages >= self.max_pages or not browser.is_connected()):
+                        try:
+                            browser.close()
+                        except:
+                            pass
+                        browser = None
+                    if browser is None:
+                        try:
+                            browser = self._launch(p)
+                        except Exception as e:
+                            future.set_exception(e)
+                            continue
+                        pages = 0
+
+                    try:
+                        result = self._run_task(browser, fn, args, kwargs)
+                    except Exception as e:
+                        if browser.is_connected():
+                            future.set_exception(e)
+                            pages += 1
+                            continue
+                        # Browser crashed mid-task: relaunch and retry the task once
+                        with self._lock:
+                            self.crashes += 1
+                        self.log(f"{name}: browser crashed, relaunching")
+                        browser = None
+                        try:
+                            browser = self._launch(p)
+                            pages = 0
+                            result = self._run_task(browser, fn, args, kwargs)
+                        except Exception as retry_error:
+                            future.set_exception(retry_error)
+                            pages += 1
+                            continue
+                    future.set_result(result)
+                    pages += 1
+            finally:
+                if browser is not None:
+                    try:
+                        browser.close()
+                    except:
+                        pass
@@ -0,0 +1,189 @@
+"""Multi-city scheduling: parallel search discovery feeding one detail pool.
+
+Search discovery for several cities runs at once on a small BrowserPool of
+`discovery_workers` browsers. Each discovery emits listing URLs as it
+scrolls. They are queued per city straight away, so the shared detail pool
+starts on a city's listings while its search page is still scrolling.
+
+* Quotas: a city accepts at most `quota` distinct listing URLs.
+* Fairness: at most `max_in_flight` detail tasks sit in the pool at a time,
+  and the next slot always goes to the city with the fewest tasks in flight.
+  A city that discovers quickly cannot crowd out the others.
+* Streaming: every result goes to on_result as soon as it is scraped, so
+  nothing finished is lost to a Stop or a crash. Search-card prices are only
+  known once a city's discovery finishes, so results delivered before then
+  are passed to on_search_price afterwards. Only the per-city completion
+  bookkeeping waits for the search.
+
+The dispatcher is event driven. URL emits, finished detail tasks and
+finished discoveries all arrive on one queue.
+"""
+import queue
+import threading
+from collections import deque
+from typing import Callable, Dict, Iterable, List, Optional
+
+from browser_pool import BrowserPool
+from request_blocking import RequestBlocker
+
+
+class MultiCityScheduler:
+    """Discovers listings for many cities concurrently and pipelines them into one shared detail pool
+
+    discover(page, city, emit) runs a city's search phase on a pooled page,
+    calls emit(urls) whenever it finds listing URLs, and returns the search
+    prices as {url: price}. room(city) tells it how many more URLs the city's
+    quota accepts. scrape(page, url) returns the listing record or None.
+    """
+
+    def __init__(self, discover: Callable, scrape: Callable, quota: int = 50, detail_workers: int = 3,
+                 discovery_workers: int = 2, in_flight_per_worker: int = 2, max_pages: int = 50,
+                 blocker: Optional[RequestBlocker] = None, log: Callable = None,
+                 should_stop: Optional[Callable[[], bool]] = None):
+        self.discover = discover
+        self.scrape = scrape
+        self.quota = quota
+        self.detail_workers = max(1, detail_workers)
+        self.discovery_workers = max(1, discovery_workers)
+        self.max_in_flight = self.detail_workers * max(1, in_flight_per_worker)
+        self.max_pages = max_pages
+        self.blocker = blocker
+        self.log = log or (lambda message: None)
+        self.should_stop = should_stop or (lambda: False)
+
+        self.stats = {"discovered": 0, "scraped": 0, "failed": 0}
+        self._lock = threading.Lock()
+        self._events = queue.Queue()
+        self._cities: Dict[str, Dict] = {}
+        self._in_flight = {}
+        self._pools: List[BrowserPool] = []
+
+    def run(self, cities: Iterable[str], on_result: Callable[[str, str, Optional[Dict], Optional[int]], Optional[Dict]],
+            on_city_done: Optional[Callable[[str, int], None]] = None,
+            on_search_price: Optional[Callable[[str, str, Dict, int], None]] = None):
+        """Blocking: scrape every city
+
+        on_result(city, url, data, search_price) gets each result right away and returns the
+        record kept (search_price is None while the city is still searching).
+        on_search_price(city, url, record, price) later gives those records their search-card price.
+        on_city_done(city, count) runs once a city has no work left.
+        """
+        cities = list(dict.fromkeys(cities))
+        self._cities = {
+            city: {"pending": deque(), "seen": set(), "in_flight": 0, "searching": True,
+                   "prices": {}, "unpriced": [], "results": 0, "done": False}
+            for city in cities
+        }
+        discovery_pool = BrowserPool(workers=min(self.discovery_workers, len(cities)), max_pages=self.max_pages,
+                                     log=self.log, blocker=self.blocker)
+        detail_pool = BrowserPool(workers=self.detail_workers, max_pages=self.max_pages, log=self.log,
+                                  blocker=self.blocker)
+        self._pools = [discovery_pool, detail_pool]
+
+        for city in cities:
+            future = discovery_pool.submit(self.discover, city, lambda urls, city=city: self._add_urls(city, urls))
+            future.add_done_callback(lambda f, city=city: self._events.put(("searched", city, f)))
+
+        try:
+            while not self.should_stop():
+                self._dispatch(detail_pool)
+                if all(state["done"] for state in self._cities.values()):
+                    break
+                try:
+                    event = self._events.get(timeout=0.5)
+                except queue.Empty:
+                    continue
+
+                if event[0] == "searched":
+                    _, city, future = event
+                    self._searched(city, future, on_search_price)
+                elif event[0] == "scraped":
+                    _, future = event
+                    city, url = self._in_flight.pop(future)
+                    self._scraped(city, url, future, on_result, on_search_price)
+                else:
+                    continue  # "found": new URLs, picked up by the next _dispatch
+                self._finish_cities(on_city_done)
+        finally:
+            self.shutdown(wait=False, cancel_futures=True)
+
+    def shutdown(self, wait: bool = True, cancel_futures: bool = False):
+        """Stop both pools (same signature as BrowserPool, so a Stop button can call it)"""
+        for pool in self._pools:
+            pool.shutdown(wait=wait, cancel_futures=cancel_futures)
+
+    def room(self, city: str) -> int:
+        """How many more listing URLs the city's quota accepts"""
+        with self._lock:
+            return max(0, self.quota - len(self._cities[city]["seen"]))
+
+    def _add_urls(self, city: str, urls: Iterable[str]):
+        """emit() for one city: queue new URLs up to the city's quota (called from discovery threads)"""
+        added = 0
+        with self._lock:
+            state = self._cities[city]
+            for url in urls:
+                if len(state["seen"]) >= self.quota:
+                    break
+                if url not in state["seen"]:
+                    state["seen"].add(url)
+                    state["pending"].append(url)
+                    added += 1
+            self.stats["discovered"] += added
+        if added:
+            self._events.put(("found", city))
+
+    def _dispatch(self, pool: BrowserPool):
+        """Fill free in-flight slots, always from the city with the fewest detail tasks running"""
+        while len(self._in_flight) < self.max_in_flight:
+            with self._lock:
+                waiting = [(state["in_flight"], city) for city, state in self._cities.items() if state["pending"]]
+                if not waiting:
+                    return
+                _, city = min(waiting, key=lambda item: item[0])
+                state = self._cities[city]
+                url = state["pending"].popleft()
+                state["in_flight"] += 1
+            future = pool.submit(self.scrape, url)
+            self._in_flight[future] = (city, url)
+            future.add_done_callback(lambda f: self._events.put(("scraped", f)))
+
+    def _searched(self, city: str, future, on_search_price: Optional[Callable]):
+        state = self._cities[city]
+        try:
+            state["prices"] = future.result() or {}
+        except Exception as e:
+            self.log(f"{city}: search failed ({str(e)[:80]})")
+        state["searching"] = False
+        self.log(f"{city}: search complete, {len(state['seen'])} listings queued")
+        # Results delivered before the search finished can now get their search-card prices
+        unpriced, state["unpriced"] = state["unpriced"], []
+        for url, data in unpriced:
+            price = state["prices"].get(url)
+            if price:
+                on_search_price(city, url, data, price)
+
+    def _scraped(self, city: str, url: str, future, on_result: Callable, on_search_price: Optional[Callable]):
+        state = self._cities[city]
+        with self._lock:
+            state["in_flight"] -= 1
+        data = None
+        if not future.cancelled():
+            try:
+                data = future.result()
+            except Exception as e:
+                self.log(f"{city}: {url} failed ({str(e)[:80]})")
+        self.stats["scraped" if data else "failed"] += 1
+        data = on_result(city, url, data, state["prices"].get(url))
+        if data:
+            state["results"] += 1
+            if state["searching"] and on_search_price:
+                state["unpriced"].append((url, data))
+
+    def _finish_cities(self, on_city_done: Optional[Callable]):
+        for city, state in self._cities.items():
+            if state["done"] or state["searching"] or state["pending"] or state["in_flight"]:
+                continue
+            state["done"] = True
+            if on_city_done:
+                on_city_done(city, state["results"])
@@ -0,0 +1,223 @@
+"""Search discovery split across map tiles and price bands.
+
+A single Airbnb search stops at a few hundred results however long it is
+scrolled, so a big city never reaches a large max_listings target.
+plan_sub_searches() splits one search into sub-searches that each stay
+under that cap:
+
+* map tiles: the city's bounding box (CITY_BOUNDS) cut into a rows x cols
+  grid, searched with search_by_map and sw_/ne_ coordinates;
+* price bands: price_min/price_max ranges (PRICE_BANDS).
+
+DiscoveryPlanner runs the sub-searches in parallel on a BrowserPool. Each
+one follows its results' "Next" pagination cursor page by page. Every
+page's links are unioned into one ListingUrlSet, so a listing found by
+several tiles or bands appears once. Coverage grows with the number of
+workers rather than with scroll time.
+
+With capture_api, each page's listings and exact prices come from the
+search API responses (response_capture); its DOM links are only used when
+no response was captured.
+"""
+import re
+import threading
+from concurrent.futures import as_completed
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urljoin, urlsplit, urlunsplit
+
+from browser_pool import BrowserPool
+from fixtures import FixtureStore
+from listing_parser import ListingUrlSet, listing_hrefs
+from readiness import PageReadiness
+from response_capture import SEARCH_API_PATTERN, ResponseCapture, parse_api_search
+from request_blocking import RequestBlocker
+
+# (sw_lat, sw_lng, ne_lat, ne_lng) around each city of the dataset
+CITY_BOUNDS = {
+    "Amsterdam": (52.28, 4.73, 52.43, 5.07),
+    "Athens": (37.89, 23.64, 38.07, 23.85),
+    "Barcelona": (41.32, 2.05, 41.47, 2.23),
+    "Berlin": (52.34, 13.09, 52.68, 13.76),
+    "Budapest": (47.35, 18.92, 47.61, 19.34),
+    "Lisbon": (38.69, -9.23, 38.80, -9.09),
+    "London": (51.28, -0.51, 51.69, 0.33),
+    "Paris": (48.815, 2.224, 48.902, 2.470),
+    "Rome": (41.80, 12.37, 42.00, 12.62),
+    "Vienna": (48.12, 16.18, 48.32, 16.58),
+}
+
+# Nightly price_min / price_max in the search currency (None: open-ended)
+PRICE_BANDS = [(None, 60), (60, 100), (100, 150), (150, 250), (250, None)]
+
+NEXT_PAGE_SELECTOR = 'nav[aria-label*="pagination" i] a[aria-label="Next"]'
+
+_HREF_JS = "link => link.getAttribute('href')"
+
+
+def search_city(search_url: str) -> Optional[str]:
+    """City of a /s/<city>/homes search URL ("Amsterdam" for /s/amsterdam--netherlands/homes)"""
+    city_match = re.search(r'/s/([^/]+)/homes', search_url)
+    if not city_match:
+        return None
+    return city_match.group(1).split('--')[0].replace('-', ' ').replace('%20', ' ').title()
+
+
+def with_params(url: str, **params) -> str:
+    """url with query parameters set; None removes a parameter"""
+    parts = urlsplit(url)
+    query = dict(parse_qsl(parts.query))
+    for name, value in params.items():
+        if value is None:
+            query.pop(name, None)
+        else:
+            query[name] = str(value)
+    return urlunsplit(parts._replace(query=urlencode(query)))
+
+
+def tile_bounds(bounds: Tuple[float, float, float, float], rows: int, cols: int) -> List[Tuple[float, float, float, float]]:
+    """Cut (sw_lat, sw_lng, ne_lat, ne_lng) into a rows x cols grid of boxes"""
+    sw_lat, sw_lng, ne_lat, ne_lng = bounds
+    lat_step = (ne_lat - sw_lat) / rows
+    lng_step = (ne_lng - sw_lng) / cols
+    return [
+        (sw_lat + row * lat_step, sw_lng + col * lng_step, sw_lat + (row + 1) * lat_step, sw_lng + (col + 1) * lng_step)
+        for row in range(rows) for col in range(cols)
+    ]
+
+
+def plan_sub_searches(search_url: str, grid: Optional[Tuple[int, int]] = (2, 2),
+                      price_bands: Iterable[Tuple[Optional[int], Optional[int]]] = PRICE_BANDS) -> List[str]:
+    """Sub-search URLs covering one search: map tiles (cities in CITY_BOUNDS only) x price bands"""
+    bounds = CITY_BOUNDS.get(search_city(search_url) or "")
+    tiles = tile_bounds(bounds, *grid) if bounds and grid else [None]
+    bands = list(price_bands) or [(None, None)]
+
+    sub_urls = []
+    for tile in tiles:
+        tile_params = {}
+        if tile:
+            sw_lat, sw_lng, ne_lat, ne_lng = tile
+            tile_params = {"search_by_map": "true", "sw_lat": round(sw_lat, 5), "sw_lng": round(sw_lng, 5),
+                           "ne_lat": round(ne_lat, 5), "ne_lng": round(ne_lng, 5)}
+        for price_min, price_max in bands:
+            sub_urls.append(with_params(search_url, price_min=price_min, price_max=price_max, **tile_params))
+    return sub_urls
+
+
+class DiscoveryPlanner:
+    """Runs sub-searches in parallel, following pagination cursors, and unions their listings by id
+
+    card_prices(page, page_urls), if given, returns {url: price} from the
+    search cards of the current results page (page_urls in card order).
+    """
+
+    def __init__(self, workers: int = 3, max_pages_per_search: int = 15, readiness: Optional[PageReadiness] = None,
+                 blocker: Optional[RequestBlocker] = None, recorder: Optional[FixtureStore] = None,
+                 card_prices: Optional[Callable] = None, max_pages: int = 50, log: Callable = None,
+                 should_stop: Optional[Callable[[], bool]] = None, capture_api: bool = False):
+        self.workers = max(1, workers)
+        self.max_pages_per_search = max_pages_per_search
+        self.readiness = readiness or PageReadiness()
+        self.blocker = blocker
+        self.recorder = recorder
+        self.card_prices = card_prices
+        self.max_pages = max_pages
+        self.log = log or (lambda message: None)
+        self.should_stop = should_stop or (lambda: False)
+        self.capture_api = capture_api
+
+        self.stats = {"sub_searches": 0, "pages": 0}
+        self._lock = threading.Lock()
+        self._found = ListingUrlSet()
+        self._prices: Dict[str, int] = {}
+
+    def run(self, sub_urls: List[str], max_listings: int,
+            emit: Optional[Callable[[List[str]], None]] = None) -> Tuple[List[str], Dict[str, int]]:
+        """Blocking: discover up to max_listings listings; returns (listing_urls, price_data)
+
+        emit, if given, receives each results page's new listing URLs as soon as they are found.
+        """
+        self._found = ListingUrlSet(limit=max_listings)
+        self._prices = {}
+        if not sub_urls:
+            return [], {}
+
+        pool = BrowserPool(workers=min(self.workers, len(sub_urls)), max_pages=self.max_pages, log=self.log,
+                           blocker=self.blocker)
+        try:
+            futures = [pool.submit(self._paginate, url, emit) for url in sub_urls]
+            for future in as_completed(futures):
+                try:
+                    future.result()
+                except Exception as e:
+                    self.log(f"Sub-search failed ({str(e)[:80]})")
+                if self._done():
+                    break
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+        with self._lock:
+            listing_urls = self._found.urls
+            price_data = {url: self._prices[url] for url in listing_urls if url in self._prices}
+        self.log(f"Discovery: {len(listing_urls)} listings from {self.stats['sub_searches']} sub-searches, "
+                 f"{self.stats['pages']} result pages")
+        return listing_urls, price_data
+
+    def _done(self) -> bool:
+        with self._lock:
+            return self._found.full() or self.should_stop()
+
+    def _paginate(self, page, url: str, emit: Optional[Callable]):
+        """One sub-search: every results page, following the Next cursor until it runs out"""
+        with self._lock:
+            self.stats["sub_searches"] += 1
+        capture = ResponseCapture(patterns=(SEARCH_API_PATTERN,)).attach(page) if self.capture_api else None
+        for _ in range(self.max_pages_per_search):
+            if not url or self._done():
+                return
+            if capture:
+                capture.clear()
+            page.goto(url, wait_until="domcontentloaded", timeout=45000)
+            self.readiness.wait_for_search(page)
+
+            # Cards below the fold attach lazily: one scroll, then one href round trip
+            hrefs = listing_hrefs(page)
+            page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
+            self.readiness.wait_for_more(page, len(hrefs))
+            hrefs = listing_hrefs(page)
+
+            # API capture: the search responses' listings and exact prices replace the DOM links
+            page_urls, prices = [], {}
+            if capture:
+                api_urls = ListingUrlSet()
+                for result in parse_api_search(capture.payloads()):
+                    for listing_url in api_urls.add([result["url"]]):
+                        if result["price"]:
+                            prices[listing_url] = result["price"]
+                page_urls = api_urls.urls
+            if not page_urls:
+                page_urls = ListingUrlSet().add(hrefs)
+                prices = self.card_prices(page, page_urls) if self.card_prices else {}
+            if not page_urls:
+                return
+
+            with self._lock:
+                self.stats["pages"] += 1
+                new_urls = self._found.add(page_urls)
+                for listing_url, price in prices.items():
+                    self._prices.setdefault(listing_url, price)
+            if self.recorder:
+                self.recorder.save_search(url, page.content(), capture.payloads() if capture else None)
+            if emit and new_urls:
+                emit(new_urls)
+
+            url = self._next_page(page)
+
+    @staticmethod
+    def _next_page(page) -> Optional[str]:
+        """The results' Next link (it carries Airbnb's pagination cursor), or None on the last page"""
+        try:
+            href = page.eval_on_selector(NEXT_PAGE_SELECTOR, _HREF_JS)
+        except:
+            return None
+        return urljoin("https://www.airbnb.com", href) if href else None
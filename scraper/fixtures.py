@@ -0,0 +1,71 @@
+"""Recorded listing and search pages for offline replay.
+
+In record mode the scrapers save every page they parse to a FixtureStore:
+
+* listing pages: the raw snapshot (what snapshot_page returned) plus any
+  captured listing API payloads;
+* search pages: the rendered HTML plus any captured search API payloads.
+
+Each page is one gzip-compressed JSON file, named after listing_id() of its
+URL (the listing id, or a hash of a search URL), under <root>/listing/ and <root>/search/.
+Re-recording a page overwrites its file. benchmark.py replays the store
+through the parsers without a browser or network access.
+"""
+import gzip
+import json
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+from listing_parser import PageSnapshot, listing_id
+
+FIXTURE_DIR = "fixtures"
+
+
+class FixtureStore:
+    """Directory of gzip JSON page recordings; safe to share between worker threads"""
+
+    def __init__(self, root: str = FIXTURE_DIR):
+        self.root = Path(root)
+        self.saved = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(url: str) -> str:
+        # Same id rules as the parsers and the frontier
+        return listing_id(url)
+
+    def _write(self, kind: str, url: str, record: Dict) -> Path:
+        path = self.root / kind / f"{self.key(url)}.json.gz"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        record = dict(record, kind=kind, url=url, recorded_at=datetime.now().isoformat(timespec="seconds"))
+        # Write then rename, so a crash never leaves a truncated fixture behind
+        tmp = path.with_name(path.name + ".tmp")
+        with gzip.open(tmp, "wt", encoding="utf-8") as f:
+            json.dump(record, f, ensure_ascii=False)
+        tmp.replace(path)
+        with self._lock:
+            self.saved += 1
+        return path
+
+    def save_listing(self, url: str, snapshot: Optional[PageSnapshot] = None, payloads: Optional[List] = None) -> Path:
+        return self._write("listing", url, {
+            "snapshot": snapshot.raw if snapshot is not None else None,
+            "payloads": payloads or [],
+        })
+
+    def save_search(self, url: str, html: str, payloads: Optional[List] = None) -> Path:
+        return self._write("search", url, {"html": html, "payloads": payloads or []})
+
+    def load(self, kind: str = "listing") -> Iterator[Dict]:
+        """Every recording of one kind, in file name order"""
+        for path in sorted((self.root / kind).glob("*.json.gz")):
+            try:
+                with gzip.open(path, "rt", encoding="utf-8") as f:
+                    yield json.load(f)
+            except (OSError, ValueError):
+                continue
+
+    def summary(self) -> str:
+        return f"Recorded {self.saved} pages to {self.root}"
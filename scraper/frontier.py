@@ -0,0 +1,191 @@
+"""Persistent URL frontier: resumable scrape checkpoints in SQLite.
+
+Every listing URL a search turns up is recorded once, keyed on its listing
+id, with a status that moves
+
+    discovered -> in_flight -> done | failed (with the reason)
+
+plus an attempt count and discovered/leased/finished timestamps. Searches
+add() to the frontier and detail workers lease() from it, so a run that
+crashed or was stopped resumes where it left off:
+
+* done entries younger than `max_age_hours` (the TTL) are fresh and never
+  leased again; older ones are leased again to refresh them;
+* incremental runs also refresh a fresh entry early when its search-card
+  price no longer matches the realSum stored with its last scrape (reprice);
+* failed entries are retried until they have used `max_attempts` since
+  their last successful scrape;
+* entries a crashed or stopped run left in_flight go back to discovered
+  when the frontier is next opened.
+
+The database runs in WAL mode, so the GUI's worker threads (one connection,
+one lock) and a second process reading the progress never block each other.
+"""
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
+
+from listing_parser import listing_key
+
+FRONTIER_FILE = "frontier.db"
+
+DISCOVERED = "discovered"
+IN_FLIGHT = "in_flight"
+DONE = "done"
+FAILED = "failed"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS frontier (
+    listing_id    TEXT PRIMARY KEY,
+    url           TEXT NOT NULL,
+    scope         TEXT NOT NULL DEFAULT '',
+    status        TEXT NOT NULL DEFAULT 'discovered',
+    attempts      INTEGER NOT NULL DEFAULT 0,
+    reason        TEXT,
+    discovered_at REAL NOT NULL,
+    leased_at     REAL,
+    finished_at   REAL,
+    price         INTEGER
+);
+CREATE INDEX IF NOT EXISTS frontier_scope_status ON frontier (scope, status);
+"""
+
+
+class UrlFrontier:
+    """SQLite-backed listing frontier; safe to share between worker threads"""
+
+    def __init__(self, path: str = FRONTIER_FILE, max_age_hours: float = 24.0, max_attempts: int = 3):
+        self.path = path
+        self.max_age = max_age_hours * 3600
+        self.max_attempts = max(1, max_attempts)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(_SCHEMA)
+        # Frontiers created before prices were stored
+        if "price" not in {row[1] for row in self._db.execute("PRAGMA table_info(frontier)")}:
+            self._db.execute("ALTER TABLE frontier ADD COLUMN price INTEGER")
+        self.recovered = self._recover()
+
+    def _recover(self) -> int:
+        """Entries a crashed or stopped run left in flight go back to discovered (the attempt is not counted)"""
+        with self._lock:
+            return self._db.execute(
+                "UPDATE frontier SET status = ?, attempts = MAX(attempts - 1, 0) WHERE status = ?",
+                (DISCOVERED, IN_FLIGHT),
+            ).rowcount
+
+    def add(self, urls: Iterable[str], scope: str = "") -> int:
+        """Record discovered URLs; returns how many were new
+
+        Known listings keep their status and move to the scope of the search that found them last.
+        """
+        now = time.time()
+        rows = [(listing_key(url), url.split('?')[0], scope or "", now) for url in urls]
+        with self._lock:
+            before = self._db.execute("SELECT COUNT(*) FROM frontier").fetchone()[0]
+            self._db.executemany(
+                "INSERT INTO frontier (listing_id, url, scope, discovered_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (listing_id) DO UPDATE SET scope = excluded.scope", rows
+            )
+            return self._db.execute("SELECT COUNT(*) FROM frontier").fetchone()[0] - before
+
+    def reprice(self, prices: Dict[str, Optional[int]]) -> int:
+        """Mark done listings whose search-card price differs from their stored realSum as due again
+
+        prices maps listing URL -> search-card price; returns how many listings changed.
+        """
+        rows = [(DISCOVERED, price, listing_key(url), DONE, price)
+                for url, price in prices.items() if price]
+        with self._lock:
+            before = self._db.total_changes
+            self._db.executemany(
+                "UPDATE frontier SET status = ?, reason = 'price ' || price || ' -> ' || ? "
+                "WHERE listing_id = ? AND status = ? AND price IS NOT NULL AND price != ?", rows
+            )
+            return self._db.total_changes - before
+
+    def lease(self, urls: Optional[Iterable[str]] = None, scope: Optional[str] = None,
+              limit: Optional[int] = None) -> List[str]:
+        """Mark due entries in flight and return their URLs, oldest discovery first
+
+        An entry is due when it was never scraped, its last scrape is older than
+        max_age_hours, its price changed (reprice), or it failed with attempts left.
+        urls narrows the lease to those listings (the scrapers pass what the current
+        search found, as search URLs change between runs), scope to one search.
+        """
+        now = time.time()
+        query = ("SELECT listing_id, url FROM frontier WHERE "
+                 "(status = ? OR (status = ? AND finished_at < ?) OR (status = ? AND attempts < ?))")
+        params = [DISCOVERED, DONE, now - self.max_age, FAILED, self.max_attempts]
+        if scope is not None:
+            query += " AND scope = ?"
+            params.append(scope)
+        if urls is not None:
+            keys = list(dict.fromkeys(listing_key(url) for url in urls))
+            if not keys:
+                return []
+            query += f" AND listing_id IN ({', '.join('?' * len(keys))})"
+            params.extend(keys)
+        query += " ORDER BY discovered_at, rowid"
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(max(0, limit))
+
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                due = self._db.execute(query, params).fetchall()
+                self._db.executemany(
+                    "UPDATE frontier SET status = ?, attempts = attempts + 1, leased_at = ? WHERE listing_id = ?",
+                    [(IN_FLIGHT, now, key) for key, _ in due],
+                )
+                self._db.execute("COMMIT")
+            except Exception:
+                self._db.execute("ROLLBACK")
+                raise
+        return [url for _, url in due]
+
+    def done(self, url: str, price: Optional[int] = None):
+        """A scraped listing; price is its realSum, compared with later search-card prices"""
+        with self._lock:
+            # attempts counts tries since the last success, so TTL refreshes never use up the retries
+            self._db.execute(
+                "UPDATE frontier SET status = ?, reason = NULL, attempts = 0, finished_at = ?, "
+                "price = COALESCE(?, price) WHERE listing_id = ?",
+                (DONE, time.time(), price, listing_key(url)),
+            )
+
+    def failed(self, url: str, reason: str = "no listing data"):
+        with self._lock:
+            self._db.execute(
+                "UPDATE frontier SET status = ?, reason = ?, finished_at = ? WHERE listing_id = ?",
+                (FAILED, reason[:200], time.time(), listing_key(url)),
+            )
+
+    def counts(self, scope: Optional[str] = None) -> Dict[str, int]:
+        query = "SELECT status, COUNT(*) FROM frontier"
+        params = []
+        if scope is not None:
+            query += " WHERE scope = ?"
+            params.append(scope)
+        with self._lock:
+            rows = dict(self._db.execute(query + " GROUP BY status", params).fetchall())
+        return {status: rows.get(status, 0) for status in (DISCOVERED, IN_FLIGHT, DONE, FAILED)}
+
+    def summary(self, scope: Optional[str] = None) -> str:
+        counts = self.counts(scope)
+        return (f"Frontier: {counts[DONE]} done, {counts[FAILED]} failed, "
+                f"{counts[DISCOVERED] + counts[IN_FLIGHT]} pending ({self.path})")
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,857 @@
+"""Pure parsing of Airbnb listing pages.
+
+A loaded listing page is captured once into a PageSnapshot. One
+page.evaluate() round trip (snapshot_page, or snapshot_page_async for the
+async API) returns the HTML, body text and the few element texts the
+parsers read. Everything else is derived in memory and cached on the
+snapshot: script contents, lowercased text, the embedded JSON pool and a
+JsonIndex over it, so every JSON field lookup is a dict hit.
+
+The parsers are lists of field extractors that each fill part of the record
+from the snapshot, using one table of precompiled rules (patterns and
+amenity keywords) over a single lowercased copy of the page text. They
+never touch the browser, so the sync CLI/GUI scrapers and the async engine
+share them. Each extractor's run time is kept on the snapshot
+(snapshot.timings), and extraction_stats aggregates them over a run.
+"""
+import hashlib
+import json
+import re
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional
+
+PRICE_SELECTORS = [
+    'span._1y74zjx',
+    'span._tyxjp1',
+    'div._1jo4hgw span',
+    'span[class*="price"]',
+]
+
+AMENITY_SELECTORS = [
+    '[data-section-id="AMENITIES_DEFAULT"] div[role="listitem"]',
+    'div[data-testid="amenity-row"]',
+]
+
+RATING_SELECTOR = 'span[aria-label*="rating"]'
+
+SCRIPT_PATTERN = re.compile(r'<script[^>]*>(.*?)</script>', re.DOTALL | re.IGNORECASE)
+
+
+def empty_listing() -> Dict:
+    """Listing record with every field at its default"""
+    return {
+        # Price & Room Info
+        "realSum": None,
+        "room_type": None,
+        "room_shared": False,
+        "room_private": False,
+        "person_capacity": None,
+        "host_is_superhost": False,
+        "multi": False,
+        "biz": False,
+
+        # Location
+        "city": None,
+        "lat": None,
+        "lng": None,
+
+        # Ratings
+        "cleanliness_rating": None,
+        "guest_satisfaction_overall": None,
+
+        # Property Details
+        "bedrooms": None,
+        "beds": None,
+        "bathrooms": None,
+
+        # Amenities
+        "wifi": False,
+        "kitchen": False,
+        "air_conditioning": False,
+        "parking": False,
+        "tv": False,
+        "heating": False,
+    }
+
+
+# ═══════════════════════════════════════════════
+# PAGE SNAPSHOTS
+# ═══════════════════════════════════════════════
+
+# Everything the parsers read from the live page, gathered in one evaluate() call
+_SNAPSHOT_JS = """({amenitySelectors, priceSelectors, ratingSelector}) => {
+    const h1 = document.querySelector('h1');
+    const rating = document.querySelector(ratingSelector);
+    let amenities = [];
+    for (const selector of amenitySelectors) {
+        const items = Array.from(document.querySelectorAll(selector))
+            .map(el => el.innerText.trim().toLowerCase())
+            .filter(Boolean);
+        if (items.length) { amenities = items; break; }
+    }
+    return {
+        title: document.title,
+        h1: h1 ? h1.innerText.trim() : '',
+        h2: Array.from(document.querySelectorAll('h2')).map(el => el.innerText.trim()),
+        body_text: document.body ? document.body.innerText : '',
+        html: document.documentElement.outerHTML,
+        rating_label: rating ? (rating.getAttribute('aria-label') || rating.innerText) : null,
+        amenities: amenities,
+        prices: priceSelectors.map(selector => {
+            const el = document.querySelector(selector);
+            return el ? el.innerText : null;
+        }),
+    };
+}"""
+
+_SNAPSHOT_ARGS = {
+    "amenitySelectors": AMENITY_SELECTORS,
+    "priceSelectors": PRICE_SELECTORS,
+    "ratingSelector": RATING_SELECTOR,
+}
+
+
+class PageSnapshot:
+    """In-memory copy of one listing page; derived views are computed once on first use"""
+
+    def __init__(self, raw: Dict, fetch_ms: float = 0.0):
+        self.raw = raw  # as returned by the page, kept for fixture recording
+        self.title = raw.get("title") or ""
+        self.h1 = raw.get("h1") or ""
+        self.h2 = raw.get("h2") or []
+        self.body_text = raw.get("body_text") or ""
+        self.html = raw.get("html") or ""
+        self.rating_label = raw.get("rating_label")
+        self.amenities = raw.get("amenities") or []
+        self.prices = raw.get("prices") or []
+        self.timings = {"fetch": fetch_ms}
+        self._body_lower = None
+        self._scripts = None
+        self._json_pool = None
+        self._json_index = None
+
+    @property
+    def body_lower(self) -> str:
+        if self._body_lower is None:
+            self._body_lower = self.body_text.lower()
+        return self._body_lower
+
+    @property
+    def scripts(self) -> str:
+        """Text of every <script> tag, space-joined (sliced out of the HTML, no extra round trips)"""
+        if self._scripts is None:
+            self._scripts = " ".join(SCRIPT_PATTERN.findall(self.html))
+        return self._scripts
+
+    @property
+    def json_pool(self) -> List[Dict]:
+        if self._json_pool is None:
+            self._json_pool = extract_json_from_page(self.html)
+        return self._json_pool
+
+    @property
+    def json_index(self) -> "JsonIndex":
+        """Key index over json_pool, so field lookups don't re-walk the JSON"""
+        if self._json_index is None:
+            self._json_index = JsonIndex(self.json_pool)
+        return self._json_index
+
+    @contextmanager
+    def timed(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = self.timings.get(name, 0.0) + (time.perf_counter() - start) * 1000
+
+
+def snapshot_page(page) -> PageSnapshot:
+    """Capture a loaded page in one round trip (sync Playwright API)"""
+    start = time.perf_counter()
+    raw = page.evaluate(_SNAPSHOT_JS, _SNAPSHOT_ARGS)
+    return PageSnapshot(raw, (time.perf_counter() - start) * 1000)
+
+
+async def snapshot_page_async(page) -> PageSnapshot:
+    """Capture a loaded page in one round trip (async Playwright API)"""
+    start = time.perf_counter()
+    raw = await page.evaluate(_SNAPSHOT_JS, _SNAPSHOT_ARGS)
+    return PageSnapshot(raw, (time.perf_counter() - start) * 1000)
+
+
+class ExtractionStats:
+    """Per-field extraction time aggregated over every parsed snapshot of a run"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.pages = 0
+            self.total_ms: Dict[str, float] = {}
+            self.max_ms: Dict[str, float] = {}
+
+    def add(self, snapshot: PageSnapshot):
+        with self._lock:
+            self.pages += 1
+            for name, ms in snapshot.timings.items():
+                self.total_ms[name] = self.total_ms.get(name, 0.0) + ms
+                self.max_ms[name] = max(self.max_ms.get(name, 0.0), ms)
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            return {
+                name: {"mean_ms": total / self.pages, "max_ms": self.max_ms[name], "total_ms": total}
+                for name, total in self.total_ms.items()
+            }
+
+    def summary(self) -> str:
+        stats = self.stats()
+        if not stats:
+            return "no pages parsed"
+        slowest = sorted(stats.items(), key=lambda item: -item[1]["total_ms"])
+        return f"{self.pages} pages; " + ", ".join(f"{name} {s['mean_ms']:.1f} ms" for name, s in slowest)
+
+
+extraction_stats = ExtractionStats()
+
+
+# ═══════════════════════════════════════════════
+# JSON HELPERS
+# ═══════════════════════════════════════════════
+
+def extract_json_from_page(page_html: str) -> List[Dict]:
+    """Extract JSON data from script tags in the page"""
+    json_pool = []
+
+    # Extract __NEXT_DATA__ (most reliable for Airbnb)
+    next_data_match = re.search(r'<script[^>]*id="__NEXT_DATA__"[^>]*>(.*?)</script>', page_html, re.DOTALL)
+    if next_data_match:
+        try:
+            data = json.loads(next_data_match.group(1).strip())
+            json_pool.append(data)
+        except:
+            pass
+
+    # Extract application/ld+json
+    for match in re.finditer(r'<script[^>]*type="application/ld\+json"[^>]*>(.*?)</script>', page_html, re.DOTALL):
+        try:
+            data = json.loads(match.group(1).strip())
+            if isinstance(data, dict):
+                json_pool.append(data)
+            elif isinstance(data, list):
+                json_pool.extend([x for x in data if isinstance(x, dict)])
+        except:
+            pass
+
+    # Extract application/json
+    for match in re.finditer(r'<script[^>]*type="application/json"[^>]*>(.*?)</script>', page_html, re.DOTALL):
+        raw = match.group(1).strip()
+        if raw.startswith("{") and raw.endswith("}"):
+            try:
+                json_pool.append(json.loads(raw))
+            except:
+                pass
+
+    return json_pool
+
+
+# Schema field -> JSON keys that carry it, in priority order
+JSON_ALIASES = {
+    "beds": ["beds", "bedCount", "bed_count", "numberOfBeds", "bedsCount"],
+    "bedrooms": ["bedrooms", "bedroomCount", "bedroom_count", "numberOfBedrooms", "bedroomsCount"],
+    "room_type": ["roomType", "room_type", "roomTypeCategory", "roomTypeName", "room_type_category",
+                  "room_type_name", "propertyType", "property_type"],
+}
+
+
+def normalize_key(key: str) -> str:
+    """JSON keys compare case-insensitively, ignoring '_' and '-'"""
+    return key.lower().replace("_", "").replace("-", "")
+
+
+_ALIAS_KEYS = {field: tuple(dict.fromkeys(normalize_key(k) for k in keys)) for field, keys in JSON_ALIASES.items()}
+
+
+class JsonIndex:
+    """Normalized key -> values index over a JSON document, built in one walk.
+
+    Keys are numbered in depth-first search order (a dict's own keys, then
+    its values), so find() returns the same first match a recursive search
+    would, without walking the tree again. Each top-level item of a list
+    (one entry of a JSON pool) is a root and can be searched on its own.
+    """
+
+    def __init__(self, obj):
+        # normalized key -> {root: (order, value)}, first non-None value per root
+        self._first: Dict[str, Dict[int, tuple]] = {}
+        self._order = 0
+        if isinstance(obj, list):
+            for root, item in enumerate(obj):
+                self._walk(item, root)
+        else:
+            self._walk(obj, 0)
+
+    def _walk(self, obj, root: int):
+        if isinstance(obj, dict):
+            for k, v in obj.items():
+                self._order += 1
+                if v is not None:
+                    roots = self._first.setdefault(normalize_key(k), {})
+                    if root not in roots:
+                        roots[root] = (self._order, v)
+            for v in obj.values():
+                self._walk(v, root)
+        elif isinstance(obj, list):
+            for item in obj:
+                self._walk(item, root)
+
+    def find(self, keys, root: Optional[int] = None):
+        """First value under any of keys, or None.
+
+        keys is a JSON_ALIASES field name, a single key or a list of keys.
+        With root, only that pool entry is searched.
+        """
+        if isinstance(keys, str):
+            normalized = _ALIAS_KEYS.get(keys) or (normalize_key(keys),)
+        else:
+            normalized = [normalize_key(k) for k in keys]
+        best = None
+        for key in normalized:
+            roots = self._first.get(key)
+            if not roots:
+                continue
+            hit = roots.get(root) if root is not None else next(iter(roots.values()))
+            if hit and (best is None or hit[0] < best[0]):
+                best = hit
+        return best[1] if best else None
+
+
+def deep_find_in_json(obj, keys: List[str]):
+    """First value under any of keys, searching nested JSON (one-off lookups; build a JsonIndex to reuse)"""
+    return JsonIndex(obj).find(keys)
+
+
+def _normalize_room_type(room_type: str) -> str:
+    rt = room_type.lower()
+    # Normalize to standard types
+    if "entire" in rt and ("home" in rt or "apartment" in rt or "place" in rt):
+        return "Entire home/apt"
+    elif "private room" in rt or "room in" in rt:
+        return "Private room"
+    elif "shared room" in rt:
+        return "Shared room"
+    elif "hotel" in rt:
+        return "Hotel room"
+    return room_type
+
+
+def extract_room_type_from_json(json_pool: List[Dict], index: Optional[JsonIndex] = None) -> Optional[str]:
+    """Extract room type from JSON data (most reliable method)"""
+    index = index or JsonIndex(json_pool)
+
+    # Search for room type in JSON, one pool entry at a time
+    for root in range(len(json_pool)):
+        room_type = index.find("room_type", root)
+        if room_type and isinstance(room_type, str):
+            return _normalize_room_type(room_type)
+
+    # Fallback: search in text fields
+    for root in range(len(json_pool)):
+        for text_key in ["name", "title", "description"]:
+            text = index.find(text_key, root)
+            if text and isinstance(text, str):
+                t = text.lower()
+                if "entire place" in t or "entire home" in t or "entire apartment" in t:
+                    return "Entire home/apt"
+                elif "private room" in t:
+                    return "Private room"
+                elif "shared room" in t:
+                    return "Shared room"
+                elif "hotel room" in t:
+                    return "Hotel room"
+
+    return None
+
+
+# ═══════════════════════════════════════════════
+# EXTRACTION RULES
+# ═══════════════════════════════════════════════
+# Compiled once at import and shared by every parser. Text rules run on
+# snapshot.body_lower, so they need no IGNORECASE.
+
+LISTING_ID_PATTERN = re.compile(r'/rooms/(\d+)')
+
+GUESTS_PATTERN = re.compile(r'(\d+)\s*guest')
+BEDROOMS_PATTERN = re.compile(r'(\d+)\s*bedroom')
+BEDS_PATTERN = re.compile(r'(\d+)\s*bed(?!room)')
+BATHS_PATTERN = re.compile(r'(\d+)\s*bath')
+REVIEWS_PATTERN = re.compile(r'([\d,]+)\s*review')
+
+# Detailed bed/bedroom phrasing ("2 queen beds", "3 beds ·"), tried in order
+BED_DETAIL_PATTERNS = [
+    re.compile(r'(\d+)\s*(?:single|double|queen|king|twin|full)\s*beds?'),
+    re.compile(r'(\d+)\s*beds?\s*·'),
+    re.compile(r'(\d+)\s*beds?\s*•'),
+]
+BEDROOM_DETAIL_PATTERNS = [
+    re.compile(r'(\d+)\s*bedrooms?\s*·'),
+    re.compile(r'(\d+)\s*bedrooms?\s*•'),
+    re.compile(r'(\d+)\s*bedrooms?[^a-z]'),
+]
+
+NIGHT_PRICE_PATTERN = re.compile(r'[\$€£¥₹]\s*([\d,]+)\s*(?:per\s*)?(?:/\s*)?night')
+FIRST_PRICE_PATTERN = re.compile(r'[\$€£]([\d,]+)')
+NIGHT_PRICE_PATTERNS = [
+    re.compile(r'[\$€£]\s*([\d,]+)\s*night'),
+    re.compile(r'[\$€£]\s*([\d,]+)\s*per\s*night'),
+    re.compile(r'([\d,]+)\s*[\$€£]\s*night'),
+]
+PRICE_STRING_PATTERN = re.compile(r'"priceString"\s*:\s*"([^"]+)"')
+NUMBER_PATTERN = re.compile(r'([\d,]+)')
+
+RATING_NUMBER_PATTERN = re.compile(r'([\d\.]+)')
+OVERALL_RATING_PATTERNS = [
+    re.compile(r'([\d\.]+)\s*rating'),
+    re.compile(r'rated\s*([\d\.]+)'),
+    re.compile(r'rating[:\s]*([\d\.]+)'),
+    re.compile(r'★\s*([\d\.]+)'),
+]
+CLEANLINESS_PATTERN = re.compile(r'cleanliness\s*[:\s]*([\d\.]+)')
+
+# (lat, lng) pattern pairs over script contents, most specific last
+_LAT_LNG = [
+    (r'"lat"\s*:\s*([-\d.]+)', r'"lng"\s*:\s*([-\d.]+)'),
+    (r'"latitude"\s*:\s*([-\d.]+)', r'"longitude"\s*:\s*([-\d.]+)'),
+    (r'"pdp_listing_detail".*?"lat"\s*:\s*([-\d.]+)', r'"pdp_listing_detail".*?"lng"\s*:\s*([-\d.]+)'),
+    (r'listing.*?"lat"\s*:\s*([-\d.]+)', r'listing.*?"lng"\s*:\s*([-\d.]+)'),
+    (r'"location".*?"lat"\s*:\s*([-\d.]+)', r'"location".*?"lng"\s*:\s*([-\d.]+)'),
+]
+CLI_COORDINATE_PATTERNS = [(re.compile(lat), re.compile(lng)) for lat, lng in _LAT_LNG]
+GUI_COORDINATE_PATTERNS = [CLI_COORDINATE_PATTERNS[i] for i in (0, 1, 3)]
+HTML_COORDINATE_PATTERNS = CLI_COORDINATE_PATTERNS[:1]
+
+# Amenity field -> keywords, matched as substrings
+AMENITY_KEYWORDS = {
+    "wifi": ["wifi", "internet", "wi-fi"],
+    "kitchen": ["kitchen"],
+    "air_conditioning": ["air conditioning", "ac", "a/c", "cooling"],
+    "parking": ["parking", "garage"],
+    "tv": ["tv", "television", "hdtv"],
+    "heating": ["heating"],
+}
+
+
+def match_amenities(text: str) -> Dict[str, bool]:
+    """Every amenity field, True if any of its keywords occurs in the (lowercased) text"""
+    # Plain substring checks: str.__contains__ beats a combined alternation regex here
+    return {field: any(keyword in text for keyword in keywords) for field, keywords in AMENITY_KEYWORDS.items()}
+
+
+def first_int(patterns, text: str) -> Optional[int]:
+    """Group 1 of the first pattern that matches text, as an int"""
+    for pattern in patterns:
+        match = pattern.search(text)
+        if match and match.group(1).strip(','):
+            return int(match.group(1).replace(',', ''))
+    return None
+
+
+# ═══════════════════════════════════════════════
+# PARSERS
+# ═══════════════════════════════════════════════
+
+def is_error_page(snapshot: PageSnapshot) -> bool:
+    page_title = snapshot.title.lower()
+    return "oops" in page_title or "not found" in page_title or "oops" in snapshot.h1.lower()
+
+
+def listing_id(url: str) -> str:
+    listing_id_match = LISTING_ID_PATTERN.search(url)
+    if listing_id_match:
+        return listing_id_match.group(1)
+    # hash() is salted per process; a digest keeps the id stable across runs
+    return f"scraped_{hashlib.sha1(url.encode('utf-8')).hexdigest()[:16]}"
+
+
+def _set_room_flags(data: Dict):
+    room_type = (data["room_type"] or "").lower()
+    if "private room" in room_type:
+        data["room_private"] = True
+    elif "shared room" in room_type:
+        data["room_shared"] = True
+
+
+def _search_coordinates(data: Dict, text: str, patterns):
+    for lat_pattern, lng_pattern in patterns:
+        lat_match = lat_pattern.search(text)
+        lng_match = lng_pattern.search(text) if lat_match else None
+        if lat_match and lng_match:
+            lat_val = float(lat_match.group(1))
+            lng_val = float(lng_match.group(1))
+            # Validate coordinates are reasonable (not 0,0)
+            if abs(lat_val) > 0.1 and abs(lng_val) > 0.1:
+                data["lat"] = lat_val
+                data["lng"] = lng_val
+                return
+
+
+def _run_extractors(data: Dict, snapshot: PageSnapshot, extractors, log: Optional[Callable] = None) -> bool:
+    """Run each field extractor under its own timer; returns False if any of them failed"""
+    ok = True
+    for name, extractor in extractors:
+        with snapshot.timed(name):
+            try:
+                extractor(data, snapshot)
+            except Exception as e:
+                ok = False
+                if log:
+                    log(f"Extraction error ({name}): {str(e)[:100]}")
+    extraction_stats.add(snapshot)
+    return ok
+
+
+# ─── CLI extractors (price analysis fields) ───
+
+def _cli_room_type(data: Dict, snapshot: PageSnapshot):
+    h1_lower = snapshot.h1.lower()
+    page_start = snapshot.body_lower[:2000]
+    for rt in ["entire home", "entire place", "private room", "shared room", "hotel room"]:
+        if rt in h1_lower or rt in page_start:
+            data["room_type"] = rt.title()
+            if "shared" in rt:
+                data["room_shared"] = True
+            elif "private" in rt:
+                data["room_private"] = True
+            break
+
+    page_head = snapshot.body_lower[:3000]
+    if any(word in page_head for word in ["multiple rooms", "several rooms", "多个房间"]):
+        data["multi"] = True
+    if any(word in page_head for word in ["business", "work", "desk", "workspace", "entrepreneur"]):
+        data["biz"] = True
+
+
+def _cli_city(data: Dict, snapshot: PageSnapshot):
+    title_parts = snapshot.title.split(" - ")
+    if len(title_parts) >= 2:
+        location_part = title_parts[-2] if "Airbnb" in title_parts[-1] else title_parts[-1]
+        location_parts = location_part.split(",")
+        if location_parts:
+            data["city"] = location_parts[0].strip()
+
+    if "superhost" in snapshot.body_lower:
+        data["host_is_superhost"] = True
+
+
+def _cli_location(data: Dict, snapshot: PageSnapshot):
+    _search_coordinates(data, snapshot.scripts, CLI_COORDINATE_PATTERNS)
+    # Fallback: search in page HTML source
+    if not data["lat"]:
+        _search_coordinates(data, snapshot.html, HTML_COORDINATE_PATTERNS)
+
+
+def _cli_details(data: Dict, snapshot: PageSnapshot):
+    info_text = snapshot.body_lower
+    data["person_capacity"] = first_int([GUESTS_PATTERN], info_text)
+    data["bedrooms"] = first_int([BEDROOMS_PATTERN], info_text)
+    data["beds"] = first_int([BEDS_PATTERN], info_text)
+    data["bathrooms"] = first_int([BATHS_PATTERN], info_text)
+
+
+def _cli_price(data: Dict, snapshot: PageSnapshot):
+    page_text = snapshot.body_lower
+    price_match = NIGHT_PRICE_PATTERN.search(page_text) or FIRST_PRICE_PATTERN.search(page_text, 0, 5000)
+    if price_match:
+        data["realSum"] = int(price_match.group(1).replace(',', ''))
+
+
+def _reviews(data: Dict, snapshot: PageSnapshot):
+    review_count = first_int([REVIEWS_PATTERN], snapshot.body_lower)
+    if review_count is not None:
+        data["review_count"] = review_count
+
+
+def _ratings(data: Dict, snapshot: PageSnapshot):
+    rating_text = snapshot.rating_label
+    if rating_text:
+        rating_match = RATING_NUMBER_PATTERN.search(rating_text)
+        if rating_match:
+            val = float(rating_match.group(1))
+            if val <= 5:
+                data["guest_satisfaction_overall"] = val
+
+    if not data["guest_satisfaction_overall"]:
+        for pattern in OVERALL_RATING_PATTERNS:
+            rating_match = pattern.search(snapshot.body_lower)
+            if rating_match:
+                val = float(rating_match.group(1))
+                if 0 < val <= 5:
+                    data["guest_satisfaction_overall"] = val
+                    break
+
+    cleanliness_match = CLEANLINESS_PATTERN.search(snapshot.body_lower)
+    if cleanliness_match:
+        val = float(cleanliness_match.group(1))
+        if val <= 5:
+            data["cleanliness_rating"] = val
+
+
+def _cli_amenities(data: Dict, snapshot: PageSnapshot):
+    amenities_text = ' '.join(dict.fromkeys(snapshot.amenities)) if snapshot.amenities else snapshot.body_lower
+    data.update(match_amenities(amenities_text))
+
+
+CLI_EXTRACTORS = [
+    ("room_type", _cli_room_type),
+    ("city", _cli_city),
+    ("location", _cli_location),
+    ("details", _cli_details),
+    ("price", _cli_price),
+    ("reviews", _reviews),
+    ("ratings", _ratings),
+    ("amenities", _cli_amenities),
+]
+
+
+def parse_listing_details(url: str, snapshot: PageSnapshot) -> Optional[Dict]:
+    """CLI extraction: price analysis fields from a page snapshot"""
+    if is_error_page(snapshot):
+        return None
+
+    data = empty_listing()
+    data["id"] = listing_id(url)
+
+    _run_extractors(data, snapshot, CLI_EXTRACTORS)
+    return data
+
+
+# ─── GUI extractors (complete field set) ───
+
+def _gui_city(data: Dict, snapshot: PageSnapshot):
+    # Method 1: Extract city from URL
+    url = data["url"]
+    city_from_url = re.search(r'/s/([^/]+)/homes', url) or re.search(r'/rooms/.*[?&].*city=([^&]+)', url)
+    if city_from_url:
+        data["city"] = city_from_url.group(1).replace('-', ' ').replace('%20', ' ').title()
+
+    # Method 2: From page title (last part before Airbnb)
+    if not data["city"]:
+        for part in reversed(snapshot.title.split(" - ")):
+            if "airbnb" not in part.lower() and len(part) > 2:
+                # Get city name (first word that looks like a city)
+                city_match = re.search(r'([A-Z][a-z]+(?:\s+[A-Z][a-z]+)?)', part)
+                if city_match:
+                    data["city"] = city_match.group(1)
+                    break
+
+    # Check if host is superhost
+    if "superhost" in snapshot.body_lower:
+        data["host_is_superhost"] = True
+
+
+def _gui_details(data: Dict, snapshot: PageSnapshot):
+    page_text = snapshot.body_lower
+
+    # Beds and bedrooms: JSON first, then text
+    for field, text_patterns in (("beds", BED_DETAIL_PATTERNS), ("bedrooms", BEDROOM_DETAIL_PATTERNS)):
+        if snapshot.json_pool:
+            value = snapshot.json_index.find(field)
+            if value:
+                try:
+                    data[field] = int(value)
+                except:
+                    pass
+        if not data[field]:
+            data[field] = first_int(text_patterns, page_text)
+
+    # Guests
+    data["person_capacity"] = first_int([GUESTS_PATTERN], page_text)
+
+
+def _gui_room_type(data: Dict, snapshot: PageSnapshot):
+    page_text = snapshot.body_lower
+
+    # Method 1: JSON (most reliable)
+    if snapshot.json_pool:
+        data["room_type"] = extract_room_type_from_json(snapshot.json_pool, snapshot.json_index)
+        if data["room_type"]:
+            _set_room_flags(data)
+            return
+
+    # Method 2: Check all h2 elements
+    for h2_text in snapshot.h2:
+        h2_text = h2_text.lower()
+        if "room in" in h2_text:
+            data["room_type"] = "Private room"
+        elif "entire" in h2_text and ("home" in h2_text or "apartment" in h2_text):
+            data["room_type"] = "Entire home/apt"
+        elif "shared room" in h2_text:
+            data["room_type"] = "Shared room"
+        elif "hotel room" in h2_text:
+            data["room_type"] = "Hotel room"
+        if data["room_type"]:
+            _set_room_flags(data)
+            return
+
+    # Method 3: Start of the HTML
+    html_start = snapshot.html[:1000].lower()
+    if "room in" in html_start and "shared bathroom" in page_text:
+        data["room_type"] = "Private room"
+    elif "private room in" in html_start or "room in" in html_start:
+        data["room_type"] = "Private room"
+    elif "entire home" in html_start or "entire apartment" in html_start or "entire place" in html_start:
+        data["room_type"] = "Entire home/apt"
+    elif "shared room in" in html_start:
+        data["room_type"] = "Shared room"
+    elif "hotel room" in html_start:
+        data["room_type"] = "Hotel room"
+
+    # Method 4: Start of the page text
+    if not data["room_type"]:
+        page_start = page_text[:2000]
+        if "entire home" in page_start or "entire apartment" in page_start:
+            data["room_type"] = "Entire home/apt"
+        elif "private room" in page_start:
+            data["room_type"] = "Private room"
+        elif "shared room" in page_start:
+            data["room_type"] = "Shared room"
+        elif "hotel room" in page_start:
+            data["room_type"] = "Hotel room"
+    _set_room_flags(data)
+
+
+def _gui_location(data: Dict, snapshot: PageSnapshot):
+    _search_coordinates(data, snapshot.scripts, GUI_COORDINATE_PATTERNS)
+    # Fallback: search in page HTML
+    if not data["lat"]:
+        _search_coordinates(data, snapshot.html, HTML_COORDINATE_PATTERNS)
+
+
+def _gui_price(data: Dict, snapshot: PageSnapshot):
+    # Method 1: Price elements (first match per selector)
+    for price_text in snapshot.prices:
+        if not price_text:
+            continue
+        # Extract numbers (works for $123 or 123$)
+        price_num = NUMBER_PATTERN.search(price_text)
+        if price_num:
+            try:
+                price_val = int(price_num.group(1).replace(',', ''))
+            except ValueError:
+                continue
+            if 5 < price_val < 50000:
+                data["realSum"] = price_val
+                return
+
+    # Method 2: Look for price in JSON data
+    price_json = PRICE_STRING_PATTERN.search(snapshot.scripts)
+    if price_json:
+        price_num = NUMBER_PATTERN.search(price_json.group(1))
+        if price_num:
+            data["realSum"] = int(price_num.group(1).replace(',', ''))
+            return
+
+    # Method 3: Search in page text
+    for pattern in NIGHT_PRICE_PATTERNS:
+        price_m = pattern.search(snapshot.body_lower)
+        if price_m:
+            price_val = int(price_m.group(1).replace(',', ''))
+            if 5 < price_val < 50000:
+                data["realSum"] = price_val
+                return
+
+
+def _gui_amenities(data: Dict, snapshot: PageSnapshot):
+    data.update(match_amenities(snapshot.body_lower))
+
+
+GUI_EXTRACTORS = [
+    ("city", _gui_city),
+    ("details", _gui_details),
+    ("room_type", _gui_room_type),
+    ("location", _gui_location),
+    ("price", _gui_price),
+    ("reviews", _reviews),
+    ("ratings", _ratings),
+    ("amenities", _gui_amenities),
+]
+
+
+def parse_listing(url: str, snapshot: PageSnapshot, log: Optional[Callable] = None) -> Optional[Dict]:
+    """GUI extraction: the complete field set from a page snapshot"""
+    if is_error_page(snapshot):
+        return None
+
+    data = {"url": url}
+    data.update(empty_listing())
+
+    if not _run_extractors(data, snapshot, GUI_EXTRACTORS, log):
+        # Keep partial data only if the core fields made it
+        return data if data.get("beds") or data.get("room_type") else None
+    return data
+
+
+# ═══════════════════════════════════════════════
+# SEARCH DISCOVERY
+# ═══════════════════════════════════════════════
+
+LISTING_LINK_SELECTOR = 'a[href*="/rooms/"]'
+
+# Every result link's href in one round trip (instead of get_attribute per anchor)
+_HREFS_JS = "links => links.map(link => link.getAttribute('href'))"
+
+
+def listing_key(url: str) -> str:
+    """Listing id for /rooms/<id> URLs, the URL without its query string otherwise"""
+    listing_id_match = LISTING_ID_PATTERN.search(url)
+    return listing_id_match.group(1) if listing_id_match else url.split('?')[0]
+
+
+def listing_hrefs(page, selector: str = LISTING_LINK_SELECTOR) -> List[str]:
+    """hrefs of every result link on a search page, in document order"""
+    try:
+        return page.eval_on_selector_all(selector, _HREFS_JS)
+    except:
+        return []
+
+
+class ListingUrlSet:
+    """Discovered listing URLs in discovery order, de-duplicated on listing id in O(1)"""
+
+    def __init__(self, limit: Optional[int] = None):
+        self.limit = limit
+        self._urls: Dict[str, str] = {}
+
+    def add(self, hrefs) -> List[str]:
+        """Add raw hrefs (relative or absolute); returns the clean URLs that were new"""
+        new = []
+        for href in hrefs:
+            if self.full():
+                break
+            if not href or '/rooms/' not in href:
+                continue
+            if href.startswith('/'):
+                href = f"https://www.airbnb.com{href}"
+            clean_url = href.split('?')[0]
+            key = listing_key(clean_url)
+            if key not in self._urls:
+                self._urls[key] = clean_url
+                new.append(clean_url)
+        return new
+
+    def full(self) -> bool:
+        return self.limit is not None and len(self._urls) >= self.limit
+
+    @property
+    def urls(self) -> List[str]:
+        return list(self._urls.values())
+
+    def __len__(self) -> int:
+        return len(self._urls)
+
+    def __contains__(self, url: str) -> bool:
+        return listing_key(url) in self._urls
@@ -0,0 +1,212 @@
+"""Event-driven page readiness instead of fixed sleeps.
+
+Pages are considered ready as soon as the data we parse is present, rather
+than after a fixed sleep or `networkidle`. A readiness check races a set of
+named signals (CSS selectors) in a single browser-side poll and returns the
+name of the first one that appears.
+
+* Listing pages wait for a data script (__NEXT_DATA__, deferred state,
+  ld+json) or the title, then give the rendered price a short extra window.
+* Search pages wait for the first listing link.
+* After each scroll, the wait ends as soon as more result links are attached.
+* In API capture mode, the wait ends with the first matching JSON response.
+
+Timeouts adapt per group of signals. The budget is `factor` x the p90 of
+recent successful waits, clamped to [min_timeout, ceiling] and starting at
+the ceiling (max_timeout, or a tighter per-group value for optional
+signals). Fast pages never wait long, and a page missing a signal only
+costs the learned budget. Only successful waits are sampled, so after
+`reset_after` consecutive timeouts in a group its samples are dropped. The
+budget then goes back to the ceiling and is learned again, which keeps a slow
+period from leaving the group stuck on a budget it can no longer meet.
+Every wait is recorded, and stats() reports timing per group and which
+signal won.
+"""
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+from listing_parser import LISTING_LINK_SELECTOR, PRICE_SELECTORS
+
+LISTING_DATA_SIGNALS = [
+    ("next_data", 'script#__NEXT_DATA__'),
+    ("deferred_state", 'script[id^="data-deferred-state"]'),
+    ("ld_json", 'script[type="application/ld+json"]'),
+    ("title", 'h1'),
+]
+
+LISTING_PRICE_SIGNALS = [("price", selector) for selector in PRICE_SELECTORS]
+
+SEARCH_SIGNALS = [
+    ("listing_link", 'a[href*="/rooms/"]'),
+    ("card", 'div[data-testid="card-container"]'),
+]
+
+# Optional signals get a tighter ceiling: a page without a rendered price, or a
+# scroll that loads nothing new, should not cost the full max_timeout
+GROUP_MAX_TIMEOUT = {
+    "listing_price": 3000,
+    "scroll": 2000,
+    "api_response": 5000,
+}
+
+# Returns the name of the first signal whose selector matches, or null to keep polling
+_RACE_JS = """(signals) => {
+    for (const [name, selector] of signals) {
+        if (document.querySelector(selector)) return name;
+    }
+    return null;
+}"""
+
+_MORE_JS = """([selector, count]) => document.querySelectorAll(selector).length > count"""
+
+_COUNT_JS = "els => els.length"
+
+
+class PageReadiness:
+    """Races readiness signals with adaptive per-group timeouts and keeps timing stats"""
+
+    def __init__(self, min_timeout: int = 500, max_timeout: int = 10000, factor: float = 2.0,
+                 window: int = 50, poll_ms: int = 100, reset_after: int = 3):
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+        self.factor = factor
+        self.window = window
+        self.poll_ms = poll_ms
+        self.reset_after = max(1, reset_after)
+        self._lock = threading.Lock()
+        self._samples: Dict[str, deque] = {}
+        self._groups: Dict[str, Dict] = {}
+        self._misses: Dict[str, int] = {}  # Consecutive timeouts per group
+
+    def budget(self, group: str) -> int:
+        """Timeout in ms for the next wait in a group"""
+        ceiling = GROUP_MAX_TIMEOUT.get(group, self.max_timeout)
+        with self._lock:
+            samples = sorted(self._samples.get(group, ()))
+        if not samples:
+            return ceiling
+        p90 = samples[min(len(samples) - 1, int(len(samples) * 0.9))]
+        return int(min(ceiling, max(self.min_timeout, self.factor * p90)))
+
+    def record(self, group: str, signal: Optional[str], elapsed_ms: float):
+        with self._lock:
+            stats = self._groups.setdefault(group, {"waits": 0, "timeouts": 0, "total_ms": 0.0, "max_ms": 0.0, "signals": {}})
+            stats["waits"] += 1
+            stats["total_ms"] += elapsed_ms
+            stats["max_ms"] = max(stats["max_ms"], elapsed_ms)
+            if signal is None:
+                stats["timeouts"] += 1
+                self._misses[group] = self._misses.get(group, 0) + 1
+                if self._misses[group] >= self.reset_after:
+                    # The learned budget is too tight now: start over from the ceiling
+                    self._samples.pop(group, None)
+                    self._misses[group] = 0
+            else:
+                stats["signals"][signal] = stats["signals"].get(signal, 0) + 1
+                self._samples.setdefault(group, deque(maxlen=self.window)).append(elapsed_ms)
+                self._misses[group] = 0
+
+    # Sync Playwright API
+
+    def wait(self, page, group: str, signals: List[Tuple[str, str]], timeout: Optional[int] = None) -> Optional[str]:
+        """Block until the first signal is present; returns its name, or None on timeout"""
+        timeout = self.budget(group) if timeout is None else timeout
+        start = time.perf_counter()
+        signal = None
+        try:
+            handle = page.wait_for_function(_RACE_JS, arg=signals, timeout=timeout, polling=self.poll_ms)
+            signal = handle.json_value()
+        except:
+            pass
+        self.record(group, signal, (time.perf_counter() - start) * 1000)
+        return signal
+
+    def wait_for_listing(self, page) -> Optional[str]:
+        """Listing data first, then a short budgeted window for the rendered price"""
+        signal = self.wait(page, "listing_data", LISTING_DATA_SIGNALS)
+        self.wait(page, "listing_price", LISTING_PRICE_SIGNALS)
+        return signal
+
+    def wait_for_search(self, page) -> Optional[str]:
+        return self.wait(page, "search_results", SEARCH_SIGNALS)
+
+    def link_count(self, page, selector: str = LISTING_LINK_SELECTOR) -> int:
+        try:
+            return page.eval_on_selector_all(selector, _COUNT_JS)
+        except:
+            return 0
+
+    def wait_for_more(self, page, previous_count: int, selector: str = LISTING_LINK_SELECTOR,
+                      group: str = "scroll") -> bool:
+        """After a scroll: wait until more than previous_count elements match selector"""
+        start = time.perf_counter()
+        grew = False
+        try:
+            page.wait_for_function(_MORE_JS, arg=[selector, previous_count], timeout=self.budget(group), polling=self.poll_ms)
+            grew = True
+        except:
+            pass
+        self.record(group, "more" if grew else None, (time.perf_counter() - start) * 1000)
+        return grew
+
+    def wait_for_capture(self, page, capture) -> bool:
+        """Capture mode: wait until the ResponseCapture has seen a matching API response"""
+        start = time.perf_counter()
+        if not capture.responses:
+            try:
+                page.wait_for_event("response", predicate=lambda response: capture.matches(response.url),
+                                    timeout=self.budget("api_response"))
+            except:
+                pass
+        captured = bool(capture.responses)
+        self.record("api_response", "api" if captured else None, (time.perf_counter() - start) * 1000)
+        return captured
+
+    # Async Playwright API
+
+    async def wait_async(self, page, group: str, signals: List[Tuple[str, str]], timeout: Optional[int] = None) -> Optional[str]:
+        timeout = self.budget(group) if timeout is None else timeout
+        start = time.perf_counter()
+        signal = None
+        try:
+            handle = await page.wait_for_function(_RACE_JS, arg=signals, timeout=timeout, polling=self.poll_ms)
+            signal = await handle.json_value()
+        except:
+            pass
+        self.record(group, signal, (time.perf_counter() - start) * 1000)
+        return signal
+
+    async def wait_for_listing_async(self, page) -> Optional[str]:
+        signal = await self.wait_async(page, "listing_data", LISTING_DATA_SIGNALS)
+        await self.wait_async(page, "listing_price", LISTING_PRICE_SIGNALS)
+        return signal
+
+    async def wait_for_capture_async(self, page, capture) -> bool:
+        start = time.perf_counter()
+        if not capture.responses:
+            try:
+                await page.wait_for_event("response", predicate=lambda response: capture.matches(response.url),
+                                          timeout=self.budget("api_response"))
+            except:
+                pass
+        captured = bool(capture.responses)
+        self.record("api_response", "api" if captured else None, (time.perf_counter() - start) * 1000)
+        return captured
+
+    def stats(self) -> Dict[str, Dict]:
+        """Per group: waits, timeouts, mean/max ms, winning signal counts and the current budget"""
+        with self._lock:
+            groups = {name: dict(stats, signals=dict(stats["signals"])) for name, stats in self._groups.items()}
+        for name, stats in groups.items():
+            stats["mean_ms"] = stats.pop("total_ms") / stats["waits"] if stats["waits"] else 0.0
+            stats["budget_ms"] = self.budget(name)
+        return groups
+
+    def summary(self) -> str:
+        parts = []
+        for name, stats in sorted(self.stats().items()):
+            parts.append(f"{name}: {stats['waits']} waits, mean {stats['mean_ms']:.0f} ms, "
+                         f"max {stats['max_ms']:.0f} ms, {stats['timeouts']} timeouts, budget {stats['budget_ms']} ms")
+        return "; ".join(parts) or "no readiness waits"
@@ -0,0 +1,150 @@
+"""Request interception that drops everything the parsers never read.
+
+A RequestBlocker is attached to a browser context through context.route().
+It aborts requests for the configured resource types (images, fonts, media
+by default) and for URL patterns (analytics and tracking beacons). All other
+requests pass through unchanged. A disabled blocker (enabled=False) installs
+no route at all, so requests skip the Python handler round trip.
+
+Counters are kept per blocker, so one blocker per run reports:
+
+* how many requests were blocked, by reason;
+* how many were allowed, with the bytes they transferred (from Content-Length);
+* an estimate of the bytes saved.
+
+Aborted requests never reach the network, so their size is unknown. The
+saving is therefore estimated from typical sizes per resource type.
+"""
+import re
+import threading
+from typing import Dict, Iterable, Optional
+
+BLOCKED_RESOURCE_TYPES = ("image", "font", "media")
+
+BLOCKED_URL_PATTERNS = (
+    r"google-analytics\.com",
+    r"googletagmanager\.com",
+    r"doubleclick\.net",
+    r"facebook\.(com|net)/tr",
+    r"connect\.facebook\.net",
+    r"bat\.bing\.com",
+    r"hotjar\.com",
+    r"sentry\.io",
+    r"/tracking/",
+    r"/api/v\d+/logging",
+    r"/log_event",
+    r"\.(png|jpe?g|gif|webp|avif|svg|ico|woff2?|ttf|otf|mp4|webm)(\?|$)",
+)
+
+# Typical transfer sizes, used only to estimate what blocking saved
+ESTIMATED_BYTES = {
+    "image": 80_000,
+    "font": 40_000,
+    "media": 500_000,
+    "pattern": 5_000,
+}
+
+
+class RequestBlocker:
+    """Aborts unneeded requests on the contexts it is attached to and counts them"""
+
+    def __init__(self, resource_types: Iterable[str] = BLOCKED_RESOURCE_TYPES,
+                 url_patterns: Iterable[str] = BLOCKED_URL_PATTERNS, enabled: bool = True):
+        self.resource_types = frozenset(resource_types)
+        self.url_pattern = re.compile("|".join(url_patterns), re.IGNORECASE) if url_patterns else None
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.blocked = {}
+            self.allowed_requests = 0
+            self.allowed_bytes = 0
+            self.estimated_saved_bytes = 0
+
+    def reason(self, resource_type: str, url: str) -> Optional[str]:
+        """Why a request would be blocked, or None to let it through"""
+        if not self.enabled:
+            return None
+        if resource_type in self.resource_types:
+            return resource_type
+        if self.url_pattern is not None and self.url_pattern.search(url):
+            return "pattern"
+        return None
+
+    def _count(self, reason: Optional[str]):
+        with self._lock:
+            if reason is None:
+                self.allowed_requests += 1
+            else:
+                self.blocked[reason] = self.blocked.get(reason, 0) + 1
+                self.estimated_saved_bytes += ESTIMATED_BYTES.get(reason, ESTIMATED_BYTES["pattern"])
+
+    def _on_response(self, response):
+        try:
+            size = int(response.headers.get("content-length", 0))
+        except (TypeError, ValueError):
+            size = 0
+        with self._lock:
+            self.allowed_bytes += size
+
+    # Sync Playwright API
+
+    def _handle(self, route):
+        request = route.request
+        reason = self.reason(request.resource_type, request.url)
+        self._count(reason)
+        try:
+            if reason is None:
+                route.continue_()
+            else:
+                route.abort()
+        except:
+            pass  # page closed while the request was pending
+
+    def attach(self, context):
+        """Route every request of a sync BrowserContext (or Page) through the blocker"""
+        if not self.enabled:
+            return context
+        context.route("**/*", self._handle)
+        context.on("response", self._on_response)
+        return context
+
+    # Async Playwright API
+
+    async def _handle_async(self, route):
+        request = route.request
+        reason = self.reason(request.resource_type, request.url)
+        self._count(reason)
+        try:
+            if reason is None:
+                await route.continue_()
+            else:
+                await route.abort()
+        except:
+            pass
+
+    async def attach_async(self, context):
+        """Route every request of an async BrowserContext (or Page) through the blocker"""
+        if not self.enabled:
+            return context
+        await context.route("**/*", self._handle_async)
+        context.on("response", self._on_response)
+        return context
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "blocked_requests": sum(self.blocked.values()),
+                "blocked_by_reason": dict(self.blocked),
+                "allowed_requests": self.allowed_requests,
+                "allowed_bytes": self.allowed_bytes,
+                "estimated_saved_bytes": self.estimated_saved_bytes,
+            }
+
+    def summary(self) -> str:
+        stats = self.stats()
+        reasons = ", ".join(f"{k} {v}" for k, v in sorted(stats["blocked_by_reason"].items())) or "none"
+        return (f"Blocked {stats['blocked_requests']} requests ({reasons}), ~{stats['estimated_saved_bytes'] / 1e6:.1f} MB saved; "
+                f"allowed {stats['allowed_requests']} requests, {stats['allowed_bytes'] / 1e6:.1f} MB")
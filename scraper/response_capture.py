@@ -0,0 +1,227 @@
+"""Capture Airbnb's JSON API responses and parse them instead of the DOM.
+
+A ResponseCapture listens to page.on("response") and keeps the responses
+whose URL matches the listing (StaysPdpSections) or search (StaysSearch /
+ExploreSearch) API endpoints. Bodies are read later, outside the event
+handler, so the same class works with the sync and async Playwright APIs.
+
+parse_api_listing() maps the captured payloads straight onto the listing
+schema used by scrape_listing_details. parse_api_search() turns search
+payloads into listing URLs with their card prices. Both return nothing when
+nothing was captured, and callers then fall back to DOM parsing.
+"""
+import base64
+import re
+from typing import Dict, List, Optional
+
+from listing_parser import empty_listing, listing_id, match_amenities
+
+LISTING_API_PATTERN = re.compile(r"/api/v3/(StaysPdpSections|PdpPlatformSections)|/api/v2/pdp_listing_details", re.IGNORECASE)
+SEARCH_API_PATTERN = re.compile(r"/api/v3/(StaysSearch|ExploreSearch)|/api/v2/explore_tabs", re.IGNORECASE)
+
+MONEY_PATTERN = re.compile(r'[\$€£]\s*([\d,]+)')
+
+# Listing schema field -> API keys that carry it (compared case-insensitively)
+API_FIELDS = {
+    "lat": ["lat", "latitude", "listingLat"],
+    "lng": ["lng", "longitude", "listingLng"],
+    "person_capacity": ["personCapacity", "guestCapacity", "maxGuestCapacity"],
+    "bedrooms": ["bedrooms", "bedroomCount"],
+    "beds": ["beds", "bedCount"],
+    "bathrooms": ["bathrooms", "bathroomCount"],
+    "room_type": ["roomTypeCategory", "roomType"],
+    "host_is_superhost": ["isSuperhost", "isSuperHost"],
+    "review_count": ["reviewCount", "visibleReviewCount", "reviewsCount"],
+    "guest_satisfaction_overall": ["guestSatisfactionOverall", "overallRating", "avgRating", "starRating"],
+    "cleanliness_rating": ["cleanlinessRating"],
+    "city": ["city", "localizedCity"],
+    "price": ["priceString", "price", "discountedPrice", "originalPrice", "accessibilityLabel"],
+}
+
+_KEY_TO_FIELD = {key.lower(): field for field, keys in API_FIELDS.items() for key in keys}
+
+ROOM_TYPES = {
+    "entire_home": "Entire home/apt",
+    "private_room": "Private room",
+    "shared_room": "Shared room",
+    "hotel_room": "Hotel room",
+}
+
+
+class ResponseCapture:
+    """Collects matching API responses from one page"""
+
+    def __init__(self, patterns=(LISTING_API_PATTERN, SEARCH_API_PATTERN)):
+        self.patterns = patterns
+        self.responses = []
+
+    def matches(self, url: str) -> bool:
+        return any(pattern.search(url) for pattern in self.patterns)
+
+    def _on_response(self, response):
+        if self.matches(response.url):
+            self.responses.append(response)
+
+    def attach(self, page):
+        """Listen on a page (sync or async API; the handler itself never awaits)"""
+        page.on("response", self._on_response)
+        return self
+
+    def clear(self):
+        self.responses = []
+
+    def payloads(self, pattern=None) -> List:
+        """JSON bodies of the captured responses (sync API)"""
+        bodies = []
+        for response in self.responses:
+            if pattern is None or pattern.search(response.url):
+                try:
+                    bodies.append(response.json())
+                except:
+                    continue
+        return bodies
+
+    async def payloads_async(self, pattern=None) -> List:
+        """JSON bodies of the captured responses (async API)"""
+        bodies = []
+        for response in self.responses:
+            if pattern is None or pattern.search(response.url):
+                try:
+                    bodies.append(await response.json())
+                except:
+                    continue
+        return bodies
+
+
+def _collect(obj, found: Dict, amenities: List[str], in_amenities: bool = False):
+    """One walk over the payload: first value per schema field, plus amenity titles"""
+    if isinstance(obj, dict):
+        category = str(obj.get("categoryType") or obj.get("category") or "").lower()
+        if category == "cleanliness" and "cleanliness_rating" not in found:
+            value = obj.get("localizedRating") or obj.get("value") or obj.get("rating")
+            if value is not None:
+                found["cleanliness_rating"] = value
+        for key, value in obj.items():
+            key_lower = key.lower()
+            field = _KEY_TO_FIELD.get(key_lower)
+            if field and field not in found and value is not None and not isinstance(value, (dict, list)):
+                if field != "price" or MONEY_PATTERN.search(str(value)):
+                    found[field] = value
+            if in_amenities and key_lower == "title" and isinstance(value, str) and obj.get("available", True):
+                amenities.append(value.lower())
+            if isinstance(value, (dict, list)):
+                _collect(value, found, amenities, in_amenities or "amenit" in key_lower)
+    elif isinstance(obj, list):
+        for item in obj:
+            _collect(item, found, amenities, in_amenities)
+
+
+def _number(value, kind=float):
+    try:
+        return kind(float(str(value).replace(",", "")))
+    except (TypeError, ValueError):
+        return None
+
+
+def normalize_room_type(value) -> Optional[str]:
+    rt = str(value).lower()
+    if rt in ROOM_TYPES:
+        return ROOM_TYPES[rt]
+    if "entire" in rt:
+        return "Entire home/apt"
+    if "private" in rt or "room in" in rt:
+        return "Private room"
+    if "shared" in rt:
+        return "Shared room"
+    if "hotel" in rt:
+        return "Hotel room"
+    return str(value) if value else None
+
+
+def parse_api_listing(url: str, payloads: List) -> Optional[Dict]:
+    """Listing record from captured PDP API payloads, or None when nothing usable was captured"""
+    if not payloads:
+        return None
+
+    found, amenities = {}, []
+    for payload in payloads:
+        _collect(payload, found, amenities)
+    if not found:
+        return None
+
+    data = {"url": url}
+    data.update(empty_listing())
+    data["id"] = listing_id(url)
+
+    for field in ("lat", "lng", "guest_satisfaction_overall", "cleanliness_rating"):
+        if field in found:
+            data[field] = _number(found[field])
+    for field in ("person_capacity", "bedrooms", "beds", "bathrooms", "review_count"):
+        if field in found:
+            data[field] = _number(found[field], int)
+
+    if "room_type" in found:
+        data["room_type"] = normalize_room_type(found["room_type"])
+        data["room_private"] = data["room_type"] == "Private room"
+        data["room_shared"] = data["room_type"] == "Shared room"
+    if "host_is_superhost" in found:
+        data["host_is_superhost"] = bool(found["host_is_superhost"])
+    if "city" in found:
+        data["city"] = str(found["city"])
+    if "price" in found:
+        price_match = MONEY_PATTERN.search(str(found["price"]))
+        data["realSum"] = int(price_match.group(1).replace(',', ''))
+
+    if amenities:
+        # Same keyword table as the DOM parsers
+        data.update(match_amenities(' '.join(amenities)))
+
+    return data
+
+
+def _listing_id(value) -> Optional[str]:
+    """Numeric listing id, decoding relay-style ids such as base64("DemandStayListing:123")"""
+    value = str(value)
+    if value.isdigit():
+        return value
+    try:
+        decoded = base64.b64decode(value + "=" * (-len(value) % 4)).decode("utf-8", "ignore")
+    except Exception:
+        return None
+    match = re.search(r':(\d+)$', decoded)
+    return match.group(1) if match else None
+
+
+def _search_results(obj, results: List[Dict]):
+    if isinstance(obj, dict):
+        listing = obj.get("listing") or obj.get("demandStayListing")
+        if isinstance(listing, dict) and listing.get("id") is not None:
+            result_id = _listing_id(listing["id"])
+            if result_id:
+                found = {}
+                _collect(obj, found, [])
+                price_match = MONEY_PATTERN.search(str(found.get("price", "")))
+                results.append({
+                    "id": result_id,
+                    "url": f"https://www.airbnb.com/rooms/{result_id}",
+                    "price": int(price_match.group(1).replace(',', '')) if price_match else None,
+                })
+            return
+        for value in obj.values():
+            _search_results(value, results)
+    elif isinstance(obj, list):
+        for item in obj:
+            _search_results(item, results)
+
+
+def parse_api_search(payloads: List) -> List[Dict]:
+    """Search results ({"id", "url", "price"}) from captured search API payloads, in page order"""
+    results, seen = [], set()
+    for payload in payloads:
+        found = []
+        _search_results(payload, found)
+        for result in found:
+            if result["id"] not in seen:
+                seen.add(result["id"])
+                results.append(result)
+    return results
@@ -0,0 +1,127 @@
+"""Streaming, crash-safe result storage for the scrapers.
+
+Each finished listing is appended to a JSON Lines file as soon as it is
+scraped, instead of being held in memory until the end of the run:
+
+* every record is flushed to the OS at once, so a crashed or killed
+  scraper loses nothing it already wrote;
+* fsync runs every `fsync_every` records or `fsync_seconds`, whichever comes
+  first, which bounds what an OS crash or power cut can lose;
+* the file is opened for appending, so a restarted run adds to what the
+  failed one left behind.
+
+compact() turns the JSON Lines file into the final CSV (and optionally
+pretty-printed JSON) in a streaming pass. It keeps the last record per key,
+so listings scraped again after a restart appear once. Memory use depends
+on the number of keys, not on the records.
+"""
+import csv
+import json
+import os
+import textwrap
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+
+class ResultSink:
+    """Append-only JSON Lines writer with periodic fsync; safe to share between threads"""
+
+    def __init__(self, path: str, fsync_every: int = 25, fsync_seconds: float = 5.0):
+        self.path = Path(path)
+        self.fsync_every = max(1, fsync_every)
+        self.fsync_seconds = fsync_seconds
+        self.count = 0
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+        self._lock = threading.Lock()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, "a", encoding="utf-8")
+        # A crash mid-write can leave a torn last line; start on a fresh one
+        if self.path.stat().st_size:
+            with open(self.path, "rb") as f:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":
+                    self._file.write("\n")
+
+    def write(self, record: Dict):
+        line = json.dumps(record, ensure_ascii=False, default=str) + "\n"
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+            self.count += 1
+            self._unsynced += 1
+            if self._unsynced >= self.fsync_every or time.monotonic() - self._last_sync >= self.fsync_seconds:
+                self._sync()
+
+    def _sync(self):
+        os.fsync(self._file.fileno())
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def close(self):
+        with self._lock:
+            if not self._file.closed:
+                self._file.flush()
+                self._sync()
+                self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def read_records(path: str) -> Iterator[Dict]:
+    """Stream the records of a JSON Lines file, skipping a line torn by a crash"""
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                yield json.loads(line)
+            except ValueError:
+                continue
+
+
+def compact(jsonl_path: str, csv_path: str, fieldnames: List[str], json_path: Optional[str] = None,
+            key: Optional[str] = None, remove_source: bool = True) -> int:
+    """Write the JSON Lines file out as CSV (and JSON), last record per key wins; returns records written"""
+    if not Path(jsonl_path).exists():
+        return 0
+
+    # Pass 1: line number of the last record for each key (ints only, never the records)
+    keep = None
+    if key:
+        last_line = {}
+        for line_no, record in enumerate(read_records(jsonl_path)):
+            last_line[record.get(key) or f"_line{line_no}"] = line_no
+        keep = set(last_line.values())
+
+    # Pass 2: stream the kept records into the outputs
+    count = 0
+    with open(csv_path, "w", newline="", encoding="utf-8") as csv_file:
+        writer = csv.DictWriter(csv_file, fieldnames=fieldnames, extrasaction="ignore")
+        writer.writeheader()
+        json_file = open(json_path, "w", encoding="utf-8") if json_path else None
+        try:
+            if json_file:
+                json_file.write("[")
+            for line_no, record in enumerate(read_records(jsonl_path)):
+                if keep is not None and line_no not in keep:
+                    continue
+                writer.writerow(record)
+                if json_file:
+                    # Same layout as json.dumps(records, indent=2)
+                    json_file.write(("," if count else "") + "\n" +
+                                    textwrap.indent(json.dumps(record, ensure_ascii=False, indent=2), "  "))
+                count += 1
+            if json_file:
+                json_file.write("\n]" if count else "]")
+        finally:
+            if json_file:
+                json_file.close()
+
+    if remove_source:
+        os.remove(jsonl_path)
+    return count
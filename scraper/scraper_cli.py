@@ -1,14 +1,25 @@
 from playwright.sync_api import sync_playwright
 import json
-import re
 import time
-import csv
 from pathlib import Path
 from typing import Dict, Optional, List
 from datetime import datetime
 
+from async_engine import AsyncScrapeEngine
+from discovery_planner import DiscoveryPlanner, plan_sub_searches
+from fixtures import FixtureStore
+from frontier import UrlFrontier
+from listing_parser import ListingUrlSet, extraction_stats, listing_hrefs, parse_listing_details, snapshot_page
+from readiness import PageReadiness
+from result_sink import ResultSink, compact
+from response_capture import LISTING_API_PATTERN, SEARCH_API_PATTERN, ResponseCapture, parse_api_listing, parse_api_search
+from request_blocking import RequestBlocker
 
-def get_browser_context(playwright):
+# Shared so readiness timeouts adapt across every page of a run
+readiness = PageReadiness()
+
+
+def get_browser_context(playwright, blocker: Optional[RequestBlocker] = None):
     """Create and return a browser context with anti-detection measures"""
     browser = playwright.chromium.launch(
         headless=True,
@@ -32,15 +43,34 @@ def get_browser_context(playwright):
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
         }
     )
+    if blocker:
+        blocker.attach(context)
     return browser, context
 
 
-def scrape_search_page(search_url: str, max_listings: int = 50) -> List[str]:
-    """Scrape Airbnb search page and extract all listing URLs"""
+def scrape_search_page(search_url: str, max_listings: int = 50, blocker: Optional[RequestBlocker] = None,
+                       capture_api: bool = False, recorder: Optional[FixtureStore] = None,
+                       frontier: Optional[UrlFrontier] = None, discovery_workers: int = 1) -> List[str]:
+    """Scrape Airbnb search page and extract all listing URLs (recorded in the frontier, if given)
+
+    discovery_workers > 1 splits the search into map-tile / price-band sub-searches
+    (discovery_planner) run on that many browsers, to get past Airbnb's per-search cap.
+    """
+    if discovery_workers > 1:
+        sub_urls = plan_sub_searches(search_url)
+        print(f"   [*] Tiled discovery: {len(sub_urls)} sub-searches on {discovery_workers} browsers")
+        planner = DiscoveryPlanner(workers=discovery_workers, readiness=readiness, blocker=blocker,
+                                   recorder=recorder, log=lambda message: print(f"   [*] {message}"),
+                                   capture_api=capture_api)
+        listing_urls, search_prices = planner.run(sub_urls, max_listings)
+        return _record_search(frontier, search_url, listing_urls, search_prices)
+    
     listing_urls = []
+    search_prices = {}
+    capture = ResponseCapture(patterns=(SEARCH_API_PATTERN,)) if capture_api else None
     
     with sync_playwright() as p:
-        browser, context = get_browser_context(p)
+        browser, context = get_browser_context(p, blocker)
         try:
             page = context.new_page()
             
@@ -48,50 +78,39 @@ def scrape_search_page(search_url: str, max_listings: int = 50) -> List[str]:
                 Object.defineProperty(navigator, 'webdriver', {get: () => undefined});
                 Object.defineProperty(navigator, 'plugins', {get: () => [1, 2, 3, 4, 5]});
             """)
+            if capture:
+                capture.attach(page)
             
             page.goto(search_url, wait_until="domcontentloaded", timeout=90000)
-            time.sleep(5)
-            
-            try:
-                page.wait_for_load_state("networkidle", timeout=30000)
-            except:
-                pass
-            
-            time.sleep(3)
+            readiness.wait_for_search(page)
             
+            # One href round trip per scroll; stop once the target is met or a scroll adds no new listing
+            found = ListingUrlSet(limit=max_listings)
+            hrefs = listing_hrefs(page)
+            found.add(hrefs)
             for i in range(3):
+                if found.full():
+                    break
                 page.evaluate("window.scrollBy(0, window.innerHeight)")
-                time.sleep(2)
+                readiness.wait_for_more(page, len(hrefs))
+                hrefs = listing_hrefs(page)
+                if not found.add(hrefs):
+                    break
             
-            link_selectors = [
-                'a[href*="/rooms/"]',
-                'div[itemprop="itemListElement"] a',
-                'div[data-testid="card-container"] a',
-            ]
+            if recorder:
+                recorder.save_search(search_url, page.content(), capture.payloads() if capture else None)
             
-            for selector in link_selectors:
-                try:
-                    links = page.query_selector_all(selector)
-                    for link in links:
-                        href = link.get_attribute('href')
-                        if href and '/rooms/' in href:
-                            if href.startswith('/'):
-                                full_url = f"https://www.airbnb.com{href}"
-                            else:
-                                full_url = href
-                            
-                            clean_url = full_url.split('?')[0]
-                            
-                            if clean_url not in listing_urls:
-                                listing_urls.append(clean_url)
-                                
-                        if len(listing_urls) >= max_listings:
-                            break
-                    
-                    if listing_urls:
-                        break
-                except Exception as e:
-                    continue
+            # Capture mode: listing ids straight from the search API responses
+            if capture:
+                api_found = ListingUrlSet(limit=max_listings)
+                for result in parse_api_search(capture.payloads()):
+                    for url in api_found.add([result["url"]]):
+                        search_prices[url] = result["price"]
+                listing_urls = api_found.urls
+            
+            # DOM links only when the API gave us nothing
+            if not listing_urls:
+                listing_urls = found.urls
             
             page.screenshot(path="search_page_screenshot.png")
             
@@ -100,261 +119,49 @@ def scrape_search_page(search_url: str, max_listings: int = 50) -> List[str]:
         finally:
             browser.close()
     
-    return listing_urls
+    return _record_search(frontier, search_url, listing_urls, search_prices)
 
 
-def scrape_listing_details(page, url: str) -> Optional[Dict]:
-    """Scrape a single listing page for price analysis"""
-    data = {
-        "realSum": None,
-        "room_type": None,
-        "room_shared": False,
-        "room_private": False,
-        "person_capacity": None,
-        "host_is_superhost": False,
-        "multi": False,
-        "biz": False,
-        "city": None,
-        "lat": None,
-        "lng": None,
-        "cleanliness_rating": None,
-        "guest_satisfaction_overall": None,
-        "bedrooms": None,
-        "beds": None,
-        "bathrooms": None,
-        "wifi": False,
-        "kitchen": False,
-        "air_conditioning": False,
-        "parking": False,
-        "tv": False,
-        "heating": False,
-    }
+def _record_search(frontier: Optional[UrlFrontier], search_url: str, listing_urls: List[str],
+                   search_prices: Dict[str, int]) -> List[str]:
+    if frontier and listing_urls:
+        new = frontier.add(listing_urls, scope=search_url)
+        # Incremental runs: a search-card price that moved makes a fresh listing due again
+        changed = frontier.reprice(search_prices)
+        print(f"   [*] Frontier: {new} new of {len(listing_urls)} listings found, {changed} price changes")
     
+    return listing_urls
+
+
+def scrape_listing_details(page, url: str, capture: Optional[ResponseCapture] = None,
+                           recorder: Optional[FixtureStore] = None) -> Optional[Dict]:
+    """Scrape a single listing page for price analysis
+
+    With a ResponseCapture attached to the page, the listing API's JSON is
+    parsed first; the DOM is only parsed when no API response was captured.
+    With a recorder, the page snapshot and API payloads are saved as a fixture.
+    """
     try:
+        if capture:
+            capture.clear()
         page.goto(url, wait_until="domcontentloaded", timeout=60000)
-        time.sleep(4)
-        
-        try:
-            page.wait_for_load_state("networkidle", timeout=20000)
-        except:
-            pass
-        
-        time.sleep(2)
         
-        page_title = page.title().lower()
-        h1_elem = page.query_selector('h1')
-        h1_text = h1_elem.inner_text().strip().lower() if h1_elem else ""
+        data, payloads, snapshot = None, [], None
+        if capture and readiness.wait_for_capture(page, capture):
+            payloads = capture.payloads(LISTING_API_PATTERN)
+            data = parse_api_listing(url, payloads)
         
-        if "oops" in page_title or "oops" in h1_text or "not found" in page_title:
+        # Record mode snapshots the DOM even when the API answered, so fixtures are complete
+        if data is None or recorder:
+            readiness.wait_for_listing(page)
+            snapshot = snapshot_page(page)
+        if data is None:
+            data = parse_listing_details(url, snapshot)
+        if recorder:
+            recorder.save_listing(url, snapshot, payloads)
+        if data is None:
             return None
         
-        listing_id_match = re.search(r'/rooms/(\d+)', url)
-        data["id"] = listing_id_match.group(1) if listing_id_match else f"scraped_{hash(url)}"
-        
-        page_text = ""
-        title_text = ""
-        try:
-            page_text = page.inner_text('body')
-            if h1_elem:
-                title_text = h1_elem.inner_text().strip().lower()
-        except:
-            pass
-        
-        # Extract room type and flags
-        try:
-            room_types = ["entire home", "entire place", "private room", "shared room", "hotel room"]
-            for rt in room_types:
-                if rt in title_text or rt in page_text.lower()[:2000]:
-                    data["room_type"] = rt.title()
-                    if "shared" in rt:
-                        data["room_shared"] = True
-                    elif "private" in rt:
-                        data["room_private"] = True
-                    break
-            
-            if any(word in page_text.lower()[:3000] for word in ["multiple rooms", "several rooms", "多个房间"]):
-                data["multi"] = True
-            
-            if any(word in page_text.lower()[:3000] for word in ["business", "work", "desk", "workspace", "entrepreneur"]):
-                data["biz"] = True
-        except:
-            pass
-        
-        # Extract city and host info
-        try:
-            full_title = page.title()
-            title_parts = full_title.split(" - ")
-            if len(title_parts) >= 2:
-                location_part = title_parts[-2] if "Airbnb" in title_parts[-1] else title_parts[-1]
-                location_parts = location_part.split(",")
-                if location_parts:
-                    data["city"] = location_parts[0].strip()
-            
-            if "superhost" in page_text.lower():
-                data["host_is_superhost"] = True
-        except:
-            pass
-        
-        # Extract lat/lng from scripts
-        try:
-            all_scripts_content = ""
-            scripts = page.query_selector_all('script')
-            for script in scripts:
-                try:
-                    all_scripts_content += script.inner_text(timeout=1000) + " "
-                except:
-                    continue
-            
-            # Try multiple patterns to find coordinates
-            lat_patterns = [
-                r'"lat"\s*:\s*([-\d.]+)',
-                r'"latitude"\s*:\s*([-\d.]+)',
-                r'"pdp_listing_detail".*?"lat"\s*:\s*([-\d.]+)',
-                r'listing.*?"lat"\s*:\s*([-\d.]+)',
-                r'"location".*?"lat"\s*:\s*([-\d.]+)',
-            ]
-            lng_patterns = [
-                r'"lng"\s*:\s*([-\d.]+)',
-                r'"longitude"\s*:\s*([-\d.]+)',
-                r'"pdp_listing_detail".*?"lng"\s*:\s*([-\d.]+)',
-                r'listing.*?"lng"\s*:\s*([-\d.]+)',
-                r'"location".*?"lng"\s*:\s*([-\d.]+)',
-            ]
-            
-            for lat_pat, lng_pat in zip(lat_patterns, lng_patterns):
-                lat_match = re.search(lat_pat, all_scripts_content)
-                lng_match = re.search(lng_pat, all_scripts_content)
-                if lat_match and lng_match:
-                    lat_val = float(lat_match.group(1))
-                    lng_val = float(lng_match.group(1))
-                    # Validate coordinates are reasonable (not 0,0)
-                    if abs(lat_val) > 0.1 and abs(lng_val) > 0.1:
-                        data["lat"] = lat_val
-                        data["lng"] = lng_val
-                        break
-            
-            # Fallback: search in page HTML source
-            if not data["lat"]:
-                try:
-                    html_content = page.content()
-                    lat_match = re.search(r'"lat"\s*:\s*([-\d.]+)', html_content)
-                    lng_match = re.search(r'"lng"\s*:\s*([-\d.]+)', html_content)
-                    if lat_match and lng_match:
-                        lat_val = float(lat_match.group(1))
-                        lng_val = float(lng_match.group(1))
-                        if abs(lat_val) > 0.1 and abs(lng_val) > 0.1:
-                            data["lat"] = lat_val
-                            data["lng"] = lng_val
-                except:
-                    pass
-        except:
-            pass
-        
-        # PERSON_CAPACITY / BEDROOMS / BEDS / BATHROOMS
-        try:
-            info_text = page_text.lower()
-            
-            guests_match = re.search(r'(\d+)\s*guest', info_text)
-            if guests_match:
-                data["person_capacity"] = int(guests_match.group(1))
-            
-            bedroom_match = re.search(r'(\d+)\s*bedroom', info_text)
-            if bedroom_match:
-                data["bedrooms"] = int(bedroom_match.group(1))
-            
-            bed_match = re.search(r'(\d+)\s*bed(?!room)', info_text)
-            if bed_match:
-                data["beds"] = int(bed_match.group(1))
-            
-            bath_match = re.search(r'(\d+)\s*bath', info_text)
-            if bath_match:
-                data["bathrooms"] = int(bath_match.group(1))
-        except:
-            pass
-        
-        # REALSUM (PRICE PER NIGHT)
-
-        try:
-            price_match = re.search(r'[\$€£¥₹]\s*([\d,]+)\s*(?:per\s*)?(?:/\s*)?night', page_text, re.IGNORECASE)
-            if price_match:
-                data["realSum"] = int(price_match.group(1).replace(',', ''))
-            else:
-                price_match2 = re.search(r'[\$€£]([\d,]+)', page_text[:5000])
-                if price_match2:
-                    data["realSum"] = int(price_match2.group(1).replace(',', ''))
-        except:
-            pass
-        
-        # Extract review count
-        try:
-            review_match = re.search(r'([\d,]+)\s*review', page_text.lower())
-            if review_match:
-                data["review_count"] = int(review_match.group(1).replace(',', ''))
-        except:
-            pass
-        
-        # Extract ratings
-        try:
-            rating_elem = page.query_selector('span[aria-label*="rating"]')
-            if rating_elem:
-                rating_text = rating_elem.get_attribute('aria-label') or rating_elem.inner_text()
-                rating_match = re.search(r'([\d\.]+)', rating_text)
-                if rating_match:
-                    val = float(rating_match.group(1))
-                    if val <= 5:
-                        data["guest_satisfaction_overall"] = val
-            
-            if not data["guest_satisfaction_overall"]:
-                overall_patterns = [
-                    r'([\d\.]+)\s*rating',
-                    r'rated\s*([\d\.]+)',
-                    r'rating[:\s]*([\d\.]+)',
-                    r'★\s*([\d\.]+)',
-                ]
-                for pattern in overall_patterns:
-                    rating_match = re.search(pattern, page_text.lower())
-                    if rating_match:
-                        val = float(rating_match.group(1))
-                        if 0 < val <= 5:
-                            data["guest_satisfaction_overall"] = val
-                            break
-            
-            cleanliness_match = re.search(r'cleanliness[:\s]*([\d\.]+)', page_text.lower())
-            if cleanliness_match:
-                val = float(cleanliness_match.group(1))
-                if val <= 5:
-                    data["cleanliness_rating"] = val
-        except:
-            pass
-        
-        # Extract amenities
-        try:
-            amenities_text = []
-            amenities_selectors = [
-                '[data-section-id="AMENITIES_DEFAULT"] div[role="listitem"]',
-                'div[data-testid="amenity-row"]',
-            ]
-            
-            for selector in amenities_selectors:
-                amenity_items = page.query_selector_all(selector)
-                if amenity_items:
-                    amenities_text = list(set([item.inner_text().strip().lower() for item in amenity_items if item.inner_text().strip()]))
-                    if amenities_text:
-                        break
-            
-            if not amenities_text:
-                amenities_text = [page_text.lower()]
-            
-            amenities_str = ' '.join(amenities_text)
-            data["wifi"] = any(word in amenities_str for word in ["wifi", "internet", "wi-fi"])
-            data["kitchen"] = "kitchen" in amenities_str
-            data["air_conditioning"] = any(word in amenities_str for word in ["air conditioning", "ac", "a/c", "cooling"])
-            data["parking"] = any(word in amenities_str for word in ["parking", "garage"])
-            data["tv"] = any(word in amenities_str for word in ["tv", "television", "hdtv"])
-            data["heating"] = "heating" in amenities_str
-        except:
-            pass
-        
         print(f"   [+] Extracted: {data.get('city', 'Unknown')} - {data.get('room_type', 'Unknown')}")
         return data
         
@@ -363,63 +170,150 @@ def scrape_listing_details(page, url: str) -> Optional[Dict]:
         return None
 
 
-def scrape_all_listings(search_url: str, output_file: str = "airbnb_listings.csv", max_listings: int = 50):
+def scrape_all_listings(search_url: str, output_file: str = "airbnb_listings.csv", max_listings: int = 50,
+                        concurrency: int = 1, per_host_rate: float = 3.0, block_requests: bool = True,
+                        capture_api: bool = False, record_dir: Optional[str] = None, keep_results: bool = True,
+                        frontier_file: Optional[str] = None, ttl_hours: float = 24.0, discovery_workers: int = 1):
     """
     Main function: scrape search page, then visit each listing for details
+
+    By default (concurrency=1) the listings are fetched one by one on a single page.
+    concurrency > 1 opts into the async engine (concurrency pages in flight,
+    at most per_host_rate navigations per second).
+    block_requests drops images, fonts, media and trackers, which the parsers never read.
+    capture_api parses Airbnb's search/listing JSON responses, falling back to the DOM.
+    record_dir saves every search and listing page as a fixture for benchmark.py.
+    Each listing is appended to <output>.jsonl as it completes; the CSV and JSON are
+    compacted from it at the end. keep_results=False keeps memory constant on long runs
+    (the records are then only on disk and an empty list is returned).
+    frontier_file checkpoints every listing's status in a SQLite frontier: a rerun of
+    the same search resumes, skipping listings scraped within the last ttl_hours, and
+    keeps <output>.jsonl so the CSV/JSON still cover the listings of earlier runs.
+    For weekly incremental runs use e.g. ttl_hours=24 * 28; with capture_api a listing
+    whose search-card price differs from its stored realSum is revisited early.
+    discovery_workers > 1 discovers listings through parallel map-tile / price-band
+    sub-searches instead of one scrolled search (for targets above a few hundred).
     """
     print("=" * 60)
     print("AIRBNB SCRAPER - Multi-Listing Mode")
     print("=" * 60)
     
     # Step 1: Get all listing URLs from search page
-    listing_urls = scrape_search_page(search_url, max_listings)
+    blocker = RequestBlocker(enabled=block_requests)
+    extraction_stats.reset()
+    recorder = FixtureStore(record_dir) if record_dir else None
+    frontier = UrlFrontier(frontier_file, max_age_hours=ttl_hours) if frontier_file else None
+    if frontier and frontier.recovered:
+        print(f"[*] Frontier: {frontier.recovered} listings left in flight by the last run are queued again")
+    listing_urls = scrape_search_page(search_url, max_listings, blocker, capture_api, recorder, frontier,
+                                      discovery_workers)
     
     if not listing_urls:
         print("\n[X] No listings found on search page")
+        if frontier:
+            frontier.close()
         return []
     
+    if frontier:
+        # Lease what is due among the listings this search found: new, stale, repriced or failed ones.
+        # Keyed on listing id, so a changed search URL (dates, currency, tiles) still finds them.
+        listing_urls = frontier.lease(urls=listing_urls, limit=max_listings)
+        print(f"[*] Frontier: {len(listing_urls)} listings due (fresh ones are skipped)")
+    
     print(f"\n[*] Will scrape {len(listing_urls)} listings...")
-    time.sleep(2)
     
-    # Step 2: Visit each listing and extract details
+    csv_file = output_file.replace('.json', '.csv') if output_file.endswith('.json') else output_file
+    json_file = csv_file.replace('.csv', '.json')
+    jsonl_file = csv_file.replace('.csv', '.jsonl')
+    
+    # Step 2: Visit each listing and extract details, streaming each record to disk
     all_data = []
+    sink = ResultSink(jsonl_file)
+    print(f"[*] Streaming results to {jsonl_file}")
     
-    with sync_playwright() as p:
-        browser, context = get_browser_context(p)
+    def keep(data):
+        sink.write(data)
+        if keep_results:
+            all_data.append(data)
+    
+    def checkpoint(url, data, reason="no listing data"):
+        if frontier:
+            if data:
+                frontier.done(url, data.get("realSum"))
+            else:
+                frontier.failed(url, reason)
+    
+    if not listing_urls:
+        print("[*] Every listing is fresh in the frontier, nothing to scrape")
+    elif concurrency > 1:
+        print(f"[*] Async engine: {concurrency} pages in flight, {per_host_rate} requests/s per host")
+        done = [0]
+        
+        def report(url, data):
+            done[0] += 1
+            checkpoint(url, data, engine.errors.get(url, "no listing data"))
+            if data:
+                keep(data)
+                print(f"   [+] [{done[0]}/{len(listing_urls)}] {data.get('city', 'Unknown')} - {data.get('room_type', 'Unknown')}")
+            else:
+                print(f"   [!] [{done[0]}/{len(listing_urls)}] Failed: {url}")
+        
+        engine = AsyncScrapeEngine(concurrency=concurrency, per_host_rate=per_host_rate, parser=parse_listing_details,
+                                   blocker=blocker, readiness=readiness,
+                                   capture_api=capture_api, recorder=recorder)
         try:
-            page = context.new_page()
+            engine.run(listing_urls, on_result=report, collect=False)
+        except Exception as e:
+            print(f"[!] Error during scraping: {e}")
+        print(f"\n   [*] {sink.count} listings in {engine.stats['elapsed']:.1f}s")
+    
+    else:
+        with sync_playwright() as p:
+            browser, context = get_browser_context(p, blocker)
+            try:
+                page = context.new_page()
+                capture = ResponseCapture(patterns=(LISTING_API_PATTERN,)).attach(page) if capture_api else None
             
-            # Add stealth script
-            page.add_init_script("""
-                Object.defineProperty(navigator, 'webdriver', {get: () => undefined});
-                Object.defineProperty(navigator, 'plugins', {get: () => [1, 2, 3, 4, 5]});
-            """)
+                # Add stealth script
+                page.add_init_script("""
+                    Object.defineProperty(navigator, 'webdriver', {get: () => undefined});
+                    Object.defineProperty(navigator, 'plugins', {get: () => [1, 2, 3, 4, 5]});
+                """)
             
-            for i, url in enumerate(listing_urls, 1):
-                print(f"\n--- Listing {i}/{len(listing_urls)} ---")
+                for i, url in enumerate(listing_urls, 1):
+                    print(f"\n--- Listing {i}/{len(listing_urls)} ---")
                 
-                data = scrape_listing_details(page, url)
+                    data = scrape_listing_details(page, url, capture, recorder)
+                    checkpoint(url, data)
                 
-                if data:
-                    all_data.append(data)
+                    if data:
+                        keep(data)
                 
-                # Delay between requests to avoid rate limiting
-                if i < len(listing_urls):
-                    delay = 3 + (i % 3)  # 3-5 seconds delay
-                    print(f"   [*] Waiting {delay}s before next request...")
-                    time.sleep(delay)
+                    # Delay between requests to avoid rate limiting
+                    if i < len(listing_urls):
+                        delay = 3 + (i % 3)  # 3-5 seconds delay
+                        print(f"   [*] Waiting {delay}s before next request...")
+                        time.sleep(delay)
                     
-        except Exception as e:
-            print(f"[!] Error during scraping: {e}")
-        finally:
-            browser.close()
-            print("\n   [*] Browser closed")
+            except Exception as e:
+                print(f"[!] Error during scraping: {e}")
+            finally:
+                browser.close()
+                print("\n   [*] Browser closed")
     
-    # Step 3: Save results
-    if all_data:
-        # Save as CSV with specific column order
-        csv_file = output_file.replace('.json', '.csv') if output_file.endswith('.json') else output_file
-        
+    sink.close()
+    if block_requests:
+        print(f"   [*] {blocker.summary()}")
+    print(f"   [*] Readiness: {readiness.summary()}")
+    print(f"   [*] Extraction: {extraction_stats.summary()}")
+    if recorder:
+        print(f"   [*] {recorder.summary()}")
+    if frontier:
+        print(f"   [*] {frontier.summary(search_url)}")
+        frontier.close()
+    
+    # Step 3: Compact the streamed records (including any left by a crashed run) into CSV + JSON
+    if Path(jsonl_file).stat().st_size:
         # Define column order - all extractable fields
         fieldnames = [
             "realSum",
@@ -446,17 +340,13 @@ def scrape_all_listings(search_url: str, output_file: str = "airbnb_listings.csv
             "heating",
         ]
         
-        with open(csv_file, 'w', newline='', encoding='utf-8') as f:
-            writer = csv.DictWriter(f, fieldnames=fieldnames, extrasaction='ignore')
-            writer.writeheader()
-            writer.writerows(all_data)
-        
-        # Also save as JSON
-        json_file = csv_file.replace('.csv', '.json')
-        Path(json_file).write_text(json.dumps(all_data, ensure_ascii=False, indent=2), encoding='utf-8')
+        # Last record per listing id wins (a restarted run may have appended it twice)
+        # With a frontier the JSON Lines file is the run-spanning store, so it is kept
+        saved = compact(jsonl_file, csv_file, fieldnames, json_path=json_file, key="id",
+                        remove_source=frontier is None)
         
         print("\n" + "=" * 60)
-        print(f"[SUCCESS] Scraped {len(all_data)} listings!")
+        print(f"[SUCCESS] Scraped {saved} listings!")
         print(f"   CSV: {csv_file}")
         print(f"   JSON: {json_file}")
         print("=" * 60)
@@ -466,7 +356,7 @@ def scrape_all_listings(search_url: str, output_file: str = "airbnb_listings.csv
     return all_data
 
 
-def scrape_airbnb_listing(url: str, output_file: str = "airbnb_detailed.json") -> Optional[Dict]:
+def scrape_airbnb_listing(url: str, output_file: str = "airbnb_detailed.json", block_requests: bool = True) -> Optional[Dict]:
     """
     Scrape a single Airbnb listing - simplified version with essential fields only
     """
@@ -516,6 +406,8 @@ def scrape_airbnb_listing(url: str, output_file: str = "airbnb_detailed.json") -
                     'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
                 }
             )
+            blocker = RequestBlocker(enabled=block_requests)
+            blocker.attach(context)
             
             page = context.new_page()
             page.add_init_script("""
@@ -525,116 +417,27 @@ def scrape_airbnb_listing(url: str, output_file: str = "airbnb_detailed.json") -
 
             print(f"[*] Loading: {url}")
             page.goto(url, wait_until="domcontentloaded", timeout=90000)
-            time.sleep(5)
-            
-            try:
-                page.wait_for_load_state("networkidle", timeout=30000)
-                print("   [+] Page fully loaded")
-            except:
-                print("   [!] Continuing without waiting for networkidle")
-            
-            time.sleep(3)
-            
-            # Check for error pages
-            page_title = page.title().lower()
-            h1_elem = page.query_selector('h1')
-            h1_text = h1_elem.inner_text().strip().lower() if h1_elem else ""
+            signal = readiness.wait_for_listing(page)
+            if signal:
+                print(f"   [+] Page ready ({signal})")
+            else:
+                print("   [!] Continuing without a readiness signal")
             
-            if "oops" in page_title or "oops" in h1_text or "not found" in page_title:
+            # Same precompiled rules as the multi-listing scraper
+            details = parse_listing_details(url, snapshot_page(page))
+            if details is None:
                 print(f"   [!] ERROR: Invalid listing URL")
                 return None
             
-            # Get page text
-            page_text = page.inner_text('body').lower()
-            
-            # CITY
-            try:
-                title_parts = page.title().split(" - ")
-                if len(title_parts) >= 2:
-                    location_part = title_parts[-2] if "Airbnb" in title_parts[-1] else title_parts[-1]
-                    data["city"] = location_part.split(",")[0].strip()
-            except:
-                pass
-            
-            # ROOM TYPE
-            room_types = ["entire home", "entire place", "private room", "shared room", "hotel room"]
-            for rt in room_types:
-                if rt in h1_text or rt in page_text[:2000]:
-                    data["room_type"] = rt.title()
-                    break
-            
-            # LAT & LNG
-            try:
-                scripts = page.query_selector_all('script')
-                for script in scripts:
-                    try:
-                        content = script.inner_text(timeout=2000)
-                        lat_match = re.search(r'"lat"\s*:\s*([-\d.]+)', content)
-                        lng_match = re.search(r'"lng"\s*:\s*([-\d.]+)', content)
-                        if lat_match and lng_match:
-                            data["lat"] = float(lat_match.group(1))
-                            data["lng"] = float(lng_match.group(1))
-                            break
-                    except:
-                        continue
-            except:
-                pass
-            
-            # PERSON_CAPACITY / BEDROOMS / BEDS / BATHROOMS
-            guests_match = re.search(r'(\d+)\s*guest', page_text)
-            if guests_match:
-                data["person_capacity"] = int(guests_match.group(1))
-            
-            bedroom_match = re.search(r'(\d+)\s*bedroom', page_text)
-            if bedroom_match:
-                data["bedrooms"] = int(bedroom_match.group(1))
-            
-            bed_match = re.search(r'(\d+)\s*bed(?!room)', page_text)
-            if bed_match:
-                data["beds"] = int(bed_match.group(1))
-            
-            bath_match = re.search(r'(\d+)\s*bath', page_text)
-            if bath_match:
-                data["bathrooms"] = int(bath_match.group(1))
-            
-            # PRICE (realSum)
-            price_match = re.search(r'[\$€£¥₹]\s*([\d,]+)\s*(?:per\s*)?(?:/\s*)?night', page_text, re.IGNORECASE)
-            if price_match:
-                data["realSum"] = int(price_match.group(1).replace(',', ''))
-            else:
-                price_match2 = re.search(r'[\$€£]([\d,]+)', page_text[:5000])
-                if price_match2:
-                    data["realSum"] = int(price_match2.group(1).replace(',', ''))
-            
-            # RATINGS
-            rating_elem = page.query_selector('span[aria-label*="rating"]')
-            if rating_elem:
-                rating_text = rating_elem.get_attribute('aria-label') or rating_elem.inner_text()
-                rating_match = re.search(r'([\d\.]+)', rating_text)
-                if rating_match:
-                    data["rating_overall"] = float(rating_match.group(1))
-            
-            cleanliness_match = re.search(r'cleanliness[:\s]*([\d\.]+)', page_text)
-            if cleanliness_match:
-                val = float(cleanliness_match.group(1))
-                if val <= 5:
-                    data["rating_cleanliness"] = val
-            
-            # REVIEW COUNT
-            review_match = re.search(r'([\d,]+)\s*review', page_text)
-            if review_match:
-                data["review_count"] = int(review_match.group(1).replace(',', ''))
-            
-            # AMENITIES
-            amenities_str = page_text
-            data["wifi"] = any(word in amenities_str for word in ["wifi", "internet", "wi-fi"])
-            data["kitchen"] = "kitchen" in amenities_str
-            data["air_conditioning"] = any(word in amenities_str for word in ["air conditioning", "ac", "a/c", "cooling"])
-            data["parking"] = any(word in amenities_str for word in ["parking", "garage"])
-            data["tv"] = any(word in amenities_str for word in ["tv", "television", "hdtv"])
-            data["heating"] = "heating" in amenities_str
+            for field in data:
+                if field in details:
+                    data[field] = details[field]
+            data["rating_overall"] = details["guest_satisfaction_overall"]
+            data["rating_cleanliness"] = details["cleanliness_rating"]
             
             print(f"   [+] Extracted: {data.get('city', 'Unknown')} - {data.get('room_type', 'Unknown')}")
+            if block_requests:
+                print(f"   [*] {blocker.summary()}")
 
         except Exception as main_error:
             print(f"\n[X] Main error during scraping: {main_error}")
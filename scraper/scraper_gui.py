@@ -2,24 +2,60 @@ import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
 from tkinter.scrolledtext import ScrolledText
 import threading
-import json
 import csv
 import re
-import time
-import sys
 from pathlib import Path
-from datetime import datetime, timedelta
-from typing import Dict, Optional, List
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, Optional, List
+from concurrent.futures import as_completed
+
+from fixtures import FixtureStore
+from frontier import UrlFrontier
+from result_sink import ResultSink, compact
+from listing_parser import ListingUrlSet, extraction_stats, listing_hrefs, parse_listing, snapshot_page
 
 # Check if playwright is installed
 try:
     from playwright.sync_api import sync_playwright
+    from browser_pool import BrowserPool
+    from city_scheduler import MultiCityScheduler
+    from discovery_planner import DiscoveryPlanner, plan_sub_searches
+    from async_engine import AsyncScrapeEngine
+    from request_blocking import RequestBlocker
+    from readiness import PageReadiness
+    from response_capture import (LISTING_API_PATTERN, SEARCH_API_PATTERN, ResponseCapture,
+                                  parse_api_listing, parse_api_search)
     PLAYWRIGHT_AVAILABLE = True
 except ImportError:
     PLAYWRIGHT_AVAILABLE = False
 
 
+# Column order of the per-city CSV files
+CSV_FIELDNAMES = [
+    "url",
+    "realSum",
+    "room_type",
+    "room_shared",
+    "room_private",
+    "person_capacity",
+    "host_is_superhost",
+    "multi",
+    "biz",
+    "cleanliness_rating",
+    "guest_satisfaction_overall",
+    "bedrooms",
+    "city",
+    "lng",
+    "lat",
+    "beds",
+    "wifi",
+    "kitchen",
+    "air_conditioning",
+    "parking",
+    "tv",
+    "heating",
+]
+
+
 class AirbnbScraperApp:
     def __init__(self, root):
         self.root = root
@@ -29,12 +65,22 @@ class AirbnbScraperApp:
         
         # Variables
         self.is_running = False
-        self.scraped_data = []
+        self.scraped_count = 0  # Records live in the JSON Lines sinks / saved CSVs, not in memory
+        self.saved_files = []  # CSVs written by auto-save this run (what Export CSV merges)
         self.parallel_workers = 3
         self.weekend_mode = False
         self.city_buttons = {}  # Store city buttons for color management
         self.selected_city = None
         self.executor = None  # Store executor reference for immediate cancellation
+        self.pages_per_browser = 50  # Relaunch each pooled browser after this many listings
+        self.async_pages_per_worker = 8  # Async engine: pages in flight per "Parallel Workers" unit
+        self.discovery_workers = 3  # All-cities mode: city searches scrolling at the same time
+        self.block_requests = True  # Abort images, fonts, media and trackers (never parsed)
+        self.blocker = None
+        self.recorder = None  # FixtureStore while "Record fixtures" is on
+        self.sinks = {}  # City file name -> ResultSink streaming to <city>_airbnb.jsonl
+        self.frontier = None  # UrlFrontier while "Resume runs" is on
+        self.readiness = PageReadiness() if PLAYWRIGHT_AVAILABLE else None  # Adaptive page-ready waits, shared by all workers
         
         self.setup_ui()
         
@@ -104,8 +150,33 @@ class AirbnbScraperApp:
         # Parallel workers
         ttk.Label(input_frame, text="Parallel Workers:").grid(row=2, column=0, sticky=tk.W, pady=5)
         self.workers_var = tk.StringVar(value="3")
-        self.workers_entry = ttk.Entry(input_frame, width=10, textvariable=self.workers_var)
-        self.workers_entry.grid(row=2, column=1, sticky=tk.W, padx=10, pady=5)
+        workers_row = ttk.Frame(input_frame)
+        workers_row.grid(row=2, column=1, sticky=tk.W, padx=10, pady=5)
+        self.workers_entry = ttk.Entry(workers_row, width=10, textvariable=self.workers_var)
+        self.workers_entry.pack(side=tk.LEFT)
+        
+        # Async engine: many pages per browser instead of one browser per worker
+        self.async_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(workers_row, text="Async engine", variable=self.async_var).pack(side=tk.LEFT, padx=10)
+        
+        # API capture: parse Airbnb's JSON responses, DOM parsing only as a fallback
+        self.capture_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(workers_row, text="API capture", variable=self.capture_var).pack(side=tk.LEFT, padx=10)
+        
+        # Record fixtures: save every search/listing page for offline benchmarks (benchmark.py)
+        self.record_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(workers_row, text="Record fixtures", variable=self.record_var).pack(side=tk.LEFT, padx=10)
+        
+        # Resume runs: checkpoint listings in frontier.db and only revisit listings older than
+        # the TTL or whose search-card price differs from the stored realSum (incremental mode)
+        self.resume_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(workers_row, text="Resume runs, TTL (h):", variable=self.resume_var).pack(side=tk.LEFT, padx=(10, 2))
+        self.ttl_var = tk.StringVar(value="24")
+        ttk.Entry(workers_row, width=5, textvariable=self.ttl_var).pack(side=tk.LEFT)
+        
+        # Tiled search: split the search into map tiles x price bands, past the per-search result cap
+        self.tiled_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(workers_row, text="Tiled search", variable=self.tiled_var).pack(side=tk.LEFT, padx=10)
         
         # Popular cities buttons
         cities_frame = ttk.Frame(input_frame)
@@ -204,7 +275,7 @@ class AirbnbScraperApp:
             self.selected_city = city
     
     def scrape_all_cities(self):
-        """Scrape all cities sequentially"""
+        """Scrape all cities (searches run in parallel, listings share one worker pool)"""
         if self.is_running:
             messagebox.showwarning("Already Running", "Scraper is already running!")
             return
@@ -235,49 +306,115 @@ class AirbnbScraperApp:
         thread.start()
     
     def _scrape_all_cities_worker(self):
-        """Worker to scrape all cities"""
+        """Worker to scrape all cities: parallel search discovery feeding one shared detail pool"""
         total_cities = len(self.cities_list)
+        try:
+            max_listings = int(self.max_listings_var.get())
+        except ValueError:
+            max_listings = 20
+        try:
+            max_workers = max(1, min(int(self.workers_var.get()), 10))
+        except ValueError:
+            max_workers = 3
         
-        for idx, city in enumerate(self.cities_list, 1):
-            if not self.is_running:
-                self.log("\n Stopped by user")
-                break
-            
-            self.log(f"\n{'='*60}")
-            self.log(f" [{idx}/{total_cities}] Starting {city}...")
-            self.log(f"{'='*60}\n")
-            
-            # Set city and scrape
-            self.input_entry.delete(0, tk.END)
-            self.input_entry.insert(0, city)
-            
-            # Save current count to detect new listings
-            before_count = len(self.scraped_data)
-            
-            # Call the regular scraping logic
-            self._run_scraping(city_mode=True)
+        self.log(f"\n{'='*60}")
+        self.log(f" Scraping {total_cities} cities: {self.discovery_workers} searches at a time, "
+                 f"{max_workers} detail workers shared")
+        self.log(f"{'='*60}\n")
+        
+        self.blocker = RequestBlocker(enabled=self.block_requests)
+        extraction_stats.reset()
+        self.recorder = FixtureStore() if self.record_var.get() else None
+        self.open_frontier()
+        completed = [0]
+        
+        def discover_city(page, city, emit):
+            search_url = f"https://www.airbnb.com/s/{city.replace(' ', '-')}/homes?currency=USD"
+            discover = self.discover_listings
+            if self.tiled_var.get():
+                # The pooled search page is not used: the city's sub-searches get browsers of their own
+                discover = lambda page, search_url, max_listings, emit: self.discover_tiled(search_url, max_listings, emit)
+            if not self.frontier:
+                listing_urls, price_data = discover(page, search_url, max_listings, emit)
+                return price_data
             
-            # Auto-save after each city if new data was added
-            after_count = len(self.scraped_data)
-            if after_count > before_count:
-                # Save only the new listings for this city
-                new_listings = self.scraped_data[before_count:after_count]
-                self.auto_save_city(city, new_listings)
+            # Only listings that are due reach the detail pool, and only as many as the city's quota takes
+            # (a lease the scheduler would drop would sit in_flight until the next run)
+            def emit_due(urls):
+                self.frontier.add(urls, scope=search_url)
+                emit(self.frontier.lease(urls=urls, limit=scheduler.room(city)))
             
-            # Brief pause between cities
-            if idx < total_cities and self.is_running:
-                self.log(f"\n⏳ Waiting 5 seconds before next city...\n")
-                time.sleep(5)
+            listing_urls, price_data = discover(page, search_url, max_listings, emit_due)
+            # Repriced listings follow once the search-card prices are known
+            changed = self.frontier.reprice(price_data)
+            if changed:
+                self.log(f"{city}: {changed} listings changed price since their last scrape")
+            emit(self.frontier.lease(urls=listing_urls, limit=scheduler.room(city)))
+            return price_data
+        
+        def on_result(city, url, data, search_price):
+            completed[0] += 1
+            self.progress_var.set(min(100, (completed[0] / (total_cities * max_listings)) * 100))
+            self.status_var.set(f"Completed {completed[0]} listings...")
+            data = self.apply_search_context(data, city, search_price)
+            self.checkpoint(url, data)
+            if data:
+                self.keep_result(city, data)
+                self.log(f"[{city} {completed[0]}] {data.get('room_type', '?')}")
+            return data
+        
+        def on_search_price(city, url, data, search_price):
+            # Scraped before the city's search finished: fill a missing price and stream the update
+            # (compaction keeps the last record per URL)
+            if not data.get('realSum'):
+                data['realSum'] = search_price
+                self.stream_result(city, data)
+        
+        def on_city_done(city, count):
+            self.log(f"\n {city}: {count} listings")
+            if count:
+                self.auto_save_city(city)
+        
+        scheduler = MultiCityScheduler(
+            discover=discover_city,
+            scrape=lambda page, url: self.scrape_single_listing(page, url, completed[0] + 1, total_cities * max_listings),
+            quota=max_listings,
+            detail_workers=max_workers,
+            discovery_workers=min(self.discovery_workers, total_cities),
+            max_pages=self.pages_per_browser,
+            blocker=self.blocker,
+            log=self.log,
+            should_stop=lambda: not self.is_running,
+        )
+        self.executor = scheduler  # Stop button cancels through executor.shutdown()
+        try:
+            scheduler.run(self.cities_list, on_result=on_result, on_city_done=on_city_done,
+                          on_search_price=on_search_price)
+        except Exception as e:
+            self.log(f"Error: {str(e)[:100]}")
+        finally:
+            self.executor = None
+            self.auto_save()  # Cities cut short by Stop still get their CSV
+        
+        if not self.is_running:
+            self.log("\n Stopped by user")
         
         self.log(f"\n{'='*60}")
         self.log(f"ALL CITIES COMPLETED!")
-        self.log(f"Total scraped: {len(self.scraped_data)} listings across all cities")
+        self.log(f"Total scraped: {self.scraped_count} listings across all cities")
         self.log(f"{'='*60}")
+        if self.block_requests:
+            self.log(self.blocker.summary())
+        self.log(f"Readiness: {self.readiness.summary()}")
+        self.log(f"Extraction: {extraction_stats.summary()}")
+        if self.recorder:
+            self.log(self.recorder.summary())
+        self.close_frontier()
         
         self.is_running = False
         self.start_btn.config(state=tk.NORMAL)
         self.stop_btn.config(state=tk.DISABLED)
-        if self.scraped_data:
+        if self.scraped_count:
             self.export_btn.config(state=tk.NORMAL)
     
     def log(self, message):
@@ -287,7 +424,8 @@ class AirbnbScraperApp:
     
     def clear_log(self):
         self.log_text.delete(1.0, tk.END)
-        self.scraped_data = []
+        self.scraped_count = 0
+        self.saved_files = []
         self.results_var.set("No data scraped yet")
         self.export_btn.config(state=tk.DISABLED)
         self.progress_var.set(0)
@@ -299,7 +437,8 @@ class AirbnbScraperApp:
         self.is_running = True
         self.start_btn.config(state=tk.DISABLED)
         self.stop_btn.config(state=tk.NORMAL)
-        self.scraped_data = []
+        self.scraped_count = 0
+        self.saved_files = []
         
         # Run in thread to avoid freezing UI
         thread = threading.Thread(target=self.scrape_thread)
@@ -382,115 +521,37 @@ class AirbnbScraperApp:
                         'Upgrade-Insecure-Requests': '1',
                     }
                 )
-                page = context.new_page()
-                
-                # Advanced stealth
-                page.add_init_script("""
-                    Object.defineProperty(navigator, 'webdriver', {get: () => undefined});
-                    Object.defineProperty(navigator, 'plugins', {get: () => [1, 2, 3, 4, 5]});
-                    Object.defineProperty(navigator, 'languages', {get: () => ['en-US', 'en']});
-                    window.chrome = {runtime: {}};
-                """)
-                
-                self.status_var.set("Loading search page...")
-                self.log(f"Loading: {search_url}")
-                page.goto(search_url, wait_until="domcontentloaded", timeout=45000)
-                time.sleep(3)
-                
-                try:
-                    page.wait_for_load_state("networkidle", timeout=10000)
-                except:
-                    pass
-                
-                # Progressive URL extraction with scrolling
-                self.log(f"Extracting listings (target: {max_listings})...")
-                
-                listing_urls = []
-                consecutive_no_change = 0
-                scroll_count = 0
-                max_scrolls = 150  # Safety limit
-                
-                while len(listing_urls) < max_listings and scroll_count < max_scrolls and consecutive_no_change < 8:
-                    if not self.is_running:
-                        break
-                    
-                    previous_count = len(listing_urls)
-                    
-                    # Scroll to bottom of page
-                    page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
-                    time.sleep(1.2)  # Longer wait for content to load
-                    scroll_count += 1
-                    
-                    # Extract URLs after each scroll
-                    selectors = [
-                        'a[href*="/rooms/"]',
-                        'div[data-testid="card-container"] a',
-                    ]
-                    
-                    for selector in selectors:
-                        try:
-                            links = page.query_selector_all(selector)
-                            for link in links:
-                                href = link.get_attribute('href')
-                                if href and '/rooms/' in href:
-                                    if href.startswith('/'):
-                                        href = f"https://www.airbnb.com{href}"
-                                    clean_url = href.split('?')[0]
-                                    if clean_url not in listing_urls:
-                                        listing_urls.append(clean_url)
-                                if len(listing_urls) >= max_listings:
-                                    break
-                            if len(listing_urls) >= max_listings:
-                                break
-                        except:
-                            continue
-                    
-                    # Check if we found new listings
-                    if len(listing_urls) == previous_count:
-                        consecutive_no_change += 1
-                    else:
-                        consecutive_no_change = 0
-                    
-                    # Log progress every 5 scrolls
-                    if scroll_count % 5 == 0:
-                        self.log(f"   Found {len(listing_urls)} listings (scrolled {scroll_count}x, no change: {consecutive_no_change})...")
-                
-                self.log(f"Scrolling complete - found {len(listing_urls)} listings")
-                
-                page.screenshot(path="search_debug.png")
+                # One blocker per run: the search page, pooled browsers and async engine share its counters
+                self.blocker = RequestBlocker(enabled=self.block_requests)
+                self.blocker.attach(context)
+                extraction_stats.reset()
+                self.recorder = FixtureStore() if self.record_var.get() else None
+                self.open_frontier()
+                if self.tiled_var.get():
+                    listing_urls, price_data = self.discover_tiled(search_url, max_listings)
+                else:
+                    page = context.new_page()
+                    listing_urls, price_data = self.discover_listings(page, search_url, max_listings)
+                    page.screenshot(path="search_debug.png")
                 
                 if not listing_urls:
                     self.log("No listings found")
                     return
                 
-                self.log("Extracting prices from search results...")
-                price_data = {}
-                try:
-                    # More efficient: use selector to find price elements directly
-                    price_elements = page.query_selector_all('[data-testid="price-availability-row"] span, span._tyxjp1, span[class*="price"]')
-                    
-                    prices = []
-                    for elem in price_elements[:len(listing_urls) * 2]:  # Get a bit more in case of duplicates
-                        try:
-                            text = elem.inner_text()
-                            # Extract first number found
-                            match = re.search(r'\$(\d+)', text)
-                            if match:
-                                price_val = int(match.group(1))
-                                if 5 < price_val < 50000:  # Reasonable price range
-                                    prices.append(price_val)
-                        except:
-                            continue
-                    
-                    for i, url in enumerate(listing_urls):
-                        if i < len(prices):
-                            price_data[url] = prices[i]
-                        
-                except Exception as e:
-                    self.log(f"Price extraction from search failed: {str(e)[:50]}")
+                if self.frontier:
+                    # Scrape only what is due among the listings found: new, stale (TTL), repriced or
+                    # failed ones. Keyed on listing id, so a changed search URL still finds them.
+                    new = self.frontier.add(listing_urls, scope=search_url)
+                    changed = self.frontier.reprice(price_data)
+                    listing_urls = self.frontier.lease(urls=listing_urls, limit=max_listings)
+                    self.log(f"Frontier: {new} new listings, {changed} price changes, "
+                             f"{len(listing_urls)} due (fresh ones are skipped)")
+                
+                if not listing_urls:
+                    self.log("No listings due (all fresh in the frontier)")
+                    return
                 
                 # Extract city from search URL
-                import re
                 city_match = re.search(r'/s/([^/]+)/homes', search_url)
                 city_name = None
                 if city_match:
@@ -508,9 +569,15 @@ class AirbnbScraperApp:
                 except:
                     max_workers = 3
                 
+                if self.async_var.get():
+                    self.scrape_listings_async(listing_urls, max_workers * self.async_pages_per_worker, city_name, price_data)
+                    return
+                
                 self.log(f"Starting parallel scraping ({max_workers} threads)...")
                 
-                self.executor = ThreadPoolExecutor(max_workers=max_workers)
+                # Each worker keeps one browser alive and opens a fresh context per listing
+                self.executor = BrowserPool(workers=max_workers, max_pages=self.pages_per_browser, log=self.log,
+                                            blocker=self.blocker)
                 try:
                     # Submit all scraping tasks with price data
                     future_to_url = {
@@ -530,68 +597,232 @@ class AirbnbScraperApp:
                         progress = (completed / len(listing_urls)) * 100
                         self.progress_var.set(progress)
                         self.status_var.set(f"Completed {completed}/{len(listing_urls)}...")
-                finally:
-                    # Clean up executor
-                    if self.executor:
-                        self.executor.shutdown(wait=False)
-                        self.executor = None
                         
                         try:
                             data = future.result()
+                            self.checkpoint(url, data)
                             if data:
-                                self.scraped_data.append(data)
+                                self.keep_result(city_name, data)
                                 self.log(f"[{completed}/{len(listing_urls)}] {data.get('city', '?')} - {data.get('room_type', '?')}")
                             else:
                                 self.log(f"[{completed}/{len(listing_urls)}] Failed")
                         except Exception as e:
+                            self.checkpoint(url, None, str(e))
                             self.log(f"[{completed}/{len(listing_urls)}] Error: {str(e)[:50]}")
+                finally:
+                    # Clean up executor (workers close their own browsers)
+                    if self.executor:
+                        stats = self.executor.stats()
+                        self.executor.shutdown(wait=False, cancel_futures=True)
+                        self.executor = None
+                        self.log(f"Browser pool: {stats['launches']} launches, {stats['crashes']} crashes")
                 
             finally:
-                pass  # Browser already closed above
+                # Browser already closed above
+                if self.blocker and self.block_requests:
+                    self.log(self.blocker.summary())
+                self.log(f"Readiness: {self.readiness.summary()}")
+                self.log(f"Extraction: {extraction_stats.summary()}")
+                if self.recorder:
+                    self.log(self.recorder.summary())
+                self.close_frontier()
     
-    def scrape_single_listing(self, url: str, index: int, total: int, city_name: str = None, search_price: int = None) -> Optional[Dict]:
-        """Scrape a single listing in a separate browser instance (for parallel processing)"""
-        with sync_playwright() as p:
-            browser = None
-            try:
-                browser = p.chromium.launch(
-                    headless=True, 
-                    args=['--no-sandbox', '--disable-blink-features=AutomationControlled']
-                )
-                context = browser.new_context(
-                    viewport={'width': 1920, 'height': 1080},
-                    user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.0.0.0 Safari/537.36",
-                    locale="en-US"
-                )
-                page = context.new_page()
-                page.add_init_script("""
-                    Object.defineProperty(navigator, 'webdriver', {get: () => undefined});
-                    Object.defineProperty(navigator, 'plugins', {get: () => [1, 2, 3, 4, 5]});
-                """)
-                
-                # Force USD currency in listing URL
-                if 'currency=' not in url:
-                    separator = '&' if '?' in url else '?'
-                    url = f"{url}{separator}currency=USD"
-                
-                # Extract data
-                data = self.extract_listing(page, url)
-                
-                # Override city with correct value from search URL
-                if data and city_name:
-                    data['city'] = city_name
-                
-                if data and search_price and not data.get('realSum'):
-                    data['realSum'] = search_price
-                    self.log(f"Using search price: ${search_price}")
-                
-                return data
+    def discover_listings(self, page, search_url: str, max_listings: int, emit: Optional[Callable[[List[str]], None]] = None):
+        """Search phase on an open page: scroll for listing URLs, then collect search-card prices
+
+        emit, if given, receives each scroll's newly found URLs as soon as they appear.
+        Returns (listing_urls, price_data).
+        """
+        capture = ResponseCapture(patterns=(SEARCH_API_PATTERN,)).attach(page) if self.capture_var.get() else None
+        
+        # Advanced stealth
+        page.add_init_script("""
+            Object.defineProperty(navigator, 'webdriver', {get: () => undefined});
+            Object.defineProperty(navigator, 'plugins', {get: () => [1, 2, 3, 4, 5]});
+            Object.defineProperty(navigator, 'languages', {get: () => ['en-US', 'en']});
+            window.chrome = {runtime: {}};
+        """)
+        
+        self.status_var.set("Loading search page...")
+        self.log(f"Loading: {search_url}")
+        page.goto(search_url, wait_until="domcontentloaded", timeout=45000)
+        self.readiness.wait_for_search(page)
+        
+        # Progressive URL extraction with scrolling
+        self.log(f"Extracting listings (target: {max_listings})...")
+        
+        # Ordered set keyed on listing id: O(1) de-duplication however long the scroll runs
+        found = ListingUrlSet(limit=max_listings)
+        hrefs = listing_hrefs(page)
+        consecutive_no_change = 0
+        scroll_count = 0
+        max_scrolls = 150  # Safety limit
+        
+        while not found.full() and scroll_count < max_scrolls and consecutive_no_change < 8:
+            if not self.is_running:
+                break
+            
+            # Scroll to bottom of page, then wait until new result links are attached
+            page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
+            self.readiness.wait_for_more(page, len(hrefs))
+            scroll_count += 1
+            
+            # Every result link's href in one round trip; new listing ids drive the stop condition
+            hrefs = listing_hrefs(page)
+            new_urls = found.add(hrefs)
+            
+            # Pipelining: hand each scroll's new listings over straight away
+            if emit and new_urls:
+                emit(new_urls)
+            
+            consecutive_no_change = 0 if new_urls else consecutive_no_change + 1
+            
+            # Log progress every 5 scrolls
+            if scroll_count % 5 == 0:
+                self.log(f"   Found {len(found)} listings (scrolled {scroll_count}x, no change: {consecutive_no_change})...")
+        
+        listing_urls = found.urls
+        self.log(f"Scrolling complete - found {len(listing_urls)} listings")
+        if self.recorder:
+            self.recorder.save_search(search_url, page.content(), capture.payloads() if capture else None)
+        
+        # API capture: search results (with exact card prices) replace the DOM links
+        api_prices = {}
+        if capture:
+            api_results = parse_api_search(capture.payloads())[:max_listings]
+            if api_results:
+                listing_urls = [result["url"] for result in api_results]
+                api_prices = {result["url"]: result["price"] for result in api_results if result["price"]}
+                self.log(f"API capture: {len(listing_urls)} listings from search responses")
+                if emit:
+                    emit(listing_urls)
+        
+        price_data = dict(api_prices)
+        if not price_data:
+            self.log("Extracting prices from search results...")
+            price_data = self.search_card_prices(page, listing_urls)
+        
+        return listing_urls, price_data
+    
+    def search_card_prices(self, page, listing_urls: List[str]) -> Dict[str, int]:
+        """Search-card prices of a results page, matched to listing_urls in card order"""
+        price_data = {}
+        try:
+            # More efficient: use selector to find price elements directly
+            price_elements = page.query_selector_all('[data-testid="price-availability-row"] span, span._tyxjp1, span[class*="price"]')
+            
+            prices = []
+            for elem in price_elements[:len(listing_urls) * 2]:  # Get a bit more in case of duplicates
+                try:
+                    text = elem.inner_text()
+                    # Extract first number found
+                    match = re.search(r'\$(\d+)', text)
+                    if match:
+                        price_val = int(match.group(1))
+                        if 5 < price_val < 50000:  # Reasonable price range
+                            prices.append(price_val)
+                except:
+                    continue
+            
+            for i, url in enumerate(listing_urls):
+                if i < len(prices):
+                    price_data[url] = prices[i]
                 
+        except Exception as e:
+            self.log(f"Price extraction from search failed: {str(e)[:50]}")
+        return price_data
+    
+    def discover_tiled(self, search_url: str, max_listings: int, emit: Optional[Callable[[List[str]], None]] = None):
+        """Search phase split into map-tile / price-band sub-searches run in parallel (discovery_planner)
+
+        Returns (listing_urls, price_data) like discover_listings.
+        """
+        sub_urls = plan_sub_searches(search_url)
+        self.status_var.set("Discovering listings...")
+        self.log(f"Tiled discovery: {len(sub_urls)} sub-searches on {self.discovery_workers} browsers "
+                 f"(target: {max_listings})")
+        planner = DiscoveryPlanner(
+            workers=self.discovery_workers,
+            readiness=self.readiness,
+            blocker=self.blocker,
+            recorder=self.recorder,
+            card_prices=self.search_card_prices,
+            max_pages=self.pages_per_browser,
+            log=self.log,
+            should_stop=lambda: not self.is_running,
+            capture_api=self.capture_var.get(),
+        )
+        return planner.run(sub_urls, max_listings, emit)
+    
+    def scrape_listings_async(self, listing_urls: List[str], concurrency: int, city_name: str = None, price_data: Dict = None):
+        """Scrape listings with the async engine (one browser, many concurrent pages)"""
+        price_data = price_data or {}
+        self.log(f"Starting async scraping ({concurrency} pages in flight)...")
+        completed = [0]
+        
+        def on_result(url, data):
+            completed[0] += 1
+            self.progress_var.set((completed[0] / len(listing_urls)) * 100)
+            self.status_var.set(f"Completed {completed[0]}/{len(listing_urls)}...")
+            data = self.apply_search_context(data, city_name, price_data.get(url.split('?')[0]))
+            self.checkpoint(url, data, engine.errors.get(url, "no listing data"))
+            if data:
+                self.keep_result(city_name, data)
+                self.log(f"[{completed[0]}/{len(listing_urls)}] {data.get('city', '?')} - {data.get('room_type', '?')}")
+            else:
+                self.log(f"[{completed[0]}/{len(listing_urls)}] Failed")
+        
+        engine = AsyncScrapeEngine(
+            concurrency=concurrency,
+            parser=parse_listing,
+            readiness=self.readiness,
+            capture_api=self.capture_var.get(),
+            should_stop=lambda: not self.is_running,
+            blocker=self.blocker,
+            recorder=self.recorder,
+        )
+        urls = [url if 'currency=' in url else f"{url}{'&' if '?' in url else '?'}currency=USD" for url in listing_urls]
+        
+        def run_engine():
+            try:
+                engine.run(urls, on_result=on_result)
             except Exception as e:
-                return None
-            finally:
-                if browser:
-                    browser.close()
+                self.log(f"Async engine error: {str(e)[:100]}")
+        
+        # Own thread: asyncio.run cannot share a thread with the open sync Playwright session
+        runner = threading.Thread(target=run_engine, daemon=True)
+        runner.start()
+        runner.join()
+        self.log(f"Async engine: {engine.stats['ok']} ok, {engine.stats['failed']} failed in {engine.stats['elapsed']:.1f}s")
+    
+    def apply_search_context(self, data: Optional[Dict], city_name: str = None, search_price: int = None) -> Optional[Dict]:
+        """Override city with the search city and fill a missing price from the search card"""
+        if data and city_name:
+            data['city'] = city_name
+        
+        if data and search_price and not data.get('realSum'):
+            data['realSum'] = search_price
+            self.log(f"Using search price: ${search_price}")
+        
+        return data
+    
+    def scrape_single_listing(self, page, url: str, index: int, total: int, city_name: str = None, search_price: int = None) -> Optional[Dict]:
+        """Scrape a single listing on a page provided by the browser pool (for parallel processing)"""
+        try:
+            # Force USD currency in listing URL
+            if 'currency=' not in url:
+                separator = '&' if '?' in url else '?'
+                url = f"{url}{separator}currency=USD"
+            
+            # Extract data, then apply the city and price known from the search page
+            data = self.extract_listing(page, url)
+            return self.apply_search_context(data, city_name, search_price)
+            
+        except Exception as e:
+            browser = page.context.browser
+            if browser is not None and not browser.is_connected():
+                raise  # Let the pool relaunch the crashed browser and retry
+            return None
     
     def scrape_single(self, url):
         """Single listing mode (from button)"""
@@ -604,12 +835,14 @@ class AirbnbScraperApp:
                     viewport={'width': 1920, 'height': 1080},
                     user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 Chrome/120.0.0.0 Safari/537.36"
                 )
+                RequestBlocker(enabled=self.block_requests).attach(context)
+                self.recorder = FixtureStore() if self.record_var.get() else None
                 page = context.new_page()
                 
                 self.progress_var.set(50)
                 data = self.extract_listing(page, url)
                 if data:
-                    self.scraped_data.append(data)
+                    self.keep_result(None, data)
                     self.log(f"Scraped: {data.get('city', 'Unknown')}")
                 self.progress_var.set(100)
                 
@@ -617,509 +850,45 @@ class AirbnbScraperApp:
                 if browser:
                     browser.close()
     
-    def extract_json_from_page(self, page_html: str) -> List[Dict]:
-        """Extract JSON data from script tags in the page"""
-        json_pool = []
-        
-        # Extract __NEXT_DATA__ (most reliable for Airbnb)
-        next_data_match = re.search(r'<script[^>]*id="__NEXT_DATA__"[^>]*>(.*?)</script>', page_html, re.DOTALL)
-        if next_data_match:
-            try:
-                data = json.loads(next_data_match.group(1).strip())
-                json_pool.append(data)
-            except:
-                pass
-        
-        # Extract application/ld+json
-        for match in re.finditer(r'<script[^>]*type="application/ld\+json"[^>]*>(.*?)</script>', page_html, re.DOTALL):
-            try:
-                data = json.loads(match.group(1).strip())
-                if isinstance(data, dict):
-                    json_pool.append(data)
-                elif isinstance(data, list):
-                    json_pool.extend([x for x in data if isinstance(x, dict)])
-            except:
-                pass
-        
-        # Extract application/json
-        for match in re.finditer(r'<script[^>]*type="application/json"[^>]*>(.*?)</script>', page_html, re.DOTALL):
-            raw = match.group(1).strip()
-            if raw.startswith("{") and raw.endswith("}"):
-                try:
-                    json_pool.append(json.loads(raw))
-                except:
-                    pass
-        
-        return json_pool
-    
-    def deep_find_in_json(self, obj, keys: List[str]):
-        """Recursively search for keys in nested JSON"""
-        if isinstance(obj, dict):
-            for k, v in obj.items():
-                if k.lower().replace("_", "").replace("-", "") in [key.lower().replace("_", "").replace("-", "") for key in keys]:
-                    return v
-            for v in obj.values():
-                result = self.deep_find_in_json(v, keys)
-                if result is not None:
-                    return result
-        elif isinstance(obj, list):
-            for item in obj:
-                result = self.deep_find_in_json(item, keys)
-                if result is not None:
-                    return result
-        return None
-    
-    def extract_room_type_from_json(self, json_pool: List[Dict]) -> Optional[str]:
-        """Extract room type from JSON data (most reliable method)"""
-        # Search for room type in JSON
-        for obj in json_pool:
-            room_type = self.deep_find_in_json(obj, [
-                "roomType", "room_type", "roomTypeCategory", 
-                "roomTypeName", "room_type_category", "room_type_name",
-                "propertyType", "property_type"
-            ])
-            
-            if room_type and isinstance(room_type, str):
-                rt = room_type.lower()
-                # Normalize to standard types
-                if "entire" in rt and ("home" in rt or "apartment" in rt or "place" in rt):
-                    return "Entire home/apt"
-                elif "private room" in rt or "room in" in rt:
-                    return "Private room"
-                elif "shared room" in rt:
-                    return "Shared room"
-                elif "hotel" in rt:
-                    return "Hotel room"
-                else:
-                    return room_type
-        
-        # Fallback: search in text fields
-        for obj in json_pool:
-            for text_key in ["name", "title", "description"]:
-                text = self.deep_find_in_json(obj, [text_key])
-                if text and isinstance(text, str):
-                    t = text.lower()
-                    if "entire place" in t or "entire home" in t or "entire apartment" in t:
-                        return "Entire home/apt"
-                    elif "private room" in t:
-                        return "Private room"
-                    elif "shared room" in t:
-                        return "Shared room"
-                    elif "hotel room" in t:
-                        return "Hotel room"
-        
-        return None
-    
     def extract_listing(self, page, url) -> Optional[Dict]:
         """Extract data from a single listing page - complete version"""
-        data = {
-            # URL
-            "url": url,
-            
-            # Price & Room Info
-            "realSum": None,
-            "room_type": None,
-            "room_shared": False,
-            "room_private": False,
-            "person_capacity": None,
-            "host_is_superhost": False,
-            "multi": False,
-            "biz": False,
-            
-            # Location
-            "city": None,
-            "lat": None,
-            "lng": None,
-            
-            # Ratings
-            "cleanliness_rating": None,
-            "guest_satisfaction_overall": None,
-            
-            # Property Details
-            "bedrooms": None,
-            "beds": None,
-            "bathrooms": None,
-            
-            # Amenities
-            "wifi": False,
-            "kitchen": False,
-            "air_conditioning": False,
-            "parking": False,
-            "tv": False,
-            "heating": False,
-        }
-        
         try:
+            capture = ResponseCapture(patterns=(LISTING_API_PATTERN,)).attach(page) if self.capture_var.get() else None
             page.goto(url, wait_until="domcontentloaded", timeout=30000)
-            time.sleep(2)
-            
-            try:
-                page.wait_for_load_state("networkidle", timeout=8000)
-            except:
-                pass
-            
-            # Check for error page
-            page_title = page.title().lower()
-            if "oops" in page_title or "not found" in page_title:
-                return None
-            
-            # Get full page text
-            page_text = ""
-            try:
-                page_text = page.inner_text('body').lower()
-            except:
-                pass
-            
-            # ═══════════════════════════════════════════════
-            # CITY & HOST INFO
-            # ═══════════════════════════════════════════════
-            full_title = page.title()
-            
-            # Method 1: Extract city from URL
-            import re
-            city_from_url = re.search(r'/s/([^/]+)/homes', url) or re.search(r'/rooms/.*[?&].*city=([^&]+)', url)
-            if city_from_url:
-                data["city"] = city_from_url.group(1).replace('-', ' ').replace('%20', ' ').title()
-            
-            # Method 2: From page title (last part before Airbnb)
-            if not data["city"]:
-                parts = full_title.split(" - ")
-                for part in reversed(parts):
-                    if "airbnb" not in part.lower() and len(part) > 2:
-                        # Get city name (first word that looks like a city)
-                        city_match = re.search(r'([A-Z][a-z]+(?:\s+[A-Z][a-z]+)?)', part)
-                        if city_match:
-                            data["city"] = city_match.group(1)
-                            break
-            
-            # Check if host is superhost
-            if "superhost" in page_text:
-                data["host_is_superhost"] = True
-            
-            # ═══════════════════════════════════════════════
-            # ROOM TYPE & FLAGS
-            # ═══════════════════════════════════════════════
-            h1 = page.query_selector('h1')
-            title_text = h1.inner_text().strip().lower() if h1 else ""
             
-            # Get full HTML for better extraction
-            html_content = page.content().lower()
-            
-            # ═══════════════════════════════════════════════
-            # PROPERTY DETAILS (beds, bedrooms) - JSON extraction first
-            # ═══════════════════════════════════════════════
-            
-            # Get HTML content for JSON extraction
-            html_content = page.content()
-            json_pool = self.extract_json_from_page(html_content)
-            
-            # Extract beds from JSON first
-            if json_pool:
-                beds_json = self.deep_find_in_json(json_pool, [
-                    "beds", "bedCount", "bed_count", "numberOfBeds", "bedsCount"
-                ])
-                if beds_json:
-                    try:
-                        data["beds"] = int(beds_json)
-                    except:
-                        pass
-            
-            # Fallback: Extract beds from text
-            if not data["beds"]:
-                details_patterns = [
-                    r'(\d+)\s*(?:single|double|queen|king|twin|full)\s*beds?',
-                    r'(\d+)\s*beds?\s*·',
-                    r'(\d+)\s*beds?\s*•',
-                ]
-                for pattern in details_patterns:
-                    bed_match = re.search(pattern, page_text)
-                    if bed_match:
-                        data["beds"] = int(bed_match.group(1))
-                        break
-            
-            # Extract bedrooms from JSON first
-            if json_pool:
-                bedrooms_json = self.deep_find_in_json(json_pool, [
-                    "bedrooms", "bedroomCount", "bedroom_count", "numberOfBedrooms", "bedroomsCount"
-                ])
-                if bedrooms_json:
-                    try:
-                        data["bedrooms"] = int(bedrooms_json)
-                    except:
-                        pass
-            
-            # Fallback: Extract bedrooms from text
-            if not data["bedrooms"]:
-                bedroom_patterns = [
-                    r'(\d+)\s*bedrooms?\s*·',
-                    r'(\d+)\s*bedrooms?\s*•',
-                    r'(\d+)\s*bedrooms?[^a-z]',
-                ]
-                for pattern in bedroom_patterns:
-                    bedroom_match = re.search(pattern, page_text)
-                    if bedroom_match:
-                        data["bedrooms"] = int(bedroom_match.group(1))
-                        break
-            
-            # ═══════════════════════════════════════════════
-            # ROOM TYPE - JSON extraction first (MOST RELIABLE)
-            # ═══════════════════════════════════════════════
-            try:
-                
-                # Reuse json_pool from above (already extracted for beds/bedrooms)
-                if json_pool:
-                    data["room_type"] = self.extract_room_type_from_json(json_pool)
-                    if data["room_type"]:
-                        # Set flags based on room type
-                        if "private room" in data["room_type"].lower():
-                            data["room_private"] = True
-                        elif "shared room" in data["room_type"].lower():
-                            data["room_shared"] = True
-                
-                # Method 2: Check all h2 elements (fallback)
-                if not data["room_type"]:
-                    h2_elements = page.query_selector_all('h2')
-                    for h2 in h2_elements:
-                        try:
-                            h2_text = h2.inner_text().strip().lower()
-                            if "room in" in h2_text:
-                                data["room_type"] = "Private room"
-                                data["room_private"] = True
-                                break
-                            elif "entire" in h2_text and ("home" in h2_text or "apartment" in h2_text):
-                                data["room_type"] = "Entire home/apt"
-                                break
-                            elif "shared room" in h2_text:
-                                data["room_type"] = "Shared room"
-                                data["room_shared"] = True
-                                break
-                            elif "hotel room" in h2_text:
-                                data["room_type"] = "Hotel room"
-                                break
-                        except:
-                            continue
-                
-                # Method 3: Check HTML if h2 didn't work
-                if not data["room_type"]:
-                    html_lower = html_content.lower()
-                    html_start = html_lower[:1000]
-                    if "room in" in html_start and "shared bathroom" in page_text:
-                        data["room_type"] = "Private room"
-                        data["room_private"] = True
-                    elif "private room in" in html_start or "room in" in html_start:
-                        data["room_type"] = "Private room"
-                        data["room_private"] = True
-                    elif "entire home" in html_start or "entire apartment" in html_start or "entire place" in html_start:
-                        data["room_type"] = "Entire home/apt"
-                    elif "shared room in" in html_start:
-                        data["room_type"] = "Shared room"
-                        data["room_shared"] = True
-                    elif "hotel room" in html_start:
-                        data["room_type"] = "Hotel room"
-                
-                # Method 4: Fallback to page text search
-                if not data["room_type"]:
-                    page_start = page_text[:2000].lower()
-                    if "entire home" in page_start or "entire apartment" in page_start:
-                        data["room_type"] = "Entire home/apt"
-                    elif "private room" in page_start:
-                        data["room_type"] = "Private room"
-                        data["room_private"] = True
-                    elif "shared room" in page_start:
-                        data["room_type"] = "Shared room"
-                        data["room_shared"] = True
-                    elif "hotel room" in page_start:
-                        data["room_type"] = "Hotel room"
-            except Exception as e:
-                pass
-            
-            # ═══════════════════════════════════════════════
-            # LAT & LNG - Multiple extraction methods
-            # ═══════════════════════════════════════════════
-            try:
-                # Get all script content
-                all_scripts = ""
-                scripts = page.query_selector_all('script')
-                for script in scripts:
-                    try:
-                        all_scripts += script.inner_text(timeout=1000) + " "
-                    except:
-                        continue
-                
-                # Try multiple patterns
-                lat_patterns = [
-                    r'"lat"\s*:\s*([-\d.]+)',
-                    r'"latitude"\s*:\s*([-\d.]+)',
-                    r'listing.*?"lat"\s*:\s*([-\d.]+)',
-                ]
-                lng_patterns = [
-                    r'"lng"\s*:\s*([-\d.]+)',
-                    r'"longitude"\s*:\s*([-\d.]+)',
-                    r'listing.*?"lng"\s*:\s*([-\d.]+)',
-                ]
-                
-                for lat_pat, lng_pat in zip(lat_patterns, lng_patterns):
-                    lat_m = re.search(lat_pat, all_scripts)
-                    lng_m = re.search(lng_pat, all_scripts)
-                    if lat_m and lng_m:
-                        lat_val = float(lat_m.group(1))
-                        lng_val = float(lng_m.group(1))
-                        if abs(lat_val) > 0.1 and abs(lng_val) > 0.1:
-                            data["lat"] = lat_val
-                            data["lng"] = lng_val
-                            break
-                
-                # Fallback: search in page HTML
-                if not data["lat"]:
-                    html_content = page.content()
-                    lat_m = re.search(r'"lat"\s*:\s*([-\d.]+)', html_content)
-                    lng_m = re.search(r'"lng"\s*:\s*([-\d.]+)', html_content)
-                    if lat_m and lng_m:
-                        lat_val = float(lat_m.group(1))
-                        lng_val = float(lng_m.group(1))
-                        if abs(lat_val) > 0.1 and abs(lng_val) > 0.1:
-                            data["lat"] = lat_val
-                            data["lng"] = lng_val
-            except:
-                pass
-            
-            # ═══════════════════════════════════════════════
-            # REALSUM (PRICE PER NIGHT)
-            # ═══════════════════════════════════════════════
-            # REALSUM (PRICE PER NIGHT) - Improved with wait_for_selector
-            # ═══════════════════════════════════════════════
-            # Method 1: Wait for price element to load
-            try:
-                price_selectors = [
-                    'span._1y74zjx',
-                    'span._tyxjp1',
-                    'div._1jo4hgw span',
-                    'span[class*="price"]',
-                ]
-                for selector in price_selectors:
-                    try:
-                        price_elem = page.wait_for_selector(selector, timeout=3000)
-                        if price_elem:
-                            price_text = price_elem.inner_text()
-                            # Extract numbers (works for $123 or 123$)
-                            price_num = re.search(r'([\d,]+)', price_text)
-                            if price_num:
-                                price_val = int(price_num.group(1).replace(',', ''))
-                                if 5 < price_val < 50000:
-                                    data["realSum"] = price_val
-                                    break
-                    except:
-                        continue
-            except:
-                pass
-            
-            # Method 2: Look for price in JSON data
-            if not data["realSum"]:
-                try:
-                    price_json = re.search(r'"priceString"\s*:\s*"([^"]+)"', all_scripts)
-                    if price_json:
-                        price_str = price_json.group(1)
-                        price_num = re.search(r'([\d,]+)', price_str)
-                        if price_num:
-                            data["realSum"] = int(price_num.group(1).replace(',', ''))
-                except:
-                    pass
-            
-            # Method 3: Search in page text
-            if not data["realSum"]:
-                price_patterns = [
-                    r'[\$€£]\s*([\d,]+)\s*night',
-                    r'[\$€£]\s*([\d,]+)\s*per\s*night',
-                    r'[\d,]+\s*[\$€£]\s*night',
-                ]
-                for pattern in price_patterns:
-                    price_m = re.search(pattern, page_text, re.IGNORECASE)
-                    if price_m:
-                        price_val = int(price_m.group(1).replace(',', ''))
-                        if 5 < price_val < 50000:
-                            data["realSum"] = price_val
-                            break
-            
-            # ═══════════════════════════════════════════════
-            # PERSON_CAPACITY / BEDROOMS / BEDS
-            # ═══════════════════════════════════════════════
-            guests_m = re.search(r'(\d+)\s*guest', page_text)
-            if guests_m:
-                data["person_capacity"] = int(guests_m.group(1))
-            
-            # ═══════════════════════════════════════════════
-            # REVIEW COUNT
-            # ═══════════════════════════════════════════════
-            review_m = re.search(r'(\d+)\s*review', page_text)
-            if review_m:
-                data["review_count"] = int(review_m.group(1))
-            
-            # ═══════════════════════════════════════════════
-            # RATINGS (guest_satisfaction_overall & cleanliness_rating)
-            # ═══════════════════════════════════════════════
-            # Try multiple methods for overall rating
-            # Method 1: aria-label
-            rating_elem = page.query_selector('span[aria-label*="rating"]')
-            if rating_elem:
-                rating_text = rating_elem.get_attribute('aria-label') or rating_elem.inner_text()
-                rating_m = re.search(r'([\d.]+)', rating_text)
-                if rating_m:
-                    val = float(rating_m.group(1))
-                    if val <= 5:
-                        data["guest_satisfaction_overall"] = val
-            
-            # Method 2: Search in page text for "X.XX rating" or "rated X.XX"
-            if not data["guest_satisfaction_overall"]:
-                overall_patterns = [
-                    r'([\d.]+)\s*rating',
-                    r'rated\s*([\d.]+)',
-                    r'rating[:\s]*([\d.]+)',
-                    r'★\s*([\d.]+)',
-                ]
-                for pattern in overall_patterns:
-                    rating_m = re.search(pattern, page_text, re.IGNORECASE)
-                    if rating_m:
-                        val = float(rating_m.group(1))
-                        if 0 < val <= 5:
-                            data["guest_satisfaction_overall"] = val
-                            break
-            
-            # Cleanliness rating
-            cleanliness_m = re.search(r'cleanliness\s*[:\s]*([\d.]+)', page_text)
-            if cleanliness_m:
-                val = float(cleanliness_m.group(1))
-                if val <= 5:
-                    data["cleanliness_rating"] = val
-            
-            # ═══════════════════════════════════════════════
-            # AMENITIES (6 only: wifi, kitchen, AC, parking, tv, heating)
-            # ═══════════════════════════════════════════════
-            amenities_str = page_text
-            
-            data["wifi"] = any(w in amenities_str for w in ["wifi", "wi-fi", "internet"])
-            data["kitchen"] = "kitchen" in amenities_str
-            data["air_conditioning"] = any(w in amenities_str for w in ["air conditioning", "a/c", "ac", "cooling"])
-            data["parking"] = any(w in amenities_str for w in ["parking", "garage"])
-            data["tv"] = any(w in amenities_str for w in ["tv", "television", "hdtv"])
-            data["heating"] = "heating" in amenities_str
+            # API capture first; the DOM is only parsed when no listing response arrived
+            data, payloads, snapshot = None, [], None
+            if capture and self.readiness.wait_for_capture(page, capture):
+                payloads = capture.payloads()
+                data = parse_api_listing(url, payloads)
             
+            # Record mode snapshots the DOM even when the API answered, so fixtures are complete
+            if data is None or self.recorder:
+                self.readiness.wait_for_listing(page)
+                snapshot = snapshot_page(page)
+            if data is None:
+                data = parse_listing(url, snapshot, log=self.log)
+            if self.recorder:
+                self.recorder.save_listing(url, snapshot, payloads)
             return data
             
         except Exception as e:
+            browser = page.context.browser
+            if browser is not None and not browser.is_connected():
+                raise  # Browser crashed: the pool counts it, relaunches and retries the task
             self.log(f"Extraction error: {str(e)[:100]}")
-            # Return partial data even if extraction fails
-            return data if data.get("beds") or data.get("room_type") else None
+            return None
     
     def scraping_complete(self):
         self.start_btn.config(state=tk.NORMAL)
         self.stop_btn.config(state=tk.DISABLED)
         self.progress_var.set(100)
         
-        if self.scraped_data:
+        if self.scraped_count:
             self.export_btn.config(state=tk.NORMAL)
-            self.results_var.set(f"Scraped {len(self.scraped_data)} listings successfully")
+            self.results_var.set(f"Scraped {self.scraped_count} listings successfully")
             self.log(f"\n{'='*50}")
-            self.log(f"COMPLETE: {len(self.scraped_data)} listings scraped")
+            self.log(f"COMPLETE: {self.scraped_count} listings scraped")
             self.log(f"{'='*50}")
             
             # Auto-save
@@ -1129,102 +898,99 @@ class AirbnbScraperApp:
         
         self.status_var.set("Ready")
     
+    def open_frontier(self):
+        """Open frontier.db for this run when "Resume runs" is on"""
+        try:
+            ttl_hours = max(0.0, float(self.ttl_var.get()))
+        except ValueError:
+            ttl_hours = 24.0
+        self.frontier = UrlFrontier(max_age_hours=ttl_hours) if self.resume_var.get() else None
+        if self.frontier and self.frontier.recovered:
+            self.log(f"Frontier: {self.frontier.recovered} listings left in flight by the last run are queued again")
+    
+    def close_frontier(self):
+        if self.frontier:
+            self.log(self.frontier.summary())
+            self.frontier.close()
+            self.frontier = None
+    
+    def checkpoint(self, url: str, data: Optional[Dict], reason: str = "no listing data"):
+        """Record a finished listing in the frontier: done with data, failed (with the reason) without"""
+        if not self.frontier:
+            return
+        if data:
+            self.frontier.done(url, data.get('realSum'))
+        else:
+            self.frontier.failed(url, reason)
+    
+    def keep_result(self, city: Optional[str], data: Dict):
+        """Count a new listing and stream it to disk (the record is not kept in memory)"""
+        self.scraped_count += 1
+        self.stream_result(city, data)
+    
+    def stream_result(self, city: Optional[str], data: Dict):
+        """Append a finished listing to its city's JSON Lines file right away (see result_sink)"""
+        key = self.city_file_name(city or data.get('city'))
+        sink = self.sinks.get(key)
+        if sink is None:
+            sink = self.sinks[key] = ResultSink(f"{key}_airbnb.jsonl")
+        sink.write(data)
+    
+    def city_file_name(self, city_name: Optional[str]) -> str:
+        return (city_name or 'data').lower().replace(' ', '_')
+    
     def auto_save(self):
-        """Auto-save results to CSV"""
-        # Get city name for filename
-        city_name = self.scraped_data[0].get('city', 'data') if self.scraped_data else 'data'
-        city_name = city_name.lower().replace(' ', '_')
-        
-        # CSV with clean naming
-        csv_file = f"{city_name}_airbnb.csv"
-        fieldnames = [
-            "url",
-            "realSum",
-            "room_type",
-            "room_shared",
-            "room_private",
-            "person_capacity",
-            "host_is_superhost",
-            "multi",
-            "biz",
-            "cleanliness_rating",
-            "guest_satisfaction_overall",
-            "bedrooms",
-            "city",
-            "lng",
-            "lat",
-            "beds",
-            "wifi",
-            "kitchen",
-            "air_conditioning",
-            "parking",
-            "tv",
-            "heating",
-        ]
-        
-        with open(csv_file, 'w', newline='', encoding='utf-8') as f:
-            writer = csv.DictWriter(f, fieldnames=fieldnames, extrasaction='ignore')
-            writer.writeheader()
-            writer.writerows(self.scraped_data)
-        
-        self.log(f"Saved: {csv_file}")
+        """Compact every city's streamed results into its CSV"""
+        for key in list(self.sinks):
+            self.auto_save_city(key)
     
-    def auto_save_city(self, city_name, listings):
-        """Save a specific city's listings to CSV"""
-        city_name = city_name.lower().replace(' ', '_')
+    def auto_save_city(self, city_name, listings=None):
+        """Compact a city's streamed listings (<city>_airbnb.jsonl) into <city>_airbnb.csv"""
+        city_name = self.city_file_name(city_name)
         
         # CSV with clean naming
         csv_file = f"{city_name}_airbnb.csv"
-        fieldnames = [
-            "url",
-            "realSum",
-            "room_type",
-            "room_shared",
-            "room_private",
-            "person_capacity",
-            "host_is_superhost",
-            "multi",
-            "biz",
-            "cleanliness_rating",
-            "guest_satisfaction_overall",
-            "bedrooms",
-            "city",
-            "lng",
-            "lat",
-            "beds",
-            "wifi",
-            "kitchen",
-            "air_conditioning",
-            "parking",
-            "tv",
-            "heating",
-        ]
-        
-        with open(csv_file, 'w', newline='', encoding='utf-8') as f:
-            writer = csv.DictWriter(f, fieldnames=fieldnames, extrasaction='ignore')
-            writer.writeheader()
-            writer.writerows(listings)
-        
-        self.log(f"Saved {len(listings)} listings to: {csv_file}")
+        sink = self.sinks.pop(city_name, None)
+        if sink is not None:
+            sink.close()
+            # Last record per URL wins, so listings re-scraped after a crash appear once.
+            # Resumed runs keep the JSON Lines file: it holds the listings of earlier runs too.
+            saved = compact(str(sink.path), csv_file, CSV_FIELDNAMES, key="url",
+                            remove_source=not self.resume_var.get())
+        else:
+            with open(csv_file, 'w', newline='', encoding='utf-8') as f:
+                writer = csv.DictWriter(f, fieldnames=CSV_FIELDNAMES, extrasaction='ignore')
+                writer.writeheader()
+                writer.writerows(listings or [])
+            saved = len(listings or [])
+        
+        if csv_file not in self.saved_files:
+            self.saved_files.append(csv_file)
+        self.log(f"Saved {saved} listings to: {csv_file}")
     
     def export_csv(self):
-        if not self.scraped_data:
+        """Merge this run's auto-saved CSVs into one file, streaming row by row"""
+        sources = [path for path in self.saved_files if Path(path).exists()]
+        if not sources:
             messagebox.showwarning("No Data", "No data to export")
             return
         
-        city_name = self.scraped_data[0].get('city', 'data').lower().replace(' ', '_')
         file_path = filedialog.asksaveasfilename(
             defaultextension=".csv",
             filetypes=[("CSV files", "*.csv"), ("All files", "*.*")],
-            initialfile=f"{city_name}_airbnb.csv"
+            initialfile=Path(sources[0]).name if len(sources) == 1 else "all_cities_airbnb.csv"
         )
         
         if file_path:
-            fieldnames = list(self.scraped_data[0].keys())
-            with open(file_path, 'w', newline='', encoding='utf-8') as f:
-                writer = csv.DictWriter(f, fieldnames=fieldnames)
+            # Write then rename: the target may be one of the sources
+            tmp_path = f"{file_path}.tmp"
+            with open(tmp_path, 'w', newline='', encoding='utf-8') as f:
+                writer = csv.DictWriter(f, fieldnames=CSV_FIELDNAMES, extrasaction='ignore')
                 writer.writeheader()
-                writer.writerows(self.scraped_data)
+                for source in sources:
+                    with open(source, newline='', encoding='utf-8') as source_file:
+                        writer.writerows(csv.DictReader(source_file))
+            Path(tmp_path).replace(file_path)
             
             self.log(f"Exported to: {file_path}")
             messagebox.showinfo("Export Complete", f"Data exported to:\n{file_path}")
@@ -0,0 +1,20 @@
+import io
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "app"))
+
+from data_store import _to_flag  # noqa: E402
+
+
+def test_to_flag_maps_t_f_strings_read_from_csv():
+    # pandas 3 reads these as StringDtype rather than object
+    series = pd.read_csv(io.StringIO("flag\nt\nf\nTrue\nFALSE\n"))["flag"]
+    assert _to_flag(series).tolist() == [1, 0, 1, 0]
+
+
+def test_to_flag_keeps_numeric_and_bool_columns():
+    assert _to_flag(pd.Series([1.0, 0.0, None])).tolist() == [1, 0, 0]
+    assert _to_flag(pd.Series([True, False])).tolist() == [1, 0]
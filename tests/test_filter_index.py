@@ -0,0 +1,46 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# The app modules import each other as top-level modules (streamlit runs app/app.py)
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "app"))
+
+from filter_index import BOX_COLUMNS, price_box, summarize  # noqa: E402
+
+
+def _listings(n: int) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    return pd.DataFrame({
+        "room_type": pd.Categorical(rng.choice(["Entire home/apt", "Private room"], n)),
+        "realSum": rng.uniform(50, 500, n),
+        "guest_satisfaction_overall": rng.uniform(60, 100, n),
+        "is_weekend": rng.integers(0, 2, n),
+        "host_is_superhost": rng.integers(0, 2, n),
+        "person_capacity": rng.integers(1, 7, n).astype(float),
+    })
+
+
+def test_price_box_of_empty_frame_has_box_columns():
+    box = price_box(_listings(50).iloc[0:0])
+    assert box.empty
+    assert list(box.columns) == BOX_COLUMNS
+
+
+def test_summarize_with_no_matching_listings():
+    aggregates = summarize(_listings(50).iloc[0:0])
+    assert aggregates["listings"] == 0
+    assert aggregates["avg_price"] == 0.0
+    assert aggregates["avg_rating"] == 0.0
+    assert aggregates["price_box"].empty
+    assert list(aggregates["price_box"].columns) == BOX_COLUMNS
+
+
+def test_price_box_matches_group_quantiles():
+    frame = _listings(200)
+    box = price_box(frame)
+    for room_type, prices in frame.groupby("room_type", observed=True)["realSum"]:
+        assert np.isclose(box.loc[room_type, "median"], prices.median())
+        assert box.loc[room_type, "lowerfence"] >= prices.min()
+        assert box.loc[room_type, "upperfence"] <= prices.max()
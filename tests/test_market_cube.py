@@ -0,0 +1,45 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# The app modules import each other as top-level modules (streamlit runs app/app.py)
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "app"))
+
+from filter_index import BOX_COLUMNS, filter_key, summarize  # noqa: E402
+from market_cube import MarketCube  # noqa: E402
+
+
+def _listings(n: int) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    return pd.DataFrame({
+        "city": pd.Categorical(rng.choice(["Paris", "Rome"], n)),
+        "room_type": pd.Categorical(rng.choice(["Entire home/apt", "Private room"], n)),
+        "realSum": rng.uniform(50, 500, n),
+        "guest_satisfaction_overall": rng.uniform(60, 100, n),
+        "is_weekend": rng.integers(0, 2, n),
+        "host_is_superhost": rng.integers(0, 2, n),
+        "person_capacity": rng.integers(1, 7, n).astype(float),
+    })
+
+
+def test_empty_rollup_matches_summarize():
+    frame = _listings(200)
+    # No listing is priced above $10,000
+    key = filter_key([], [], (10000, 20000), (1, 6), 0.0)
+    aggregates = MarketCube(frame).rollup(key)
+    expected = summarize(frame.iloc[0:0])
+
+    assert aggregates["listings"] == expected["listings"] == 0
+    assert aggregates["avg_price"] == expected["avg_price"] == 0.0
+    assert aggregates["avg_rating"] == expected["avg_rating"] == 0.0
+    assert aggregates["price_box"].empty
+    assert list(aggregates["price_box"].columns) == list(expected["price_box"].columns) == BOX_COLUMNS
+
+
+def test_rollup_box_has_box_columns():
+    frame = _listings(200)
+    aggregates = MarketCube(frame).rollup(filter_key([], [], (0, 1000), (1, 6), 0.0))
+    assert aggregates["listings"] == len(frame)
+    assert list(aggregates["price_box"].columns) == BOX_COLUMNS